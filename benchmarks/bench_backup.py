@@ -0,0 +1,99 @@
+"""Backup tezligi va hajmini katta sintetik bazada o'lchash
+
+Ishlatish:
+    python benchmarks/bench_backup.py --users 1000000 --movies 20000
+
+Backup paytida parallel yozuvchi ishlab turadi: u bloklanib qolmasligi va
+eng uzun yozish kechikishi ham natijada ko'rsatiladi.
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager  # noqa: E402
+from database.backup import build_backup, cleanup_backup, format_size  # noqa: E402
+
+
+def populate(db_path: str, users: int, movies: int):
+    DatabaseManager(db_path)
+    conn = sqlite3.connect(db_path)
+    names = ['Ali', 'Vali', 'Aziz', 'Dilnoza', 'Malika', 'Sardor', 'Jasur', 'Nodira']
+    batch = 50000
+    for start in range(0, users, batch):
+        conn.executemany(
+            "INSERT INTO users (user_id, first_name, username, language_code) VALUES (?, ?, ?, ?)",
+            (
+                (1000000 + i, random.choice(names), f"user{i}", random.choice(['uz', 'ru', 'en']))
+                for i in range(start, min(users, start + batch))
+            )
+        )
+    conn.executemany(
+        "INSERT INTO movies (code, message_id, channel_id, movie_name) VALUES (?, ?, ?, ?)",
+        ((str(i), i, '-1001234567890', f"Kino {i} (2024) HD.mp4") for i in range(1, movies + 1))
+    )
+    conn.commit()
+    conn.close()
+
+
+def writer_loop(db_path: str, stop: threading.Event, latencies: list):
+    conn = sqlite3.connect(db_path, timeout=30)
+    user_id = 10 ** 9
+    while not stop.is_set():
+        started = time.perf_counter()
+        conn.execute(
+            "INSERT OR REPLACE INTO users (user_id, first_name) VALUES (?, ?)", (user_id, 'bench')
+        )
+        conn.commit()
+        latencies.append(time.perf_counter() - started)
+        user_id += 1
+        time.sleep(0.002)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=500000)
+    parser.add_argument('--movies', type=int, default=10000)
+    parser.add_argument('--part-size-mb', type=int, default=19)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='bench-backup-')
+    db_path = os.path.join(work, 'bench.db')
+    started = time.perf_counter()
+    populate(db_path, args.users, args.movies)
+    print(f"Baza tayyorlandi: {format_size(os.path.getsize(db_path))}, {time.perf_counter() - started:.1f} s")
+
+    stop = threading.Event()
+    latencies = []
+    writer = threading.Thread(target=writer_loop, args=(db_path, stop, latencies))
+    writer.start()
+    try:
+        manifest = build_backup(db_path, part_size=args.part_size_mb * 1024 * 1024)
+    finally:
+        stop.set()
+        writer.join()
+
+    print(f"Snapshot:        {manifest['snapshot_seconds']:.2f} s")
+    print(f"Jami (gzip bilan): {manifest['duration_seconds']:.2f} s")
+    print(f"Hajm:            {format_size(manifest['size'])} -> {format_size(manifest['compressed_size'])} "
+          f"({manifest['compressed_size'] / max(1, manifest['size']):.0%})")
+    print(f"Bo'laklar:       {len(manifest['parts'])}")
+    print(f"Qatorlar:        {manifest['tables']}")
+    if latencies:
+        latencies.sort()
+        print(f"Parallel yozish: {len(latencies)} ta, p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+              f"max {latencies[-1] * 1000:.1f} ms")
+    cleanup_backup(manifest)
+    shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
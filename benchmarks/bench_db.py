@@ -0,0 +1,344 @@
+"""DatabaseManager metodlari mikro-benchmarki: bir necha jadval hajmida, baseline bilan solishtirish
+
+Har bir hajm uchun baza generate_dataset.py bilan to'ldiriladi, so'ng har bir ochiq
+metod `--min-time` davomida (kamida MIN_CALLS marta) chaqiriladi. Natijalar JSON
+ga yoziladi; `--baseline` berilsa, median vaqti `--threshold` dan ko'proq oshgan
+metodlar regressiya deb ko'rsatiladi va skript 1 kodi bilan tugaydi.
+
+Ishlatish:
+    python benchmarks/bench_db.py --sizes 10000,100000 --output bench_db.json
+    python benchmarks/bench_db.py --sizes 10000,100000 --baseline bench_db.json --threshold 0.25 --repeat 3
+    python benchmarks/bench_db.py --methods get_movie,get_stats --sizes 1000000
+    python benchmarks/bench_db.py --postgres postgresql://localhost/prokino_bench --sizes 100000
+
+PostgreSQL uchun alohida bo'sh baza bering: har bir hajmda jadvallar tozalanadi.
+Baseline va solishtirish bir xil mashinada olinishi kerak; shovqinli muhitda --repeat ni oshiring.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate_dataset import BASE_CHANNEL_ID, FIRST_USER_ID, TITLE_WORDS, BulkWriter, Generator, populate  # noqa: E402
+
+MIN_CALLS = 5
+WARMUP_CALLS = 2
+# Juda tez metodlarda shovqin katta: bundan kichik farq regressiya hisoblanmaydi (ms)
+MIN_DELTA_MS = 0.05
+BENCH_ADMIN_ID = 42
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# O'qiydigan metodlar nomlari shu bilan boshlanadi
+READ_PREFIXES = ('get_', 'is_', 'search_', 'user_has_', 'ping')
+# Benchmark qilinmaydigan xizmat metodlari
+SKIP = frozenset({
+    'add_reload_listener', 'clear_caches', 'close', 'execute_query', 'get_connection',
+    'get_db_path', 'init_database', 'reload',
+})
+
+
+class State:
+    """Chaqiruvlar uchun tasodifiy, lekin takrorlanuvchi argumentlar"""
+
+    def __init__(self, db, users: int, movies: int, seed: int):
+        self.rng = random.Random(seed)
+        self.users = users
+        self.movies = movies
+        self.counter = itertools.count(1)
+        self.created_channels = []
+        self.created_requests = []
+        now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        self.now = now.strftime(TIME_FORMAT)
+        self.until = (now + timedelta(days=3)).strftime(TIME_FORMAT)
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COALESCE(MAX(id), 1) FROM premium_requests")
+            self.max_request_id = cursor.fetchone()[0]
+            cursor.execute("SELECT COALESCE(MAX(id), 1) FROM premium_users")
+            self.max_premium_id = cursor.fetchone()[0]
+        db.add_admin_user(BENCH_ADMIN_ID, 'Bench', None)
+
+    def user_id(self) -> int:
+        return FIRST_USER_ID + self.rng.randrange(self.users) * 7
+
+    def code(self) -> str:
+        return str(self.rng.randint(1, self.movies))
+
+    def unique(self) -> int:
+        return next(self.counter)
+
+    def request_id(self) -> int:
+        return self.rng.randint(1, self.max_request_id)
+
+    def premium_row_id(self) -> int:
+        return self.rng.randint(1, self.max_premium_id)
+
+
+def _add_channel(db, s: State):
+    channel_id = f"-300{s.unique()}"
+    s.created_channels.append(channel_id)
+    return db.add_subscription_channel(channel_id, 'Bench', None, False)
+
+
+def _delete_channel(db, s: State):
+    channel_id = s.created_channels.pop() if s.created_channels else f"-399{s.unique()}"
+    return db.delete_subscription_channel(channel_id)
+
+
+def _create_request(db, s: State):
+    user_id = s.user_id()
+    request_id = db.create_premium_request(
+        user_id, 'Bench', None, '1 oy', 1, 15000, f"BENCH_{s.unique()}", 'photo', user_id, 1
+    )
+    if request_id:
+        s.created_requests.append(request_id)
+    return request_id
+
+
+def _activate_request(db, s: State):
+    request_id = s.created_requests.pop() if s.created_requests else s.request_id()
+    return db.activate_premium_request(request_id, BENCH_ADMIN_ID)
+
+
+# Metod nomi -> chaqiruv. Yangi ochiq metod qo'shilsa, shu yerga ham qo'shilishi kerak
+CASES = {
+    # Kinolar
+    'get_movie': lambda db, s: db.get_movie(s.code()),
+    'get_movie_for_delivery': lambda db, s: db.get_movie_for_delivery(s.code()),
+    'is_code_exists': lambda db, s: db.is_code_exists(s.code()),
+    'get_next_movie_code': lambda db, s: db.get_next_movie_code(),
+    'get_movies_batch': lambda db, s: db.get_movies_batch(after_id=s.rng.randrange(s.movies), limit=200),
+    'add_movie': lambda db, s: db.add_movie(str(1_000_000 + s.unique()), 1, BASE_CHANNEL_ID, 'Bench'),
+    'get_movie_info': lambda db, s: db.get_movie_info(s.code()),
+    'search_movies': lambda db, s: db.search_movies(' '.join(s.rng.sample(TITLE_WORDS, s.rng.randint(1, 2)))[:12]),
+    'set_movies_status': lambda db, s: db.set_movies_status([('ok', s.code()) for _ in range(50)]),
+    # Foydalanuvchilar va statistika
+    'upsert_user': lambda db, s: db.upsert_user(s.user_id(), 'Bench', None, 'uz'),
+    'get_all_users': lambda db, s: db.get_all_users(),
+    'get_stats': lambda db, s: db.get_stats(),
+    'ping': lambda db, s: db.ping(),
+    # Adminlar
+    'is_admin_user': lambda db, s: db.is_admin_user(s.user_id()),
+    'user_has_permission': lambda db, s: db.user_has_permission(BENCH_ADMIN_ID, 'movies'),
+    'get_admin': lambda db, s: db.get_admin(BENCH_ADMIN_ID),
+    'get_admins': lambda db, s: db.get_admins(),
+    'add_admin_user': lambda db, s: db.add_admin_user(10 ** 12 + s.unique(), 'Bench', None),
+    'remove_admin_user': lambda db, s: db.remove_admin_user(10 ** 12 + s.unique()),
+    'update_admin_permissions': lambda db, s: db.update_admin_permissions(BENCH_ADMIN_ID, can_broadcast=1),
+    # Kanallar va majburiy obuna
+    'get_channel': lambda db, s: db.get_channel(),
+    'set_channel': lambda db, s: db.set_channel(BASE_CHANNEL_ID),
+    'get_subscription_channels': lambda db, s: db.get_subscription_channels(),
+    'get_subscription_channels_with_ids': lambda db, s: db.get_subscription_channels_with_ids(),
+    'get_required_channels': lambda db, s: db.get_required_channels(),
+    'get_subscription_status': lambda db, s: db.get_subscription_status(),
+    'set_subscription_status': lambda db, s: db.set_subscription_status(True),
+    'get_subscription_message': lambda db, s: db.get_subscription_message(),
+    'set_subscription_message': lambda db, s: db.set_subscription_message("Obuna bo'ling:"),
+    'update_subscription_message': lambda db, s: db.update_subscription_message("Obuna bo'ling:"),
+    'add_subscription_channel': _add_channel,
+    'delete_subscription_channel': _delete_channel,
+    'delete_subscription_channel_by_id': lambda db, s: db.delete_subscription_channel_by_id(10 ** 9 + s.unique()),
+    'update_channel_required_status': lambda db, s: db.update_channel_required_status('-1002000000000', True),
+    'get_instagram_profiles': lambda db, s: db.get_instagram_profiles(),
+    'get_required_instagram_profiles': lambda db, s: db.get_required_instagram_profiles(),
+    'add_instagram_profile': lambda db, s: db.add_instagram_profile(f"bench_{s.unique()}", 'Bench', False),
+    'delete_instagram_profile': lambda db, s: db.delete_instagram_profile(10 ** 9 + s.unique()),
+    'update_instagram_required_status': lambda db, s: db.update_instagram_required_status(10 ** 9, True),
+    'get_channel_button': lambda db, s: db.get_channel_button(),
+    'toggle_channel_button': lambda db, s: db.toggle_channel_button(),
+    'update_channel_button': lambda db, s: db.update_channel_button('📢 Kanal', 'https://t.me/bench'),
+    'get_start_message': lambda db, s: db.get_start_message(),
+    'update_start_message': lambda db, s: db.update_start_message('Xush kelibsiz!'),
+    # Premium
+    'get_premium_settings': lambda db, s: db.get_premium_settings(),
+    'toggle_premium_status': lambda db, s: db.toggle_premium_status(),
+    'update_premium_prices': lambda db, s: db.update_premium_prices(15000, 40000, 75000, 140000),
+    'update_premium_description': lambda db, s: db.update_premium_description('Premium'),
+    'update_premium_card': lambda db, s: db.update_premium_card('8600 0000 0000 0000'),
+    'get_premium_stats': lambda db, s: db.get_premium_stats(),
+    'get_premium_users': lambda db, s: db.get_premium_users(10),
+    'get_premium_users_page': lambda db, s: db.get_premium_users_page(),
+    'get_premium_payments': lambda db, s: db.get_premium_payments(10),
+    'get_premium_payments_page': lambda db, s: db.get_premium_payments_page(),
+    'get_premium_requests_page': lambda db, s: db.get_premium_requests_page('pending'),
+    'get_premium_request': lambda db, s: db.get_premium_request(s.request_id()),
+    'get_premium_request_messages': lambda db, s: db.get_premium_request_messages(s.request_id()),
+    'add_premium_request_messages': lambda db, s: db.add_premium_request_messages(s.request_id(), [(BENCH_ADMIN_ID, 1)]),
+    'create_premium_request': _create_request,
+    'update_premium_request_status': lambda db, s: db.update_premium_request_status(
+        s.request_id(), 'rejected', BENCH_ADMIN_ID, only_pending=True
+    ),
+    'activate_premium_request': _activate_request,
+    'get_active_premium_rows': lambda db, s: db.get_active_premium_rows(s.now),
+    'get_expired_premium_users': lambda db, s: db.get_expired_premium_users(s.now),
+    'get_expiring_premium_users': lambda db, s: db.get_expiring_premium_users(s.now, s.until),
+    'mark_premium_expired': lambda db, s: db.mark_premium_expired([s.premium_row_id()]),
+    'mark_premium_reminded': lambda db, s: db.mark_premium_reminded([s.premium_row_id()]),
+    # Yetkazish va backup jurnallari
+    'add_delivery_dead_letter': lambda db, s: db.add_delivery_dead_letter(s.code(), s.user_id(), BASE_CHANNEL_ID, 1, 'bench'),
+    'get_delivery_dead_letters': lambda db, s: db.get_delivery_dead_letters(20),
+    'add_backup_log': lambda db, s: db.add_backup_log('full', None, None, 1, 1, 'dir', '/tmp/bench'),
+    'get_backup_logs': lambda db, s: db.get_backup_logs(),
+    'set_backup_log_status': lambda db, s: db.set_backup_log_status(1, 'ok'),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000', help="foydalanuvchilar soni bo'yicha hajmlar, vergul bilan")
+    parser.add_argument('--movies', type=int, default=10_000)
+    parser.add_argument('--methods', default='', help="faqat shu metodlar (vergul bilan)")
+    parser.add_argument('--min-time', type=float, default=0.3, help="har bir metod uchun o'lchash vaqti (s)")
+    parser.add_argument('--max-calls', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=1, help="o'lchash takrori: eng yaxshi median olinadi (shovqinga qarshi)")
+    parser.add_argument('--output', default=None, help="natijalar JSON fayli")
+    parser.add_argument('--baseline', default=None, help="solishtirish uchun avvalgi natijalar JSON fayli")
+    parser.add_argument('--threshold', type=float, default=0.25, help="ruxsat etilgan sekinlashish (0.25 = 25%%)")
+    parser.add_argument('--postgres', default=None, help="PostgreSQL DATABASE_URL (bo'lmasa vaqtinchalik SQLite)")
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+
+def measure(call, min_time: float, max_calls: int) -> dict:
+    for _ in range(WARMUP_CALLS):
+        call()
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < max_calls and (len(samples) < MIN_CALLS or time.perf_counter() - started < min_time):
+        call_started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - call_started)
+    samples.sort()
+    return {
+        'calls': len(samples),
+        'median_ms': round(samples[len(samples) // 2] * 1000, 4),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 4),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 4),
+    }
+
+
+def build_dataset(db, users: int, args):
+    dataset_args = argparse.Namespace(
+        users=users, movies=args.movies, premium=None, requests=None, channels=5, days=730, seed=args.seed
+    )
+    from config import SQLITE_SYNCHRONOUS
+    writer = BulkWriter(db, 50_000, SQLITE_SYNCHRONOUS)
+    if db.use_postgres:
+        writer.clear()
+    generator = Generator(dataset_args, datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0))
+    print(f"\n== {users:,} foydalanuvchi, {args.movies:,} kino ==")
+    populate(writer, generator)
+    writer.analyze()
+    db.clear_caches()
+
+
+def run_size(database_manager, backend: str, users: int, methods, args, workdir: str) -> dict:
+    path = os.path.join(workdir, f"bench_{users}.db")
+    db = database_manager(path)
+    results = {}
+    try:
+        build_dataset(db, users, args)
+        state = State(db, users, args.movies, args.seed)
+        for name in methods:
+            try:
+                rounds = [
+                    measure(lambda: CASES[name](db, state), args.min_time, args.max_calls)
+                    for _ in range(max(1, args.repeat))
+                ]
+                stats = min(rounds, key=lambda item: item['median_ms'])
+            except Exception as exc:
+                print(f"  {name:<36} xatolik: {exc}")
+                continue
+            results[f"{backend}/{users}/{name}"] = stats
+            print(f"  {name:<36}{stats['median_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['calls']:>7}")
+    finally:
+        db.close()
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> int:
+    """Baseline bilan solishtirish; regressiyalar sonini qaytaradi"""
+    regressions = 0
+    print(f"\n== Baseline bilan solishtirish (chegara +{threshold:.0%}) ==")
+    for key in sorted(results):
+        if key not in baseline:
+            continue
+        current = results[key]['median_ms']
+        previous = baseline[key]['median_ms']
+        ratio = current / previous if previous else 1.0
+        regressed = ratio > 1 + threshold and current - previous > MIN_DELTA_MS
+        if regressed or ratio < 1 - threshold:
+            mark = 'REGRESSIYA' if regressed else 'tezlashdi'
+            print(f"  {key:<56}{previous:>10.3f} -> {current:>10.3f} ms  ({ratio:.2f}x) {mark}")
+        regressions += regressed
+    missing = sorted(set(baseline) - set(results))
+    if missing:
+        print(f"  Baselineda bor, hozir o'lchanmagan: {len(missing)} ta")
+    print(f"  Regressiyalar: {regressions}")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    os.environ['DATABASE_URL'] = args.postgres or ''
+    # config.py DATABASE_URL ni import vaqtida o'qiydi
+    from database import DatabaseManager
+
+    public = sorted(
+        name for name in dir(DatabaseManager)
+        if not name.startswith('_') and callable(getattr(DatabaseManager, name)) and name not in SKIP
+    )
+    uncovered = [name for name in public if name not in CASES]
+    if uncovered:
+        print(f"⚠️ Benchmark case yo'q (CASES ga qo'shing): {', '.join(uncovered)}")
+    selected = [name.strip() for name in args.methods.split(',') if name.strip()]
+    methods = [name for name in public if name in CASES and (not selected or name in selected)]
+    # O'qishlar avval: yozuvchi metodlar qo'shgan qatorlar ro'yxatlarni kattalashtirmasin
+    methods.sort(key=lambda name: not name.startswith(READ_PREFIXES))
+
+    backend = 'postgres' if args.postgres else 'sqlite'
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    workdir = tempfile.mkdtemp(prefix='prokino_bench_db_')
+    results = {}
+    print(f"{'metod':<38}{'median ms':>10}{'p95 ms':>10}{'calls':>7}")
+    try:
+        for users in sizes:
+            results.update(run_size(DatabaseManager, backend, users, methods, args, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    payload = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'backend': backend,
+            'sizes': sizes,
+            'movies': args.movies,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        print(f"\nNatijalar: {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
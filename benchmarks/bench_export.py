@@ -0,0 +1,122 @@
+"""Mantiqiy eksport/import tezligini katta sintetik bazada o'lchash
+
+Ishlatish:
+    python benchmarks/bench_export.py --users 1000000
+    DATABASE_URL=postgresql://... python benchmarks/bench_export.py --users 1000000
+
+DATABASE_URL berilsa, import PostgreSQL ga (execute_values) qilinadi;
+aks holda ikkinchi SQLite bazaga (executemany).
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager  # noqa: E402
+from database.backup import cleanup_backup, format_size  # noqa: E402
+from database.export import build_export, import_export_file, list_tables  # noqa: E402
+from database.restore import unpack_backup  # noqa: E402
+
+
+def populate_sqlite(db_path: str, users: int, movies: int):
+    conn = sqlite3.connect(db_path)
+    names = ['Ali', 'Vali', 'Aziz', 'Dilnoza', 'Malika', 'Sardor', 'Jasur', 'Nodira']
+    batch = 50000
+    for start in range(0, users, batch):
+        conn.executemany(
+            "INSERT INTO users (user_id, first_name, username, language_code) VALUES (?, ?, ?, ?)",
+            (
+                (1000000 + i, random.choice(names), f"user{i}", random.choice(['uz', 'ru', 'en']))
+                for i in range(start, min(users, start + batch))
+            )
+        )
+    conn.executemany(
+        "INSERT INTO movies (code, message_id, channel_id, movie_name) VALUES (?, ?, ?, ?)",
+        ((str(i), i, '-1001234567890', f"Kino {i} (2024) HD.mp4") for i in range(1, movies + 1))
+    )
+    conn.commit()
+    conn.close()
+
+
+def check_round_trip(source, target, exported: dict):
+    """Import natijasi manbaga tengligini tekshirish: jadvallar, qatorlar soni va kino qidiruvi"""
+    errors = []
+    with source.get_connection() as conn:
+        cursor = conn.cursor()
+        source_tables = list_tables(source, cursor)
+        source_counts = {}
+        for table in source_tables:
+            cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+            source_counts[table] = cursor.fetchone()[0]
+    if sorted(exported) != sorted(source_tables):
+        errors.append(f"eksport jadvallari: {sorted(exported)} != {sorted(source_tables)}")
+    with target.get_connection() as conn:
+        cursor = conn.cursor()
+        for table, count in source_counts.items():
+            cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+            imported = cursor.fetchone()[0]
+            if imported != count:
+                errors.append(f"{table}: {imported} / {count} qator")
+    # Qidiruv indeksi eksportga kirmaydi: importdan keyin qayta qurilgan bo'lishi kerak
+    found = [code for code, _, _ in target.search_movies('Kino 1 2024', limit=5)]
+    if '1' not in found:
+        errors.append(f"qidiruv 'Kino 1 2024' -> {found}")
+    if errors:
+        print("❌ Round-trip xatolari:\n  " + '\n  '.join(errors))
+        sys.exit(1)
+    print(f"✅ Round-trip: {len(source_counts)} jadval, qatorlar soni va qidiruv mos")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--movies', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='bench-export-')
+    source_url = os.environ.pop('DATABASE_URL', '')
+    try:
+        # Manba har doim SQLite: bot SQLite -> PostgreSQL ko'chirishini takrorlaydi
+        import config
+        config.DATABASE_URL = ''
+        source = DatabaseManager(os.path.join(work, 'source.db'))
+        started = time.perf_counter()
+        populate_sqlite(source.get_db_path(), args.users, args.movies)
+        print(f"Manba baza: {format_size(os.path.getsize(source.get_db_path()))}, "
+              f"{time.perf_counter() - started:.1f} s")
+
+        manifest = build_export(source, batch_size=args.batch_size)
+        total_rows = sum(manifest['tables'].values())
+        seconds = manifest['duration_seconds']
+        print(f"Eksport: {total_rows} qator, {seconds:.2f} s ({total_rows / max(seconds, 1e-9):,.0f} qator/s), "
+              f"{format_size(manifest['size'])} -> {format_size(manifest['compressed_size'])}")
+
+        if source_url:
+            config.DATABASE_URL = source_url
+            os.environ['DATABASE_URL'] = source_url
+        import database.db_manager as db_manager
+        db_manager.DATABASE_URL = config.DATABASE_URL
+        target = DatabaseManager(os.path.join(work, 'target.db'))
+
+        export_path = unpack_backup([part['path'] for part in manifest['parts']], os.path.join(work, 'export.jsonl'))
+        started = time.perf_counter()
+        counts = import_export_file(target, export_path, batch_size=args.batch_size)
+        seconds = time.perf_counter() - started
+        backend = 'PostgreSQL' if target.use_postgres else 'SQLite'
+        print(f"Import ({backend}): {sum(counts.values())} qator, {seconds:.2f} s "
+              f"({sum(counts.values()) / max(seconds, 1e-9):,.0f} qator/s)")
+        cleanup_backup(manifest)
+        check_round_trip(source, target, manifest['tables'])
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""Handlerlar yuklama testi: soxta Bot API (benchmarks/fake_bot.py) va sintetik foydalanuvchilar
+
+Bot kodi o'zgarishsiz ishlatiladi (bot.py dagi db, handlerlar, RoutedRequest, scheduler,
+delivery navbati), faqat Telegram o'rniga lokal soxta server javob beradi. Har bir
+ssenariy uchun o'tkazuvchanlik (ops/s) va kechikish p50/p95/p99 chiqariladi.
+
+Ssenariylar:
+    message    - handle_message ga kino kodi (umumiy yo'l: admin va holat tekshiruvlari)
+    get_movie  - MovieHandlers.get_movie to'g'ridan-to'g'ri
+    dispatch   - Application.process_update orqali (filtrlar + handle_movie_code)
+    verify_sub - verify_subscription_callback ("✅ Obunani tekshirish" tugmasi)
+    admin      - admin callbacklari: admin_refresh, channel_list, premium_stats, premium_page
+    inline     - inline rejim: foydalanuvchi kino nomini harfma-harf yozadi (KEYSTROKE_MS oraliq bilan)
+    broadcast  - broadcast_to_all_users barcha foydalanuvchilarga (ops = yuborilgan xabarlar)
+
+Ishlatish:
+    python benchmarks/bench_handlers.py --requests 500 --concurrency 32 --latency-ms 50
+    python benchmarks/bench_handlers.py --scenarios broadcast --users 5000 --flood-rate 0.01 --fail-rate 0.05
+    python benchmarks/bench_handlers.py --postgres postgresql://localhost/prokino_bench
+
+PostgreSQL uchun alohida bo'sh baza bering: sinov ma'lumotlari unga yoziladi.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ('message', 'get_movie', 'dispatch', 'verify_sub', 'admin', 'inline', 'broadcast')
+ADMIN_CALLBACKS = ('admin_refresh', 'channel_list', 'premium_stats', 'premium_page:requests')
+INLINE_TITLES = ('Avatar', "O'tgan kunlar", 'Qasoskorlar', 'Yulduzlar urushi', 'Shaytanat', 'Temir odam')
+KEYSTROKE_MS = 80
+BENCH_ADMIN_ID = 1
+FIRST_USER_ID = 100000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help="vergul bilan: " + ','.join(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=500, help="har bir ssenariydagi so'rovlar soni")
+    parser.add_argument('--concurrency', type=int, default=32, help="bir vaqtdagi foydalanuvchilar")
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--movies', type=int, default=1000)
+    parser.add_argument('--channels', type=int, default=2, help="majburiy obuna kanallari soni")
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="soxta Bot API kechikishi")
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--flood-rate', type=float, default=0.0, help="429 (RetryAfter) ulushi")
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="403 (bot bloklangan) ulushi")
+    parser.add_argument('--rate', type=float, default=None, help="TG_GLOBAL_RATE (xabar/s) ni almashtirish")
+    parser.add_argument('--postgres', default=None, help="PostgreSQL DATABASE_URL (bo'lmasa vaqtinchalik SQLite)")
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+
+def configure_env(args, workdir: str):
+    # config.py import qilinishidan oldin o'rnatilishi kerak
+    os.environ['BOT_TOKEN'] = '123456:BENCH'
+    os.environ['ADMIN_ID'] = str(BENCH_ADMIN_ID)
+    os.environ['DATABASE_PATH'] = os.path.join(workdir, 'bench.db')
+    # fayl oldindan yaratiladi: aks holda bot eski database/movies.db ga o'tib ketishi mumkin
+    open(os.environ['DATABASE_PATH'], 'a').close()
+    os.environ['DATABASE_URL'] = args.postgres or ''
+    os.environ['METRICS_PORT'] = '0'
+    os.environ['TRACE_SAMPLE_RATE'] = '0'
+    os.environ['DB_SLOW_QUERY_MS'] = '100000'
+    os.environ['BACKUP_DIR'] = ''
+    if args.rate is not None:
+        os.environ['TG_GLOBAL_RATE'] = str(args.rate)
+
+
+def seed(db, args):
+    started = time.perf_counter()
+    for index in range(args.users):
+        user_id = FIRST_USER_ID + index
+        db.upsert_user(user_id=user_id, first_name=f'User{user_id}', username=None, language_code='uz')
+    for code in range(1, args.movies + 1):
+        db.add_movie(str(code), code, '-1001000000000', f'{INLINE_TITLES[code % len(INLINE_TITLES)]} {code}')
+    for index in range(args.channels):
+        channel_id = str(-1002000000000 - index)
+        db.add_subscription_channel(channel_id, f'Kanal {index + 1}', f'bench_channel_{index + 1}', True)
+    db.set_subscription_status(args.channels > 0)
+    print(f"Ma'lumotlar tayyorlandi: {args.users} foydalanuvchi, {args.movies} kino, "
+          f"{args.channels} kanal ({time.perf_counter() - started:.1f} s)")
+
+
+def percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run_load(name: str, total: int, concurrency: int, make_call):
+    """`make_call(i)` dan olingan korutinlarni `concurrency` ta parallel ishchida bajarish"""
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for index in counter:
+            started = time.perf_counter()
+            try:
+                await make_call(index)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - started
+    report(name, total, errors, elapsed, sorted(latencies))
+
+
+def report(name: str, ops: int, errors: int, elapsed: float, latencies):
+    print(
+        f"{name:<11}{ops:>7}{errors:>8}{ops / elapsed if elapsed else 0:>10.1f}"
+        f"{percentile(latencies, 0.50) * 1000:>9.1f}{percentile(latencies, 0.95) * 1000:>9.1f}"
+        f"{percentile(latencies, 0.99) * 1000:>9.1f}{(latencies[-1] if latencies else 0) * 1000:>9.1f}"
+    )
+
+
+async def main_async(args):
+    import bot as bot_module
+    from telegram.ext import CallbackContext
+    from utils.delivery import delivery_queue
+    from utils.scheduler import outbound_scheduler
+    from utils.telegram_request import RoutedRequest
+    from fake_bot import FakeTelegramRequest, callback_update, inline_query_update, message_update
+
+    # Broadcast xatolari kabi har bir so'rov uchun yoziladigan loglar natijani buzmasin
+    logging.getLogger().setLevel(logging.ERROR)
+    db = bot_module.db
+    seed(db, args)
+
+    fake = FakeTelegramRequest(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, flood_rate=args.flood_rate,
+        retry_after=args.retry_after, fail_rate=args.fail_rate, seed=args.seed
+    )
+    request = RoutedRequest(interactive=fake, bulk=fake, scheduler=outbound_scheduler)
+    application = bot_module.build_application(token=os.environ['BOT_TOKEN'], request=request)
+    await application.initialize()
+    bot = application.bot
+
+    rng = random.Random(args.seed)
+    update_ids = iter(range(1, 10 ** 9))
+
+    def random_user() -> int:
+        return FIRST_USER_ID + rng.randrange(args.users)
+
+    def random_code() -> str:
+        return str(rng.randint(1, args.movies))
+
+    def context_for(update):
+        return CallbackContext.from_update(update, application)
+
+    async def call_message(_):
+        update = message_update(bot, next(update_ids), random_user(), random_code())
+        await bot_module.handle_message(update, context_for(update))
+
+    async def call_get_movie(_):
+        update = message_update(bot, next(update_ids), random_user(), random_code())
+        await bot_module.movie_handlers.get_movie(update, context_for(update))
+
+    async def call_dispatch(_):
+        await application.process_update(message_update(bot, next(update_ids), random_user(), random_code()))
+
+    async def call_verify(_):
+        update = callback_update(bot, next(update_ids), random_user(), f"verify_sub:{random_code()}")
+        await bot_module.movie_handlers.verify_subscription_callback(update, context_for(update))
+
+    async def call_admin(index):
+        data = ADMIN_CALLBACKS[index % len(ADMIN_CALLBACKS)]
+        await application.process_update(callback_update(bot, next(update_ids), BENCH_ADMIN_ID, data))
+
+    async def call_inline(_):
+        # Har bir harf yangi inline so'rov: debounce faqat oxirgisiga javob berishi kerak
+        user_id = random_user()
+        title = rng.choice(INLINE_TITLES)
+        tasks = []
+        for length in range(1, len(title) + 1):
+            update = inline_query_update(bot, next(update_ids), user_id, title[:length])
+            tasks.append(asyncio.create_task(bot_module.movie_handlers.inline_query(update, context_for(update))))
+            await asyncio.sleep(KEYSTROKE_MS / 1000)
+        await asyncio.gather(*tasks)
+
+    calls = {
+        'message': call_message,
+        'get_movie': call_get_movie,
+        'dispatch': call_dispatch,
+        'verify_sub': call_verify,
+        'admin': call_admin,
+        'inline': call_inline,
+    }
+
+    print(f"Baza: {'PostgreSQL' if args.postgres else 'SQLite'}, Bot API kechikishi {args.latency_ms:.0f}±"
+          f"{args.jitter_ms:.0f} ms, flood {args.flood_rate:.1%}, xatolik {args.fail_rate:.1%}, "
+          f"parallel {args.concurrency}")
+    print(f"{'ssenariy':<11}{'ops':>7}{'xatolik':>8}{'ops/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    try:
+        for name in [item.strip() for item in args.scenarios.split(',') if item.strip()]:
+            fake.reset_stats()
+            if name == 'broadcast':
+                started = time.perf_counter()
+                success, failed, total = await bot_module.broadcast_to_all_users(
+                    bot, {'content_type': 'text', 'text': "📢 <b>Benchmark</b>"}
+                )
+                elapsed = time.perf_counter() - started
+                print(f"{name:<11}{total:>7}{failed:>8}{total / elapsed if elapsed else 0:>10.1f}"
+                      f"{'':>9}{'':>9}{'':>9}{elapsed * 1000:>9.0f}  (jami vaqt)")
+            elif name in calls:
+                await run_load(name, args.requests, args.concurrency, calls[name])
+            else:
+                print(f"{name:<11}noma'lum ssenariy")
+                continue
+            methods = ', '.join(f"{method}={count}" for method, count in fake.calls.most_common())
+            print(f"{'':<11}API: {methods or '—'}; flood={fake.floods}, 403={fake.failures}")
+    finally:
+        await delivery_queue.stop()
+        await outbound_scheduler.stop()
+        await application.shutdown()
+        db.close()
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix='prokino_bench_')
+    try:
+        configure_env(args, workdir)
+        asyncio.run(main_async(args))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""SQLite parallel yuklama testi: eski sozlama (rollback journal, har so'rovda yangi ulanish)
+va yangi profil (WAL, doimiy ulanishlar, bitta yozuvchi qulfi) solishtiriladi
+
+Ishlatish:
+    python benchmarks/bench_sqlite_concurrency.py --threads 16 --seconds 10 --write-ratio 0.3
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager  # noqa: E402
+
+
+class LegacyDatabase:
+    """Avvalgi xatti-harakat: har chaqiruvda yangi ulanish, standart pragmalar"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def upsert_user(self, user_id: int, first_name: str):
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute('''
+                INSERT INTO users (user_id, first_name) VALUES (?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET first_name = excluded.first_name, last_active = CURRENT_TIMESTAMP
+            ''', (user_id, first_name))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_movie(self, code: str):
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute("SELECT message_id, channel_id FROM movies WHERE code = ?", (code,)).fetchone()
+        finally:
+            conn.close()
+
+
+def prepare(path: str, wal: bool, users: int, movies: int):
+    DatabaseManager(path).close()
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA journal_mode = {'WAL' if wal else 'DELETE'}")
+    conn.executemany("INSERT INTO users (user_id, first_name) VALUES (?, ?)", ((i, 'u') for i in range(users)))
+    conn.executemany(
+        "INSERT INTO movies (code, message_id, channel_id) VALUES (?, ?, ?)",
+        ((str(i), i, '-100') for i in range(1, movies + 1))
+    )
+    conn.commit()
+    conn.close()
+
+
+def run(db, threads: int, seconds: float, write_ratio: float, users: int, movies: int):
+    stats = {'reads': [], 'writes': [], 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(seed: int):
+        rnd = random.Random(seed)
+        reads, writes, errors = [], [], 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                if rnd.random() < write_ratio:
+                    db.upsert_user(rnd.randrange(users * 2), 'bench')
+                    writes.append(time.perf_counter() - started)
+                else:
+                    db.get_movie(str(rnd.randint(1, movies)))
+                    reads.append(time.perf_counter() - started)
+            except sqlite3.OperationalError:
+                errors += 1
+        with lock:
+            stats['reads'].extend(reads)
+            stats['writes'].extend(writes)
+            stats['errors'] += errors
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return stats
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+
+def report(name: str, stats: dict, seconds: float):
+    total = len(stats['reads']) + len(stats['writes'])
+    print(f"{name}:")
+    print(f"  amallar/s:   {total / seconds:,.0f} (o'qish {len(stats['reads'])}, yozish {len(stats['writes'])})")
+    print(f"  o'qish ms:   p50 {percentile(stats['reads'], 0.5):.2f}  p99 {percentile(stats['reads'], 0.99):.2f}")
+    print(f"  yozish ms:   p50 {percentile(stats['writes'], 0.5):.2f}  p99 {percentile(stats['writes'], 0.99):.2f}")
+    print(f"  'database is locked' xatolari: {stats['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.3)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--movies', type=int, default=10000)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='bench-sqlite-')
+    try:
+        legacy_path = os.path.join(work, 'legacy.db')
+        prepare(legacy_path, False, args.users, args.movies)
+        legacy = run(LegacyDatabase(legacy_path), args.threads, args.seconds, args.write_ratio, args.users, args.movies)
+        report("Eski (rollback journal, har so'rovda ulanish)", legacy, args.seconds)
+
+        tuned_path = os.path.join(work, 'tuned.db')
+        prepare(tuned_path, True, args.users, args.movies)
+        tuned = run(DatabaseManager(tuned_path), args.threads, args.seconds, args.write_ratio, args.users, args.movies)
+        report("Yangi (WAL, doimiy ulanishlar, bitta yozuvchi)", tuned, args.seconds)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
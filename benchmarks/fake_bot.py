@@ -0,0 +1,188 @@
+"""Lokal soxta Telegram Bot API: benchmarklar haqiqiy Telegram ga ulanmasdan ishlaydi
+
+`FakeTelegramRequest` python-telegram-bot ning so'rov qatlami (BaseRequest) o'rniga
+qo'yiladi: har bir metod sozlanadigan kechikish bilan javob beradi, kerak bo'lsa
+flood (429, retry_after) va xatolik (403, bot bloklangan) qaytaradi. Shu sababli
+bot kodi, RoutedRequest, scheduler va delivery navbati o'zgarishsiz sinaladi.
+"""
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from telegram import Update
+from telegram.request import BaseRequest, RequestData
+
+FAKE_BOT_ID = 777000111
+
+# Xabar yuboradigan metodlar: flood va "bot bloklangan" xatolari faqat ularda bo'ladi
+SEND_METHODS = frozenset({
+    'sendMessage', 'copyMessage', 'forwardMessage', 'sendPhoto', 'sendVideo',
+    'sendDocument', 'sendAudio', 'sendAnimation', 'sendVoice',
+})
+MESSAGE_METHODS = SEND_METHODS | {'editMessageText', 'editMessageCaption', 'editMessageReplyMarkup'}
+
+
+class FakeTelegramRequest(BaseRequest):
+    """Bot API javoblarini xotirada yasovchi so'rov qatlami
+
+    latency_ms/jitter_ms - har bir so'rovga qo'shiladigan kechikish;
+    flood_rate - yuborish so'rovlarining qancha qismi 429 (RetryAfter) oladi;
+    fail_rate - yuborish so'rovlarining qancha qismi 403 (Forbidden) oladi;
+    member_status - getChatMember qaytaradigan holat ('member', 'left', ...).
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 50.0,
+        jitter_ms: float = 10.0,
+        flood_rate: float = 0.0,
+        retry_after: int = 1,
+        fail_rate: float = 0.0,
+        member_status: str = 'member',
+        seed: Optional[int] = None
+    ):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.flood_rate = flood_rate
+        self.retry_after = retry_after
+        self.fail_rate = fail_rate
+        self.member_status = member_status
+        self.calls: Counter = Counter()
+        self.floods = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._message_id = 0
+
+    @property
+    def read_timeout(self) -> Optional[float]:
+        return None
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def reset_stats(self):
+        self.calls.clear()
+        self.floods = 0
+        self.failures = 0
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: Optional[RequestData] = None,
+        read_timeout=BaseRequest.DEFAULT_NONE,
+        write_timeout=BaseRequest.DEFAULT_NONE,
+        connect_timeout=BaseRequest.DEFAULT_NONE,
+        pool_timeout=BaseRequest.DEFAULT_NONE,
+    ) -> Tuple[int, bytes]:
+        api_method = url.rsplit('/', 1)[-1]
+        params = request_data.parameters if request_data is not None else {}
+        self.calls[api_method] += 1
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if api_method in SEND_METHODS:
+            roll = self._random.random()
+            if roll < self.flood_rate:
+                self.floods += 1
+                return 429, self._error(
+                    429, f"Too Many Requests: retry after {self.retry_after}",
+                    {'retry_after': self.retry_after}
+                )
+            if roll < self.flood_rate + self.fail_rate:
+                self.failures += 1
+                return 403, self._error(403, "Forbidden: bot was blocked by the user")
+        return 200, json.dumps({'ok': True, 'result': self._result(api_method, params)}).encode()
+
+    @staticmethod
+    def _error(code: int, description: str, parameters: Optional[dict] = None) -> bytes:
+        payload = {'ok': False, 'error_code': code, 'description': description}
+        if parameters:
+            payload['parameters'] = parameters
+        return json.dumps(payload).encode()
+
+    def _result(self, api_method: str, params: Dict):
+        if api_method == 'getMe':
+            return {
+                'id': FAKE_BOT_ID, 'is_bot': True, 'first_name': 'ProKino Bench',
+                'username': 'prokino_bench_bot', 'can_join_groups': False,
+                'can_read_all_group_messages': False, 'supports_inline_queries': True,
+            }
+        if api_method == 'getChatMember':
+            return {
+                'status': self.member_status,
+                'user': {'id': int(params.get('user_id', 0)), 'is_bot': False, 'first_name': 'User'},
+            }
+        if api_method == 'getChat':
+            return {'id': int(params.get('chat_id', 0)), 'type': 'channel', 'title': 'Kanal'}
+        if api_method == 'copyMessage':
+            self._message_id += 1
+            return {'message_id': self._message_id}
+        if api_method in MESSAGE_METHODS:
+            self._message_id += 1
+            chat_id = params.get('chat_id', 0)
+            return {
+                'message_id': params.get('message_id') or self._message_id,
+                'date': int(time.time()),
+                'chat': {'id': int(chat_id) if str(chat_id).lstrip('-').isdigit() else 0, 'type': 'private'},
+                'text': params.get('text') or '',
+            }
+        return True
+
+
+def _user(user_id: int) -> dict:
+    return {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}', 'language_code': 'uz'}
+
+
+def message_update(bot, update_id: int, user_id: int, text: str) -> Update:
+    """Foydalanuvchidan kelgan matnli xabar"""
+    return Update.de_json({
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': _user(user_id),
+            'text': text,
+        },
+    }, bot)
+
+
+def callback_update(bot, update_id: int, user_id: int, data: str) -> Update:
+    """Inline tugma bosilishi (callback query)"""
+    return Update.de_json({
+        'update_id': update_id,
+        'callback_query': {
+            'id': str(update_id),
+            'from': _user(user_id),
+            'chat_instance': str(user_id),
+            'data': data,
+            'message': {
+                'message_id': update_id,
+                'date': int(time.time()),
+                'chat': {'id': user_id, 'type': 'private'},
+                'from': {'id': FAKE_BOT_ID, 'is_bot': True, 'first_name': 'ProKino Bench'},
+                'text': '...',
+            },
+        },
+    }, bot)
+
+
+def inline_query_update(bot, update_id: int, user_id: int, query: str) -> Update:
+    """Inline so'rov (@bot <matn>)"""
+    return Update.de_json({
+        'update_id': update_id,
+        'inline_query': {
+            'id': str(update_id),
+            'from': _user(user_id),
+            'query': query,
+            'offset': '',
+        },
+    }, bot)
@@ -0,0 +1,338 @@
+"""Yuklama sinovlari uchun katta sintetik baza yaratish (SQLite yoki PostgreSQL)
+
+Sxema DatabaseManager tomonidan yaratiladi, so'ng jadvallar ommaviy yo'l bilan
+to'ldiriladi: SQLite da bitta tranzaksiyada executemany, PostgreSQL da COPY.
+Taqsimotlar real botga o'xshaydi: yangi foydalanuvchilar ko'proq, faollik
+og'ir dumli (ko'pchilik bir necha kun ichida faol), kinolar vaqt bo'yicha
+tekis qo'shilgan, premiumlarning bir qismi muddati o'tgan.
+
+Ishlatish:
+    python benchmarks/generate_dataset.py --users 1000000 --movies 10000
+    python benchmarks/generate_dataset.py --path /tmp/prokino_5m.db --users 5000000 --force
+    python benchmarks/generate_dataset.py --postgres postgresql://localhost/prokino_bench --users 1000000
+"""
+import argparse
+import calendar
+import csv
+import io
+import itertools
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.search_text import movie_search_text  # noqa: E402
+
+FIRST_USER_ID = 100_000_000
+BASE_CHANNEL_ID = '-1001000000000'
+
+FIRST_NAMES = (
+    'Aziz', 'Dilshod', 'Jasur', 'Sardor', 'Bekzod', 'Javohir', 'Shoxrux', 'Otabek', 'Sherzod', 'Ulug\'bek',
+    'Madina', 'Dilnoza', 'Gulnora', 'Nodira', 'Malika', 'Sevara', 'Zarina', 'Kamola', 'Shahlo', 'Feruza',
+    'Алишер', 'Тимур', 'Анна', 'Руслан', 'Мария', 'John', 'Ali', 'Muhammad', 'Aisha', '🎬 Kino',
+)
+LANGUAGES = ('uz', 'ru', 'en', None)
+LANGUAGE_WEIGHTS = (70, 20, 5, 5)
+GENRES = ('Jangari', 'Komediya', 'Drama', 'Fantastika', 'Qo\'rqinchli', 'Melodrama', 'Multfilm', 'Tarixiy', None)
+GENRE_WEIGHTS = (20, 15, 15, 10, 8, 10, 10, 4, 8)
+# (oylar, narx, reja nomi)
+PLANS = ((1, 15000, '1 oy'), (3, 40000, '3 oy'), (6, 75000, '6 oy'), (12, 140000, '12 oy'))
+PLAN_WEIGHTS = (60, 25, 10, 5)
+# Kino nomlari shu so'zlardan tuziladi (lotin, kirill va inglizcha aralash)
+TITLE_WORDS = (
+    'Otgan', 'kunlar', 'Shaytanat', 'Qasoskorlar', 'Yulduzlar', 'urushi', 'Temir', 'odam', 'Qora', 'pantera',
+    'Sevgi', 'va', 'nafrat', 'Sirli', 'orol', 'Oxirgi', 'samuray', 'Tungi', 'shahar', 'Yashil', 'mil',
+    'Ўтган', 'кунлар', 'Мстители', 'Финал', 'Поезд', 'Ёлғиз', 'бўри', 'Қора', 'денгиз', 'Ғалаба',
+    'Avatar', 'Matrix', 'Titanic', 'Inception', 'Joker', 'Gladiator', 'Interstellar', 'Dune', 'Batman',
+    'Dark', 'Knight', 'Return', 'King', 'Lost', 'City', 'Fast', 'Furious', 'Mission', 'Impossible',
+)
+# Qolgan so'zlar bo'g'inlardan yasaladi: haqiqiy katalogdagidek so'zlar xilma-xil bo'lsin
+TITLE_SYLLABLES = (
+    'ba', 'bo', 'da', 'di', 'ga', 'gu', 'ka', 'ki', 'la', 'lo', 'ma', 'mi', 'na', 'no', 'ra', 'ri', 'sa', 'so',
+    'ta', 'tu', 'va', 'xo', 'ya', 'yu', 'za', 'qa', 'sha', 'cho', 'ter', 'lan', 'mor', 'kin', 'dor', 'gan',
+)
+TITLE_WORD_SHARE = 0.15
+REQUEST_STATUSES = ('approved', 'rejected', 'pending')
+REQUEST_STATUS_WEIGHTS = (75, 10, 15)
+
+
+def _weighted(values, weights) -> list:
+    # rng.choice(jadval) har qatorda rng.choices dan bir necha barobar tez
+    return [value for value, weight in zip(values, weights) for _ in range(weight)]
+
+
+LANGUAGE_TABLE = _weighted(LANGUAGES, LANGUAGE_WEIGHTS)
+GENRE_TABLE = _weighted(GENRES, GENRE_WEIGHTS)
+PLAN_TABLE = _weighted(PLANS, PLAN_WEIGHTS)
+REQUEST_STATUS_TABLE = _weighted(REQUEST_STATUSES, REQUEST_STATUS_WEIGHTS)
+
+# Tozalash tartibi: ichki bog'liqliklar oldin
+TABLES = (
+    'premium_request_messages', 'premium_requests', 'premium_payments', 'premium_users',
+    'subscription_channels', 'movies', 'users',
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default=None, help="SQLite fayli (standart: benchmarks/data/prokino_<users>.db)")
+    parser.add_argument('--postgres', default=None, help="PostgreSQL DATABASE_URL (alohida bo'sh baza)")
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--movies', type=int, default=10_000)
+    parser.add_argument('--premium', type=int, default=None, help="premium foydalanuvchilar (standart: users/100)")
+    parser.add_argument('--requests', type=int, default=None, help="premium so'rovlar (standart: premium*1.5)")
+    parser.add_argument('--channels', type=int, default=5)
+    parser.add_argument('--days', type=int, default=730, help="bot yoshi: sanalar shu oraliqda taqsimlanadi")
+    parser.add_argument('--batch', type=int, default=50_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--force', action='store_true', help="mavjud ma'lumotlarni o'chirib, qaytadan yaratish")
+    return parser.parse_args()
+
+
+class Generator:
+    def __init__(self, args, now: datetime):
+        self.args = args
+        self.now = now
+        self.rng = random.Random(args.seed)
+        self.span = args.days * 86400
+        self.now_epoch = calendar.timegm(now.timetuple())
+        self._hours = {}
+
+    def _ts(self, seconds_ago: float) -> str:
+        """`seconds_ago` soniya oldingi vaqt (manfiy - kelajak) bazadagi matn ko'rinishida"""
+        # Soat qismi keshlanadi: millionlab qatorda strftime asosiy xarajat bo'lardi
+        hour, rest = divmod(int(self.now_epoch - seconds_ago), 3600)
+        prefix = self._hours.get(hour)
+        if prefix is None:
+            prefix = self._hours[hour] = time.strftime('%Y-%m-%d %H:', time.gmtime(hour * 3600))
+        minute, second = divmod(rest, 60)
+        return f"{prefix}{minute:02d}:{second:02d}"
+
+    def user_id(self, index: int) -> int:
+        # Telegram ID lari vaqt bo'yicha o'sadi: qo'shilish tartibi bilan mos
+        return FIRST_USER_ID + index * 7
+
+    def users(self):
+        # Eng katta jadval: sikl ichida atribut qidiruvlari lokal nomlarga olingan
+        rng_random = self.rng.random
+        expovariate = self.rng.expovariate
+        ts = self._ts
+        total = self.args.users
+        span = self.span
+        names, languages = FIRST_NAMES, LANGUAGE_TABLE
+        name_count, language_count = len(names), len(languages)
+        for index in range(total):
+            # Botning o'sishi: oxirgi oylarda qo'shilganlar ko'proq (indeks kattasi - yangiroq)
+            joined_ago = span * (1 - (index + rng_random()) / total) ** 2
+            # Faollik og'ir dumli: ko'pchilik ~3 kun ichida, ba'zilari oylar davomida qaytmagan
+            if rng_random() < 0.7:
+                active_ago = min(joined_ago, expovariate(1 / (3 * 86400)))
+            else:
+                active_ago = joined_ago * rng_random()
+            name = names[int(rng_random() * name_count)]
+            username = f"{name.lower()}_{index}" if rng_random() < 0.6 and name.isascii() else None
+            yield (
+                FIRST_USER_ID + index * 7, name, username,
+                languages[int(rng_random() * language_count)],
+                ts(joined_ago), ts(active_ago),
+            )
+
+    def movies(self):
+        rng = self.rng
+        total = self.args.movies
+        for code in range(1, total + 1):
+            added_ago = self.span * (1 - code / total) + rng.uniform(0, 3600)
+            name = ' '.join(
+                rng.choice(TITLE_WORDS) if rng.random() < TITLE_WORD_SHARE
+                else ''.join(rng.choice(TITLE_SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+                for _ in range(rng.randint(1, 4))
+            )
+            if rng.random() < 0.3:
+                name += f" {rng.randint(1, 5)}" if rng.random() < 0.5 else f" ({rng.randint(1980, 2025)})"
+            genre = rng.choice(GENRE_TABLE)
+            yield (
+                str(code), code * 3, BASE_CHANNEL_ID, name, genre,
+                max(5, int(rng.gauss(105, 25))) if rng.random() < 0.8 else None,
+                self._ts(added_ago),
+                'dead' if rng.random() < 0.02 else 'ok',
+                movie_search_text(name, genre),
+            )
+
+    def channels(self):
+        for index in range(self.args.channels):
+            channel_type = 'request' if index % 4 == 3 else 'channel'
+            channel_id = f"https://t.me/+bench{index}" if channel_type == 'request' else str(-1002000000000 - index)
+            yield (channel_id, f"Kanal {index + 1}", f"bench_channel_{index + 1}", 1, channel_type)
+
+    def premium(self):
+        """premium_users, premium_payments va premium_requests qatorlari"""
+        rng = self.rng
+        count = min(self.args.users, self.args.premium if self.args.premium is not None else self.args.users // 100)
+        request_count = self.args.requests if self.args.requests is not None else int(count * 1.5)
+        # Premiumga asosan faol foydalanuvchilar o'tadi: yangi qo'shilganlar ehtimoli yuqoriroq
+        picked = sorted({int(self.args.users * (1 - rng.random() ** 2)) for _ in range(count * 2)})
+        rng.shuffle(picked)
+        premium_ids = [self.user_id(min(index, self.args.users - 1)) for index in picked[:count]]
+
+        users, payments = [], []
+        for user_id in premium_ids:
+            months, price, label = rng.choice(PLAN_TABLE)
+            renewals = 1 + int(rng.expovariate(1.5))
+            # Obunalarning ko'pi yaqinda boshlangan
+            started_ago = self.span * rng.random() ** 3
+            expires_ago = started_ago - 30 * months * renewals * 86400
+            status = 'active' if expires_ago < 0 else 'expired'
+            users.append((
+                user_id, rng.choice(FIRST_NAMES), None, label,
+                self._ts(expires_ago), self._ts(started_ago), status,
+                1 if status == 'expired' else 0,
+            ))
+            for renewal in range(renewals):
+                paid_ago = max(0.0, started_ago - renewal * 30 * months * 86400)
+                payments.append((user_id, price, months, 'card', f"bench:{user_id}:{renewal}", self._ts(paid_ago)))
+
+        requests = []
+        pool = premium_ids or [self.user_id(0)]
+        for index in range(request_count):
+            months, price, label = rng.choice(PLAN_TABLE)
+            # Kutilayotgan so'rovlar yangi, hal qilinganlar butun davr bo'yicha
+            status = rng.choice(REQUEST_STATUS_TABLE)
+            created_ago = rng.expovariate(1 / 86400) if status == 'pending' else rng.uniform(0, self.span)
+            user_id = rng.choice(pool) if status == 'approved' else self.user_id(rng.randrange(self.args.users))
+            requests.append((
+                user_id, rng.choice(FIRST_NAMES), None, label, months, price, status,
+                f"BENCH_RECEIPT_{index}", 'photo', user_id, index + 1,
+                None if status == 'pending' else 1,
+                self._ts(created_ago), self._ts(max(0.0, created_ago - 600)),
+            ))
+        return users, payments, requests
+
+
+class BulkWriter:
+    """Qatorlarni ommaviy yozish: SQLite - executemany, PostgreSQL - COPY"""
+
+    def __init__(self, db, batch: int, synchronous: str = 'NORMAL'):
+        self.db = db
+        self.batch = batch
+        self.synchronous = synchronous
+
+    def clear(self):
+        with self.db.get_connection(write=True) as conn:
+            cursor = conn.cursor()
+            for table in TABLES:
+                cursor.execute(f"DELETE FROM {table}")
+            conn.commit()
+
+    def count(self, table: str) -> int:
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            return cursor.fetchone()[0]
+
+    def write(self, table: str, columns, rows) -> int:
+        started = time.perf_counter()
+        total = 0
+        with self.db.get_connection(write=True) as conn:
+            cursor = conn.cursor()
+            if self.db.use_postgres:
+                copy_sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+                iterator = iter(rows)
+                while True:
+                    chunk = list(itertools.islice(iterator, self.batch))
+                    if not chunk:
+                        break
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    writer.writerows(['\\N' if value is None else value for value in row] for row in chunk)
+                    buffer.seek(0)
+                    cursor.copy_expert(copy_sql, buffer)
+                    total += len(chunk)
+            else:
+                placeholders = ', '.join('?' for _ in columns)
+                insert_sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+                # Yuklash vaqtida fsync kerak emas: fayl baribir benchmark uchun
+                cursor.execute("PRAGMA synchronous = OFF")
+                iterator = iter(rows)
+                while True:
+                    chunk = list(itertools.islice(iterator, self.batch))
+                    if not chunk:
+                        break
+                    cursor.executemany(insert_sql, chunk)
+                    total += len(chunk)
+            conn.commit()
+            if not self.db.use_postgres:
+                cursor.execute(f"PRAGMA synchronous = {self.synchronous}")
+        elapsed = time.perf_counter() - started
+        print(f"  {table:<22}{total:>11,} qator  {elapsed:6.1f} s  ({total / elapsed if elapsed else 0:,.0f} qator/s)")
+        return total
+
+    def analyze(self):
+        with self.db.get_connection(write=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("ANALYZE")
+            conn.commit()
+
+
+def populate(writer: BulkWriter, generator: Generator):
+    """Barcha jadvallarni generator qatorlari bilan to'ldirish"""
+    writer.write('users', ('user_id', 'first_name', 'username', 'language_code', 'joined_date', 'last_active'),
+                 generator.users())
+    writer.write('movies', ('code', 'message_id', 'channel_id', 'movie_name', 'movie_genre', 'movie_duration',
+                            'added_date', 'status', 'search_text'), generator.movies())
+    writer.write('subscription_channels', ('channel_id', 'channel_name', 'channel_username', 'is_required',
+                                           'channel_type'), generator.channels())
+    premium_users, payments, requests = generator.premium()
+    writer.write('premium_users', ('user_id', 'first_name', 'username', 'plan', 'expires_at', 'joined_at',
+                                   'status', 'reminder_sent'), premium_users)
+    writer.write('premium_payments', ('user_id', 'amount', 'duration', 'payment_method', 'reference',
+                                      'created_at'), payments)
+    writer.write('premium_requests', ('user_id', 'first_name', 'username', 'plan_label', 'duration', 'amount',
+                                      'status', 'receipt_file_id', 'receipt_file_type', 'user_chat_id',
+                                      'receipt_message_id', 'admin_id', 'created_at', 'updated_at'), requests)
+
+
+def main():
+    args = parse_args()
+    if args.postgres:
+        os.environ['DATABASE_URL'] = args.postgres
+        target = args.postgres
+    else:
+        os.environ['DATABASE_URL'] = ''
+        target = args.path or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'data', f"prokino_{args.users}.db"
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        if args.force and os.path.exists(target):
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(target + suffix):
+                    os.remove(target + suffix)
+    # config.py DATABASE_URL ni import vaqtida o'qiydi
+    os.environ['DB_QUERY_STATS'] = '0'
+    from config import SQLITE_SYNCHRONOUS
+    from database import DatabaseManager
+
+    db = DatabaseManager(target)
+    writer = BulkWriter(db, args.batch, SQLITE_SYNCHRONOUS)
+    if writer.count('users') and not args.force:
+        print(f"❌ Bazada allaqachon {writer.count('users'):,} foydalanuvchi bor. Qayta yaratish uchun --force bering.")
+        db.close()
+        sys.exit(1)
+    if args.force and args.postgres:
+        writer.clear()
+
+    generator = Generator(args, datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0))
+    print(f"Baza: {target}")
+    started = time.perf_counter()
+    populate(writer, generator)
+    db.set_subscription_status(args.channels > 0)
+    writer.analyze()
+    db.close()
+    size = '' if args.postgres else f", fayl {os.path.getsize(target) / 1024 / 1024:.0f} MB"
+    print(f"✅ Tayyor: {time.perf_counter() - started:.1f} s{size}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import asyncio
 import logging
+import os
 from typing import Optional, Tuple
 from telegram import Update, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import (
@@ -9,13 +11,30 @@ from telegram.ext import (
     CommandHandler,
     MessageHandler,
     CallbackQueryHandler,
+    InlineQueryHandler,
     filters,
     ContextTypes
 )
 
-from config import BOT_TOKEN, ADMIN_ID
+from config import (
+    BOT_TOKEN, ADMIN_ID, USER_ACTIVITY_TTL, CONCURRENT_UPDATES, MOVIE_CHECK_INTERVAL_HOURS, MOVIE_CHECK_CHAT_ID,
+    BACKUP_INTERVAL_HOURS, BACKUP_DIR, BACKUP_CHAT_ID, PREMIUM_EXPIRY_INTERVAL_MINUTES,
+    METRICS_HOST, METRICS_PORT, DATABASE_PATH, is_postgres
+)
 from database import DatabaseManager
 from handlers import AdminHandlers, MovieHandlers, MovieAdminHandlers, PremiumHandlers
+from utils import TTLCache
+from utils.scheduler import ADMIN, BULK, outbound_scheduler
+from utils.telegram_request import build_bot_request, traffic_class
+from utils.delivery import delivery_queue
+from utils.update_processor import PerUserUpdateProcessor
+from utils.backup_scheduler import BackupScheduler
+from utils.premium_expiry import PremiumExpiryEngine
+from utils import tracing
+from utils.watchdog import loop_watchdog
+from utils.metrics import (
+    DB_LATENCY, HANDLER_LATENCY, MetricsServer, instrument_application, instrument_object, registry
+)
 
 # Logging sozlamalari
 logging.basicConfig(
@@ -24,12 +43,43 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Bot avval DATABASE_PATH ga qaramasdan doim shu faylga yozgan
+LEGACY_DATABASE_PATH = 'database/movies.db'
+
+
+def resolve_database_path(path: str) -> str:
+    """DATABASE_PATH dagi fayl hali yo'q, eski database/movies.db esa bor bo'lsa - eskisini ishlatish
+
+    DATABASE_PATH=/app/data/movies.db kabi sozlangan, lekin ma'lumotlari eski faylda qolgan
+    deploylar bo'sh baza bilan ishga tushmasligi uchun. Faylni DATABASE_PATH ga ko'chirgach,
+    bot avtomatik yangi manzildan foydalanadi.
+    """
+    if is_postgres() or os.path.exists(path) or not os.path.exists(LEGACY_DATABASE_PATH):
+        return path
+    if os.path.abspath(path) == os.path.abspath(LEGACY_DATABASE_PATH):
+        return path
+    logger.warning(
+        "DATABASE_PATH=%s topilmadi, ma'lumotlar hali eski %s faylida - u ishlatiladi. "
+        "Bot to'xtatilgan holda faylni DATABASE_PATH ga ko'chiring.",
+        path, LEGACY_DATABASE_PATH
+    )
+    return LEGACY_DATABASE_PATH
+
+
 # Database
-db = DatabaseManager('database/movies.db')
+db = DatabaseManager(resolve_database_path(DATABASE_PATH))
+# execute_query boshqa metodlar ichida chaqiriladi: o'lchansa, vaqt ikki marta hisoblanadi
+instrument_object(
+    db, DB_LATENCY, exclude=('get_connection', 'close', 'add_reload_listener', 'execute_query'), span_kind=tracing.DB
+)
 
 # Handlers
 admin_handlers = AdminHandlers(db)
-movie_handlers = MovieHandlers(db)
+backup_scheduler = BackupScheduler(db)
+premium_expiry = PremiumExpiryEngine(db)
+db.add_reload_listener(premium_expiry.invalidate)
+movie_handlers = MovieHandlers(db, premium_expiry, notify_admins=admin_handlers.notify_movie_admins)
+instrument_object(movie_handlers, HANDLER_LATENCY, names=('get_movie', 'search_movies', 'inline_query'), span_kind=tracing.HANDLER)
 movie_admin_handlers = MovieAdminHandlers(db)
 premium_handlers = PremiumHandlers(db)
 
@@ -39,13 +89,56 @@ PREMIUM_PLAN_LABELS = {1: "1 oy", 3: "3 oy", 6: "6 oy", 12: "12 oy"}
 PREMIUM_PRICE_KEYS = {1: 'price_1m', 3: 'price_3m', 6: 'price_6m', 12: 'price_12m'}
 PREMIUM_FLOW_KEY = "premium_flow"
 
+# Faqat 1-5 xonali raqamdan iborat xabar - kino kodi
+MOVIE_CODE_PATTERN = r'^\s*\d{1,5}\s*$'
+
+# Suhbat holatlari: ulardan biri faol bo'lsa, raqamli xabar kino kodi emas
+PENDING_STATE_KEYS = (
+    'awaiting_restore_db',
+    'premium_state',
+    'awaiting_admin_add',
+    'broadcast_state',
+    'awaiting_sub_message',
+    'awaiting_start_message',
+    'awaiting_movie_step',
+    'awaiting_movie_code_delete',
+    'awaiting_movie_code_search',
+    'awaiting_button_text',
+    'awaiting_button_url',
+    'awaiting_base_channel',
+    'awaiting_link',
+    'awaiting_channel',
+    'awaiting_instagram',
+)
+
+# Yaqinda bazaga yozilgan foydalanuvchilar (last_active ni har xabarda yangilamaslik uchun)
+recent_users = TTLCache(ttl=USER_ACTIVITY_TTL, maxsize=200000)
+# Baza tiklanganda foydalanuvchilar qayta yozilishi kerak
+db.add_reload_listener(recent_users.clear)
+
+# Metrikalar
+metrics_server = MetricsServer(METRICS_HOST, METRICS_PORT)
+registry.register_cache('settings', db.cache)
+registry.register_cache('subscription', movie_handlers.member_cache)
+registry.register_cache('recent_users', recent_users)
+registry.gauge(
+    'prokino_outbound_queue', "Yuborish navbatida kutayotgan so'rovlar", ('class',),
+    lambda: {(name,): size for name, size in outbound_scheduler.queue_sizes().items()}
+)
+registry.gauge(
+    'prokino_delivery_pending', "Qayta yuborish navbatidagi kinolar", (),
+    delivery_queue.pending
+)
+
 def register_user(update: Update):
     """Foydalanuvchini bazaga saqlash"""
     user = update.effective_user
     if not user:
         return
+    if user.id in recent_users:
+        return
     try:
-        db.upsert_user(
+        saved = db.upsert_user(
             user_id=user.id,
             first_name=user.first_name,
             username=user.username,
@@ -53,6 +146,19 @@ def register_user(update: Update):
         )
     except Exception as e:
         logger.error(f"Foydalanuvchini saqlashda xatolik: {e}")
+        return
+    # Faqat muvaffaqiyatli yozilgandan keyin: aks holda foydalanuvchi TTL davomida bazaga tushmay qoladi
+    if saved:
+        recent_users.set(user.id, True)
+
+
+def has_pending_state(context: ContextTypes.DEFAULT_TYPE) -> bool:
+    """Foydalanuvchida tugallanmagan suhbat holati borligini tekshirish"""
+    user_data = context.user_data
+    if any(user_data.get(key) for key in PENDING_STATE_KEYS):
+        return True
+    premium_flow = user_data.get(PREMIUM_FLOW_KEY)
+    return bool(premium_flow and premium_flow.get('state') == 'awaiting_receipt')
 
 
 def _format_amount(amount):
@@ -263,27 +369,52 @@ async def broadcast_to_all_users(bot, broadcast_data: dict):
     content_type = broadcast_data.get('content_type')
     text = broadcast_data.get('text')
     file_id = broadcast_data.get('file_id')
-    for user_id in users:
-        try:
-            if content_type == 'photo':
-                await bot.send_photo(chat_id=user_id, photo=file_id, caption=text, parse_mode='HTML', reply_markup=reply_markup)
-            elif content_type == 'video':
-                await bot.send_video(chat_id=user_id, video=file_id, caption=text, parse_mode='HTML', supports_streaming=True, reply_markup=reply_markup)
-            elif content_type == 'document':
-                await bot.send_document(chat_id=user_id, document=file_id, caption=text, parse_mode='HTML', reply_markup=reply_markup)
-            else:
-                await bot.send_message(chat_id=user_id, text=text, parse_mode='HTML', reply_markup=reply_markup)
-            success += 1
-        except Exception as e:
-            logger.warning(f"Broadcast yuborishda xatolik (user {user_id}): {e}")
-            failed += 1
+    # Broadcast alohida ulanish havzasidan foydalanadi, kino yuborishga xalaqit bermaydi
+    with traffic_class(BULK):
+        for user_id in users:
+            try:
+                if content_type == 'photo':
+                    await bot.send_photo(chat_id=user_id, photo=file_id, caption=text, parse_mode='HTML', reply_markup=reply_markup)
+                elif content_type == 'video':
+                    await bot.send_video(chat_id=user_id, video=file_id, caption=text, parse_mode='HTML', supports_streaming=True, reply_markup=reply_markup)
+                elif content_type == 'document':
+                    await bot.send_document(chat_id=user_id, document=file_id, caption=text, parse_mode='HTML', reply_markup=reply_markup)
+                else:
+                    await bot.send_message(chat_id=user_id, text=text, parse_mode='HTML', reply_markup=reply_markup)
+                success += 1
+            except Exception as e:
+                logger.warning(f"Broadcast yuborishda xatolik (user {user_id}): {e}")
+                failed += 1
     total = len(users)
     return success, failed, total
 
+async def run_broadcast(bot, chat_id: int, message_id: int, broadcast_data: dict):
+    """Broadcastni fonda yuborish va natijani admin xabarida ko'rsatish"""
+    success, failed, total = await broadcast_to_all_users(bot, broadcast_data)
+    if total == 0:
+        result_text = "❌ Hali bot foydalanuvchilari yo'q. Avval foydalanuvchilar botdan foydalanishi kerak."
+    else:
+        result_text = (
+            "📢 <b>Broadcast yakunlandi</b>\n\n"
+            f"👥 Jami foydalanuvchilar: {total}\n"
+            f"✅ Yuborildi: {success}\n"
+            f"⚠️ Xatolik: {failed}"
+        )
+    try:
+        await bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=result_text, parse_mode='HTML')
+    except Exception as exc:
+        logger.warning(f"Broadcast natijasini ko'rsatib bo'lmadi: {exc}")
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Start buyrug'i"""
     user = update.effective_user
     register_user(update)
+
+    # t.me/<bot>?start=<kod> havolasi (masalan, inline rejimdagi "Kinoni ko'rish" tugmasi)
+    payload = context.args[0] if context.args else ''
+    if payload.isdigit():
+        await movie_handlers.send_movie(update, context, payload)
+        return
     
     if db.is_admin_user(user.id):
         reply_markup = build_admin_keyboard(user.id)
@@ -322,7 +453,8 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"❓ <b>Yordam</b>\n\n"
             f"Kinoni olish uchun kino kodini yuboring.\n"
             f"Kod faqat raqamlardan iborat va 1 dan 10000 gacha bo'lishi kerak.\n"
-            f"Masalan: <code>1</code>, <code>21</code>, <code>137</code>, <code>5000</code>"
+            f"Masalan: <code>1</code>, <code>21</code>, <code>137</code>, <code>5000</code>\n\n"
+            f"🔎 Kino nomi yoki janrini yozsangiz, bot mos kinolarni topib beradi."
         )
     
     await update.message.reply_text(text, parse_mode='HTML')
@@ -347,35 +479,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("❌ Ushbu funksiya faqat super admin uchun!")
             return
         
-        if update.message.document:
-            doc = update.message.document
-            if not doc.file_name.endswith('.db'):
-                await update.message.reply_text("❌ Faqat .db formatidagi fayllar qabul qilinadi!")
-                return
-            
-            try:
-                # Faylni yuklab olish
-                db_path = db.get_db_path()
-                if db_path == "PostgreSQL (Railway)":
-                    await update.message.reply_text("❌ PostgreSQL ishlatilmoqda. SQLite restore qilish mumkin emas.")
-                    context.user_data['awaiting_restore_db'] = False
-                    return
-                
-                await update.message.reply_text("⏳ Database tiklanmoqda...")
-                
-                file = await context.bot.get_file(doc.file_id)
-                await file.download_to_drive(db_path)
-                
-                await update.message.reply_text(
-                    "✅ Database muvaffaqiyatli tiklandi!\n\n"
-                    "⚠️ Bot qayta ishga tushirilishi kerak.\n"
-                    "Yangi ma'lumotlar faqat bot qayta ishga tushgandan keyin ko'rinadi."
-                )
-                context.user_data['awaiting_restore_db'] = False
-            except Exception as e:
-                await update.message.reply_text(f"❌ Xatolik: {str(e)}")
-        else:
-            await update.message.reply_text("❌ Iltimos, .db faylini yuboring!")
+        await admin_handlers.handle_restore_file(update, context)
         return
     
     # Admin tugmalarni qayta ishlash
@@ -772,11 +876,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     return
                 
                 # Kinoni o'chirish (faqat bazadan)
-                conn = db.get_connection()
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM movies WHERE code = ?", (code,))
-                conn.commit()
-                conn.close()
+                db.execute_query("DELETE FROM movies WHERE code = ?", (code,))
                 
                 await update.message.reply_text(
                     f"✅ Kino muvaffaqiyatli o'chirildi!\n\n"
@@ -796,11 +896,11 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 code = message_text.strip().upper()
                 
                 # Kinoni bazadan qidirish
-                conn = db.get_connection()
-                cursor = conn.cursor()
-                cursor.execute("SELECT code, movie_name, channel_id, message_id, added_date FROM movies WHERE code = ?", (code,))
-                movie = cursor.fetchone()
-                conn.close()
+                movie = db.execute_query(
+                    "SELECT code, movie_name, channel_id, message_id, added_date FROM movies WHERE code = ?",
+                    (code,),
+                    fetch='one'
+                )
                 
                 if not movie:
                     await update.message.reply_text("❌ Bunday kodli kino topilmadi!")
@@ -1342,6 +1442,19 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
 
 
+async def handle_movie_code(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Kino kodi uchun tezkor yo'l
+
+    Holati bo'lmagan foydalanuvchining raqamli xabari to'g'ridan-to'g'ri kino
+    qidirishga yuboriladi: admin huquqlari va holat tekshiruvlari o'tkazib yuboriladi.
+    """
+    if has_pending_state(context):
+        await handle_message(update, context)
+        return
+    register_user(update)
+    await movie_handlers.get_movie(update, context)
+
+
 def _extract_receipt_media(message) -> Tuple[Optional[str], Optional[str]]:
     if message.photo:
         return 'photo', message.photo[-1].file_id
@@ -1384,6 +1497,7 @@ def _build_admin_request_markup(request_id: int) -> InlineKeyboardMarkup:
 
 
 async def notify_premium_admins(bot, request: dict):
+    """Chekni adminlarga parallel yuborish va nusxalarini saqlash"""
     admins = [admin for admin in db.get_admins() if admin.get('can_manage_premium')]
     if not admins:
         admins = db.get_admins()
@@ -1392,26 +1506,57 @@ async def notify_premium_admins(bot, request: dict):
         return
     caption = _build_admin_request_caption(request)
     markup = _build_admin_request_markup(request['id'])
-    for admin in admins:
+    # Bir admin ikki marta ro'yxatda bo'lsa ham bitta nusxa
+    chat_ids = list(dict.fromkeys(admin['user_id'] for admin in admins))
+
+    async def send(chat_id):
         try:
             if request.get('receipt_file_type') == 'photo':
-                await bot.send_photo(
-                    chat_id=admin['user_id'],
+                message = await bot.send_photo(
+                    chat_id=chat_id,
                     photo=request['receipt_file_id'],
                     caption=caption,
                     parse_mode='HTML',
                     reply_markup=markup
                 )
             else:
-                await bot.send_document(
-                    chat_id=admin['user_id'],
+                message = await bot.send_document(
+                    chat_id=chat_id,
                     document=request['receipt_file_id'],
                     caption=caption,
                     parse_mode='HTML',
                     reply_markup=markup
                 )
+            return chat_id, message.message_id
         except Exception as exc:
-            logger.warning(f"Premium so'rovini admin {admin['user_id']} ga yuborib bo'lmadi: {exc}")
+            logger.warning(f"Premium so'rovini admin {chat_id} ga yuborib bo'lmadi: {exc}")
+            return None
+
+    # Tezlik chegarasini global navbat (OutboundScheduler) ta'minlaydi
+    with traffic_class(ADMIN):
+        results = await asyncio.gather(*(send(chat_id) for chat_id in chat_ids))
+    db.add_premium_request_messages(request['id'], [result for result in results if result])
+
+
+async def update_premium_request_copies(bot, request: dict, status_text: str, skip: Optional[Tuple[int, int]] = None):
+    """So'rov hal qilingach boshqa adminlardagi nusxalardan tugmalarni olib tashlash"""
+    caption = _build_admin_request_caption(request, status_text)
+    copies = [copy for copy in db.get_premium_request_messages(request['id']) if copy != skip]
+
+    async def edit(chat_id, message_id):
+        try:
+            await bot.edit_message_caption(
+                chat_id=chat_id,
+                message_id=message_id,
+                caption=caption,
+                parse_mode='HTML',
+                reply_markup=None
+            )
+        except Exception as exc:
+            logger.debug(f"Chek nusxasini {chat_id} da yangilab bo'lmadi: {exc}")
+
+    with traffic_class(ADMIN):
+        await asyncio.gather(*(edit(chat_id, message_id) for chat_id, message_id in copies))
 
 
 async def process_premium_receipt_submission(update: Update, context: ContextTypes.DEFAULT_TYPE, premium_flow: dict):
@@ -1447,7 +1592,8 @@ async def process_premium_receipt_submission(update: Update, context: ContextTyp
     )
     request = db.get_premium_request(request_id)
     if request:
-        await notify_premium_admins(context.bot, request)
+        # Adminlarga yuborish fonda: foydalanuvchi javobi N ta yuborishni kutmaydi
+        context.application.create_task(notify_premium_admins(context.bot, request), update=update)
 
 
 async def handle_user_premium_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1569,7 +1715,7 @@ async def handle_premium_request_callback(update: Update, context: ContextTypes.
         return
 
     status_map = {
-        'approve': ('approved', "✅ Chekingiz tasdiqlandi! Premium faollashtirilishi haqida admin bilan bog'lanamiz."),
+        'approve': ('approved', "✅ Chekingiz tasdiqlandi! 💎 Premium faollashtirildi."),
         'reject': ('rejected', "❌ Chekingiz rad etildi. Iltimos, to'lovni qayta tekshirib, yangidan yuboring."),
         'partial': ('partial', "⚠️ To'lov to'liq emas. Iltimos, qolgan summani to'lab, yangi chek yuboring.")
     }
@@ -1578,8 +1724,24 @@ async def handle_premium_request_callback(update: Update, context: ContextTypes.
         return
 
     new_status, user_message = status_map[action]
-    if not db.update_premium_request_status(request_id, new_status, admin_id=user_id):
-        await query.answer("Xatolik yuz berdi", show_alert=True)
+    if action == 'approve':
+        result = db.activate_premium_request(request_id, user_id)
+        if result is None:
+            await query.answer("Xatolik yuz berdi", show_alert=True)
+            return
+        if not result['activated']:
+            # Boshqa admin (yoki takroriy bosish) allaqachon ko'rib chiqqan
+            await query.answer("Bu chek allaqachon ko'rib chiqilgan", show_alert=True)
+            try:
+                await query.edit_message_reply_markup(reply_markup=None)
+            except Exception:
+                pass
+            return
+        premium_expiry.add(result['user_id'], result['expires_at'])
+        expires_text = str(result['expires_at'])[:16] + " (UTC)" if result['expires_at'] else "muddatsiz"
+        user_message += f"\n\n⏳ Amal qilish muddati: <b>{expires_text}</b>"
+    elif not db.update_premium_request_status(request_id, new_status, admin_id=user_id, only_pending=True):
+        await query.answer("Bu chek allaqachon ko'rib chiqilgan", show_alert=True)
         return
 
     status_labels = {
@@ -1605,6 +1767,15 @@ async def handle_premium_request_callback(update: Update, context: ContextTypes.
         except Exception:
             pass
     await query.answer(status_labels[new_status], show_alert=False)
+    context.application.create_task(
+        update_premium_request_copies(
+            context.bot,
+            request,
+            status_labels[new_status],
+            skip=(query.message.chat_id, query.message.message_id)
+        ),
+        update=update
+    )
 
 async def broadcast_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Broadcast jarayonidagi callback tugmalari"""
@@ -1641,28 +1812,66 @@ async def broadcast_callback(update: Update, context: ContextTypes.DEFAULT_TYPE)
             return
         await query.answer("Yuborilmoqda...", show_alert=False)
         await query.edit_message_text("📤 Xabar yuborilmoqda, biroz kuting...")
-        success, failed, total = await broadcast_to_all_users(context.bot, broadcast_data)
         clear_broadcast_state(context)
-        if total == 0:
-            await query.edit_message_text(
-                "❌ Hali bot foydalanuvchilari yo'q. Avval foydalanuvchilar botdan foydalanishi kerak.",
-                parse_mode='HTML'
-            )
-            return
-        result_text = (
-            "📢 <b>Broadcast yakunlandi</b>\n\n"
-            f"👥 Jami foydalanuvchilar: {total}\n"
-            f"✅ Yuborildi: {success}\n"
-            f"⚠️ Xatolik: {failed}"
+        # Broadcast fonda ishlaydi: update lar navbati uni kutib qolmaydi
+        context.application.create_task(
+            run_broadcast(context.bot, query.message.chat_id, query.message.message_id, broadcast_data),
+            update=update
         )
-        await query.edit_message_text(result_text, parse_mode='HTML')
         return
     await query.answer()
 
-def main():
-    """Botni ishga tushirish"""
-    # Application yaratish
-    application = Application.builder().token(BOT_TOKEN).build()
+async def scheduled_movie_check(context: ContextTypes.DEFAULT_TYPE):
+    """Baza kanal tekshiruvini jadval bo'yicha ishga tushirish"""
+    await admin_handlers.run_movie_scan(context.bot)
+
+async def scheduled_backup(context: ContextTypes.DEFAULT_TYPE):
+    """Avtomatik backup (to'liq yoki inkremental)"""
+    try:
+        await backup_scheduler.run(context.bot)
+    except Exception as e:
+        logger.error(f"Avtomatik backupda xatolik: {e}")
+
+async def premium_expiry_check(context: ContextTypes.DEFAULT_TYPE):
+    """Premium obunalar muddatini tekshirish"""
+    try:
+        await premium_expiry.run(context.bot)
+    except Exception as e:
+        logger.error(f"Premium muddatini tekshirishda xatolik: {e}")
+
+async def on_startup(application: Application):
+    """Bot ishga tushganda loop watchdog va lokal metrics/health endpointni ishga tushirish"""
+    registry.gauge(
+        'prokino_update_queue', "Qayta ishlanmagan update lar", (),
+        application.update_queue.qsize
+    )
+    loop_watchdog.start()
+    metrics_server.routes['/health'] = loop_watchdog.http_route(db, lambda: application.bot)
+    if METRICS_PORT > 0:
+        await metrics_server.start()
+
+async def on_shutdown(application: Application):
+    """Bot to'xtaganda fon vazifalarini yakunlash"""
+    await metrics_server.stop()
+    await loop_watchdog.stop()
+    await delivery_queue.stop()
+    await outbound_scheduler.stop()
+
+def build_application(token: str = BOT_TOKEN, request=None) -> Application:
+    """Application yaratish va barcha handlerlarni ro'yxatdan o'tkazish
+
+    `request` berilsa (masalan, benchmarkdagi soxta Bot API), Telegram ga
+    haqiqiy so'rovlar o'rniga shu qatlam ishlatiladi.
+    """
+    application = (
+        Application.builder()
+        .token(token)
+        .request(request or build_bot_request())
+        .concurrent_updates(PerUserUpdateProcessor(max(1, CONCURRENT_UPDATES)))
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
     
     # Command handlers
     application.add_handler(CommandHandler("start", start))
@@ -1672,6 +1881,10 @@ def main():
     application.add_handler(CommandHandler("stats", admin_handlers.stats))
     application.add_handler(CommandHandler("backupdb", admin_handlers.backup_database))
     application.add_handler(CommandHandler("restoredb", admin_handlers.restore_database))
+    application.add_handler(CommandHandler("exportdb", admin_handlers.export_database))
+    application.add_handler(CommandHandler("checkmovies", admin_handlers.check_movies))
+    application.add_handler(CommandHandler("dbstats", admin_handlers.db_stats))
+    application.add_handler(CommandHandler("profile", admin_handlers.profile_command))
     
     # Callback query handler
     application.add_handler(CallbackQueryHandler(handle_user_premium_callback, pattern="^userprem:"))
@@ -1684,15 +1897,69 @@ def main():
     application.add_handler(CallbackQueryHandler(movie_admin_handlers.movie_callback, pattern="^btn_"))
     application.add_handler(CallbackQueryHandler(premium_handlers.premium_callback, pattern="^premium_"))
     application.add_handler(CallbackQueryHandler(movie_handlers.verify_subscription_callback, pattern="^verify_sub:"))
+    application.add_handler(CallbackQueryHandler(movie_handlers.search_page_callback, pattern="^msearch:"))
+    application.add_handler(CallbackQueryHandler(movie_handlers.search_pick_callback, pattern="^msearch_get:"))
     application.add_handler(CallbackQueryHandler(broadcast_callback, pattern="^broadcast_"))
+
+    # Inline rejim: debounce kutishi boshqa update'larni to'xtatmasligi uchun block=False
+    application.add_handler(InlineQueryHandler(movie_handlers.inline_query, block=False))
     
+    # Kino kodlari uchun tezkor handler (umumiy handlerdan oldin bo'lishi kerak)
+    application.add_handler(MessageHandler(
+        filters.TEXT & filters.Regex(MOVIE_CODE_PATTERN),
+        handle_movie_code
+    ))
+
     # Message handler
     application.add_handler(MessageHandler(
         filters.TEXT | filters.VIDEO | filters.Document.ALL | filters.AUDIO | filters.PHOTO,
         handle_message
     ))
-    
+
+    # Har bir handler ishlash vaqti va xatoliklari /metrics ga yoziladi
+    instrument_application(application)
+    return application
+
+def main():
+    """Botni ishga tushirish"""
+    application = build_application()
+
     # Botni ishga tushirish
+    # Baza kanaldagi kino postlarini muntazam tekshirish
+    if MOVIE_CHECK_INTERVAL_HOURS > 0 and not MOVIE_CHECK_CHAT_ID:
+        logger.info("MOVIE_CHECK_CHAT_ID sozlanmagan: avtomatik baza kanal tekshiruvi o'chirilgan")
+    elif MOVIE_CHECK_INTERVAL_HOURS > 0:
+        if application.job_queue:
+            application.job_queue.run_repeating(
+                scheduled_movie_check,
+                interval=MOVIE_CHECK_INTERVAL_HOURS * 3600,
+                first=600,
+                name='movie_check'
+            )
+        else:
+            logger.warning("JobQueue o'rnatilmagan: avtomatik baza kanal tekshiruvi o'chirilgan")
+
+    # Premium obunalar muddati
+    if PREMIUM_EXPIRY_INTERVAL_MINUTES > 0 and application.job_queue:
+        application.job_queue.run_repeating(
+            premium_expiry_check,
+            interval=PREMIUM_EXPIRY_INTERVAL_MINUTES * 60,
+            first=60,
+            name='premium_expiry'
+        )
+
+    # Avtomatik backup
+    if BACKUP_INTERVAL_HOURS > 0 and (BACKUP_DIR or BACKUP_CHAT_ID):
+        if application.job_queue:
+            application.job_queue.run_repeating(
+                scheduled_backup,
+                interval=BACKUP_INTERVAL_HOURS * 3600,
+                first=300,
+                name='scheduled_backup'
+            )
+        else:
+            logger.warning("JobQueue o'rnatilmagan: avtomatik backup o'chirilgan")
+
     logger.info("Bot ishga tushdi!")
     application.run_polling(allowed_updates=Update.ALL_TYPES)
 
@@ -19,6 +19,15 @@ def _env_int(key: str, default: int) -> int:
 	except ValueError:
 		return default
 
+def _env_float(key: str, default: float) -> float:
+	value = os.getenv(key)
+	if value is None or value == "":
+		return default
+	try:
+		return float(value)
+	except ValueError:
+		return default
+
 # Bot sozlamalari
 BOT_TOKEN = _env('BOT_TOKEN', '')
 ADMIN_ID = _env_int('ADMIN_ID', 0)
@@ -32,3 +41,117 @@ DATABASE_URL = _env('DATABASE_URL', '')
 def is_postgres() -> bool:
     """PostgreSQL ishlatilayotganligini tekshirish"""
     return DATABASE_URL.startswith('postgres://') or DATABASE_URL.startswith('postgresql://')
+
+# Kesh sozlamalari (soniyalarda)
+# Sozlamalar (majburiy obuna, kanal tugmasi, adminlar) keshda turadigan vaqt
+SETTINGS_CACHE_TTL = _env_int('SETTINGS_CACHE_TTL', 60)
+# Kanalga a'zo ekanligi tasdiqlangan foydalanuvchini qayta tekshirmaslik vaqti
+SUBSCRIPTION_CACHE_TTL = _env_int('SUBSCRIPTION_CACHE_TTL', 300)
+# Foydalanuvchi faolligini (last_active) bazaga qayta yozish oralig'i
+USER_ACTIVITY_TTL = _env_int('USER_ACTIVITY_TTL', 600)
+
+# Inline rejim (@bot 137 yoki @bot kino nomi)
+# Natijalar Telegram (cache_time) va bot xotirasida saqlanadigan vaqt
+INLINE_CACHE_TIME = _env_int('INLINE_CACHE_TIME', 300)
+# Foydalanuvchi yozishda davom etsa, oraliq so'rovlar bazaga bormaydi (soniya)
+INLINE_DEBOUNCE = _env_float('INLINE_DEBOUNCE', 0.4)
+# Bitta javobdagi natijalar soni (Telegram cheklovi - 50)
+INLINE_MAX_RESULTS = _env_int('INLINE_MAX_RESULTS', 20)
+
+# Telegram Bot API so'rovlari (HTTP ulanishlar) sozlamalari
+# Foydalanuvchiga javob (kino yuborish, obuna tekshiruvi) uchun ulanishlar soni
+TG_INTERACTIVE_POOL_SIZE = _env_int('TG_INTERACTIVE_POOL_SIZE', 32)
+# Ommaviy xabarlar (broadcast) uchun alohida ulanishlar soni
+TG_BULK_POOL_SIZE = _env_int('TG_BULK_POOL_SIZE', 8)
+TG_CONNECT_TIMEOUT = _env_float('TG_CONNECT_TIMEOUT', 5.0)
+TG_READ_TIMEOUT = _env_float('TG_READ_TIMEOUT', 10.0)
+TG_WRITE_TIMEOUT = _env_float('TG_WRITE_TIMEOUT', 10.0)
+# Bo'sh ulanishni kutish vaqti
+TG_POOL_TIMEOUT = _env_float('TG_POOL_TIMEOUT', 3.0)
+TG_HTTP_VERSION = _env('TG_HTTP_VERSION', '1.1')
+# TCP keep-alive: bo'sh ulanish necha soniyadan keyin tekshiriladi
+TG_KEEPALIVE_IDLE = _env_int('TG_KEEPALIVE_IDLE', 60)
+# Telegram global cheklovi: bir soniyada yuboriladigan xabarlar soni (barcha chatlar uchun)
+TG_GLOBAL_RATE = _env_float('TG_GLOBAL_RATE', 30.0)
+# Qisqa vaqtli "portlash" uchun zaxira (token) soni
+TG_RATE_BURST = _env_int('TG_RATE_BURST', 5)
+# Bir vaqtda qayta ishlanadigan update lar soni (1 - ketma-ket). Bitta foydalanuvchining
+# update lari har doim ketma-ket ishlanadi (utils/update_processor.py)
+CONCURRENT_UPDATES = _env_int('CONCURRENT_UPDATES', 16)
+
+# Kino yuborishda qayta urinishlar
+DELIVERY_MAX_ATTEMPTS = _env_int('DELIVERY_MAX_ATTEMPTS', 5)
+# Eksponensial kechikish boshlang'ich va maksimal qiymati (soniya)
+DELIVERY_BASE_DELAY = _env_float('DELIVERY_BASE_DELAY', 1.0)
+DELIVERY_MAX_DELAY = _env_float('DELIVERY_MAX_DELAY', 30.0)
+# Foydalanuvchi javobini ushlab turish mumkin bo'lgan vaqt; undan oshsa fondagi navbatga o'tadi
+DELIVERY_INLINE_WAIT = _env_float('DELIVERY_INLINE_WAIT', 3.0)
+# Fondagi navbatni bir vaqtda qayta ishlovchilar soni
+DELIVERY_WORKERS = _env_int('DELIVERY_WORKERS', 4)
+
+# Baza kanal tekshiruvi (kino postlari o'chirilmaganini tekshirish)
+# Tekshiruv nusxalari yuboriladigan va darhol o'chiriladigan alohida chat (masalan, bot
+# admin bo'lgan yopiq kanal yoki guruh). 0 bo'lsa tekshiruv o'chirilgan
+MOVIE_CHECK_CHAT_ID = _env_int('MOVIE_CHECK_CHAT_ID', 0)
+MOVIE_CHECK_BATCH_SIZE = _env_int('MOVIE_CHECK_BATCH_SIZE', 200)
+MOVIE_CHECK_CONCURRENCY = _env_int('MOVIE_CHECK_CONCURRENCY', 4)
+# Avtomatik tekshiruv oralig'i soatlarda (0 - o'chirilgan)
+MOVIE_CHECK_INTERVAL_HOURS = _env_int('MOVIE_CHECK_INTERVAL_HOURS', 24)
+
+# Avtomatik (jadval bo'yicha) backup
+# Oraliq soatlarda (0 - o'chirilgan)
+BACKUP_INTERVAL_HOURS = _env_int('BACKUP_INTERVAL_HOURS', 6)
+# Har nechta backupdan bittasi to'liq bo'ladi (qolganlari faqat o'zgargan qatorlar)
+BACKUP_FULL_EVERY = _env_int('BACKUP_FULL_EVERY', 28)
+# Nechta to'liq backup (va ularning inkrementallari) saqlanadi
+BACKUP_KEEP_FULL = _env_int('BACKUP_KEEP_FULL', 3)
+# Backup fayllari saqlanadigan papka; bo'sh bo'lsa BACKUP_CHAT_ID ga yuboriladi
+BACKUP_DIR = _env('BACKUP_DIR', '')
+BACKUP_CHAT_ID = _env_int('BACKUP_CHAT_ID', ADMIN_ID)
+
+# SQLite sozlamalari (WAL rejimi doim yoqiladi)
+# NORMAL: WAL bilan xavfsiz va FULL dan ancha tez (faqat elektr uzilganda oxirgi tranzaksiya yo'qolishi mumkin)
+SQLITE_SYNCHRONOUS = _env('SQLITE_SYNCHRONOUS', 'NORMAL')
+# Har bir ulanish sahifa keshi (KB)
+SQLITE_CACHE_SIZE_KB = _env_int('SQLITE_CACHE_SIZE_KB', 16384)
+# Faylni xotiraga akslantirish hajmi (MB, 0 - o'chirilgan)
+SQLITE_MMAP_SIZE_MB = _env_int('SQLITE_MMAP_SIZE_MB', 128)
+# Qulf bo'shashini kutish vaqti (ms)
+SQLITE_BUSY_TIMEOUT_MS = _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000)
+
+# Premium muddati nazorati
+# Tekshiruv oralig'i (daqiqa, 0 - o'chirilgan)
+PREMIUM_EXPIRY_INTERVAL_MINUTES = _env_int('PREMIUM_EXPIRY_INTERVAL_MINUTES', 10)
+# Tugashidan necha kun oldin eslatma yuboriladi
+PREMIUM_REMIND_DAYS = _env_int('PREMIUM_REMIND_DAYS', 3)
+# Bir bosqichda qayta ishlanadigan obunalar soni
+PREMIUM_EXPIRY_BATCH = _env_int('PREMIUM_EXPIRY_BATCH', 500)
+# Faol premium ID lar keshini to'liq yangilash oralig'i (soniya)
+PREMIUM_CACHE_TTL = _env_int('PREMIUM_CACHE_TTL', 3600)
+# Yangi premium obunalarni keshga qo'shish oralig'i (soniya)
+PREMIUM_CACHE_SYNC_SECONDS = _env_int('PREMIUM_CACHE_SYNC_SECONDS', 60)
+
+# Metrikalar (Prometheus) uchun lokal HTTP endpoint: http://METRICS_HOST:METRICS_PORT/metrics
+# METRICS_PORT=0 - o'chirilgan
+METRICS_HOST = _env('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = _env_int('METRICS_PORT', 9108)
+
+# Update larni kuzatish (tracing)
+# Kuzatiladigan update lar ulushi (0 - o'chirilgan, 1 - hammasi)
+TRACE_SAMPLE_RATE = _env_float('TRACE_SAMPLE_RATE', 0.1)
+# Shundan uzoq davom etgan trace lar faylga yoziladi (ms)
+TRACE_SLOW_MS = _env_float('TRACE_SLOW_MS', 1000.0)
+TRACE_FILE = _env('TRACE_FILE', 'logs/slow_traces.jsonl')
+TRACE_FILE_MAX_MB = _env_int('TRACE_FILE_MAX_MB', 10)
+
+# SQL so'rovlar statistikasi (/dbstats) va sekin so'rovlar logi (0 - o'chirilgan)
+DB_QUERY_STATS = _env_int('DB_QUERY_STATS', 1) > 0
+# Shundan uzoq bajarilgan so'rovlar rejasi (EXPLAIN) bilan logga yoziladi (ms)
+DB_SLOW_QUERY_MS = _env_float('DB_SLOW_QUERY_MS', 100.0)
+
+# Event loop watchdog va /health
+LOOP_WATCHDOG_INTERVAL = _env_float('LOOP_WATCHDOG_INTERVAL', 0.1)
+# Loop shundan uzoq bloklansa, bloklab turgan chaqiruv steki logga yoziladi (ms)
+LOOP_STALL_MS = _env_float('LOOP_STALL_MS', 250.0)
+# /health shundan katta kechikishda (oxirgi daqiqa maksimumi) "fail" qaytaradi (ms)
+HEALTH_MAX_LAG_MS = _env_float('HEALTH_MAX_LAG_MS', 1000.0)
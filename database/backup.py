@@ -0,0 +1,233 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+# Bot 50 MB gacha fayl yubora oladi, lekin getFile orqali faqat 20 MB gacha yuklab
+# oladi: /restoredb har bir bo'lakni bot orqali yuklaydi, shuning uchun 19 MB
+TELEGRAM_DOWNLOAD_LIMIT = 20 * 1024 * 1024
+BACKUP_PART_SIZE = 19 * 1024 * 1024
+# Backup API butun bazani bitta o'qish tranzaksiyasida nusxalaydi. Bo'lib-bo'lib
+# (pages > 0) nusxalash yozuvchilar bor bazada har yozuvdan keyin qaytadan boshlanadi
+# va hech qachon tugamasligi mumkin; bitta qadam esa izchil snapshot beradi.
+# WAL rejimida bu vaqtda yozuvchilar to'xtamaydi.
+SNAPSHOT_STEP_PAGES = -1
+READ_CHUNK_SIZE = 1024 * 1024
+# Ma'lumot jadvallari: virtual jadvallar (FTS5 qidiruv indeksi, fts5vocab) va ularning
+# ichki "<nom>_data", "<nom>_idx" ... jadvallari indeks bo'lib, ularga to'g'ridan-to'g'ri
+# yozib bo'lmaydi - ular nusxadan keyin qayta quriladi
+SQLITE_TABLES_SQL = r"""
+    SELECT name FROM sqlite_master AS t
+    WHERE type = 'table' AND name NOT LIKE 'sqlite\_%' ESCAPE '\'
+      AND sql NOT LIKE 'CREATE VIRTUAL TABLE%'
+      AND NOT EXISTS (
+          SELECT 1 FROM sqlite_master AS v
+          WHERE v.type = 'table' AND v.sql LIKE 'CREATE VIRTUAL TABLE%'
+            AND t.name LIKE replace(v.name, '_', '\_') || '\_%' ESCAPE '\'
+      )
+    ORDER BY name
+"""
+
+
+def create_snapshot(db_path: str, dest_path: str, pages: int = SNAPSHOT_STEP_PAGES) -> None:
+    """Ishlab turgan SQLite bazaning izchil nusxasini olish (sqlite3 backup API)"""
+    source = sqlite3.connect(db_path)
+    try:
+        target = sqlite3.connect(dest_path)
+        try:
+            source.backup(target, pages=pages)
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+
+def table_row_counts(db_path: str) -> Dict[str, int]:
+    """Har bir jadvaldagi qatorlar soni"""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(SQLITE_TABLES_SQL)
+        tables = [row[0] for row in cursor.fetchall()]
+        counts = {}
+        for table in tables:
+            cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+            counts[table] = cursor.fetchone()[0]
+        return counts
+    finally:
+        conn.close()
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(READ_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PartWriter:
+    """gzip oqimini belgilangan hajmdagi fayllarga bo'lib yozuvchi"""
+
+    def __init__(self, base_path: str, part_size: int):
+        self.base_path = base_path
+        self.part_size = part_size
+        self.parts: List[Dict] = []
+        self._handle = None
+        self._written = 0
+        self._digest = None
+        self.total_digest = hashlib.sha256()
+        self.total_size = 0
+
+    def _open_next(self):
+        self._close_current()
+        path = f"{self.base_path}.part{len(self.parts) + 1:03d}"
+        self._handle = open(path, 'wb')
+        self._written = 0
+        self._digest = hashlib.sha256()
+        self.parts.append({'path': path})
+
+    def _close_current(self):
+        if self._handle:
+            self._handle.close()
+            self.parts[-1]['size'] = self._written
+            self.parts[-1]['sha256'] = self._digest.hexdigest()
+            self._handle = None
+
+    def write(self, data: bytes) -> int:
+        view = memoryview(data)
+        while view:
+            if not self._handle or self._written >= self.part_size:
+                self._open_next()
+            room = self.part_size - self._written
+            chunk = view[:room]
+            self._handle.write(chunk)
+            self._digest.update(chunk)
+            self.total_digest.update(chunk)
+            self._written += len(chunk)
+            self.total_size += len(chunk)
+            view = view[room:]
+        return len(data)
+
+    def flush(self):
+        if self._handle:
+            self._handle.flush()
+
+    def close(self):
+        self._close_current()
+
+
+def _compress_to_parts(source_path: str, base_path: str, part_size: int, level: int) -> PartWriter:
+    writer = PartWriter(base_path, part_size)
+    try:
+        with open(source_path, 'rb') as source:
+            with gzip.GzipFile(filename=os.path.basename(source_path), mode='wb', fileobj=writer, compresslevel=level) as gz:
+                shutil.copyfileobj(source, gz, READ_CHUNK_SIZE)
+    finally:
+        writer.close()
+    finalize_parts(writer)
+    return writer
+
+
+def finalize_parts(writer: PartWriter) -> None:
+    """Bitta bo'lak bo'lsa, unga oddiy .gz fayl nomini berish"""
+    if len(writer.parts) == 1:
+        os.replace(writer.parts[0]['path'], writer.base_path)
+        writer.parts[0]['path'] = writer.base_path
+
+
+def build_backup(db_path: str, work_dir: str = None, part_size: int = BACKUP_PART_SIZE, level: int = 6) -> Dict:
+    """Snapshot + gzip + bo'laklash + manifest (sinxron, alohida threadda chaqiriladi)
+
+    Returns:
+        manifest lug'ati; 'parts' dagi har bir bo'lak uchun 'path' ham bor,
+        'work_dir' ni ishlatib bo'lgach `cleanup_backup()` bilan o'chirish kerak.
+    """
+    started = time.monotonic()
+    own_work_dir = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix='prokino-backup-')
+    try:
+        return _build_backup(db_path, work_dir, part_size, level, started)
+    except BaseException:
+        # Yarim tayyor snapshot (bazaning to'liq nusxasi) diskda qolmasin
+        if own_work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+
+
+def _build_backup(db_path: str, work_dir: str, part_size: int, level: int, started: float) -> Dict:
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    name = os.path.splitext(os.path.basename(db_path))[0]
+    snapshot_path = os.path.join(work_dir, f"{name}-{stamp}.db")
+
+    create_snapshot(db_path, snapshot_path)
+    snapshot_done = time.monotonic()
+    rows = table_row_counts(snapshot_path)
+    raw_size = os.path.getsize(snapshot_path)
+    raw_sha256 = sha256_file(snapshot_path)
+
+    writer = _compress_to_parts(snapshot_path, snapshot_path + '.gz', part_size, level)
+    os.remove(snapshot_path)
+
+    manifest = {
+        'format': 'sqlite-gzip',
+        'version': 1,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'source': os.path.basename(db_path),
+        'database_file': os.path.basename(snapshot_path),
+        'size': raw_size,
+        'sha256': raw_sha256,
+        'compressed_size': writer.total_size,
+        'compressed_sha256': writer.total_digest.hexdigest(),
+        'parts': [
+            {
+                'name': os.path.basename(part['path']),
+                'path': part['path'],
+                'size': part['size'],
+                'sha256': part['sha256'],
+            }
+            for part in writer.parts
+        ],
+        'tables': rows,
+        'snapshot_seconds': round(snapshot_done - started, 3),
+        'duration_seconds': round(time.monotonic() - started, 3),
+        'work_dir': work_dir,
+    }
+    manifest_path = os.path.join(work_dir, f"{name}-{stamp}.manifest.json")
+    with open(manifest_path, 'w', encoding='utf-8') as handle:
+        json.dump(manifest_for_upload(manifest), handle, ensure_ascii=False, indent=2)
+    manifest['manifest_path'] = manifest_path
+    return manifest
+
+
+def manifest_for_upload(manifest: Dict) -> Dict:
+    """Manifestdan mahalliy yo'llarni olib tashlash"""
+    public = {key: value for key, value in manifest.items() if key not in ('work_dir', 'manifest_path')}
+    public['parts'] = [{k: v for k, v in part.items() if k != 'path'} for part in manifest['parts']]
+    return public
+
+
+def cleanup_backup(manifest: Dict) -> None:
+    work_dir = manifest.get('work_dir')
+    if work_dir and os.path.isdir(work_dir):
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+async def create_backup(db_path: str, **kwargs) -> Dict:
+    """Backupni event loopni bloklamasdan tayyorlash"""
+    return await asyncio.to_thread(build_backup, db_path, **kwargs)
+
+
+def format_size(size: int) -> str:
+    value = float(size)
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if value < 1024 or unit == 'GB':
+            return f"{value:.0f} {unit}" if unit == 'B' else f"{value:.1f} {unit}"
+        value /= 1024
@@ -1,14 +1,24 @@
 import sqlite3
 import os
+import threading
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Tuple, List, Dict
 from contextlib import contextmanager
 
-from config import ADMIN_ID, DATABASE_URL, is_postgres
+from config import (
+    ADMIN_ID, DATABASE_URL, SETTINGS_CACHE_TTL, is_postgres,
+    SQLITE_BUSY_TIMEOUT_MS, SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE_MB, SQLITE_SYNCHRONOUS,
+    DB_QUERY_STATS, DB_SLOW_QUERY_MS
+)
+from utils import TTLCache, MISSING
+from utils.search_text import movie_search_text, normalize_search_text, word_similarity
+from .query_stats import ObservedConnection, QueryStats
 
 # PostgreSQL uchun
 try:
     import psycopg2
     import psycopg2.extras
+    from .query_stats import ObservedPgConnection
     HAS_POSTGRES = True
 except ImportError:
     HAS_POSTGRES = False
@@ -19,16 +29,63 @@ DEFAULT_START_MESSAGE = (
     "Kinoni olish uchun kino kodini yuboring.\n"
     "Kod faqat raqam va 1-10000 oralig'ida bo'lishi kerak.\n"
     "Masalan: <code>1</code>, <code>21</code>, <code>137</code>, <code>9999</code>\n\n"
+    "🔎 Kino nomini yozib qidirishingiz ham mumkin.\n\n"
     "{premium_hint}"
 )
 
+# Qidiruv: FTS natijalaridan nechtasi qayta tartiblanadi, qachon va qanday
+# o'xshashlik bilan xato yozilgan so'rov uchun taxminiy natijalar qo'shiladi
+SEARCH_CANDIDATES = 200
+SEARCH_FUZZY_CANDIDATES = 300
+SEARCH_FUZZY_BELOW = 5
+SEARCH_FUZZY_MIN_SIMILARITY = 0.5
+
+# movies_fts ni movies bilan sinxron ushlash. search_text NULL bo'lgan qatorlar
+# indeksda yo'q: ularni indeksdan o'chirishga urinmaslik kerak
+MOVIE_FTS_TRIGGERS = (
+    '''
+    CREATE TRIGGER IF NOT EXISTS movies_fts_ai AFTER INSERT ON movies
+    WHEN new.search_text IS NOT NULL BEGIN
+        INSERT INTO movies_fts (rowid, search_text) VALUES (new.id, new.search_text);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS movies_fts_ad AFTER DELETE ON movies
+    WHEN old.search_text IS NOT NULL BEGIN
+        INSERT INTO movies_fts (movies_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS movies_fts_au AFTER UPDATE OF search_text ON movies BEGIN
+        INSERT INTO movies_fts (movies_fts, rowid, search_text)
+            SELECT 'delete', old.id, old.search_text WHERE old.search_text IS NOT NULL;
+        INSERT INTO movies_fts (rowid, search_text)
+            SELECT new.id, new.search_text WHERE new.search_text IS NOT NULL;
+    END
+    ''',
+)
+
 class DatabaseManager:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.use_postgres = is_postgres() and HAS_POSTGRES
+        # Kam o'zgaradigan sozlamalar keshi (har bir so'rovda bazaga murojaat qilmaslik uchun)
+        self.cache = TTLCache(ttl=SETTINGS_CACHE_TTL)
+        # Baza qayta yuklanganda (restore) chaqiriladigan funksiyalar
+        self._reload_listeners = []
+        # SQLite: har bir thread uchun bitta doimiy ulanish (o'qishlar parallel),
+        # yozishlar esa bitta qulf orqali navbat bilan bajariladi
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        # Har bir SQL so'rov statistikasi (/dbstats) va sekin so'rovlar logi
+        self.query_stats = QueryStats(DB_SLOW_QUERY_MS)
+        self.query_stats.enabled = DB_QUERY_STATS
+        # Kino qidiruvi: 'fts' (SQLite FTS5), 'trgm' (PostgreSQL pg_trgm) yoki 'like'
+        self.movie_search_mode = 'like'
         
         if not self.use_postgres:
             self._ensure_directory()
+            self._enable_wal()
         
         self.init_database()
 
@@ -39,32 +96,114 @@ class DatabaseManager:
         if directory and not os.path.exists(directory):
             os.makedirs(directory, exist_ok=True)
 
+    def clear_caches(self):
+        """Sozlamalar keshini tozalash (sozlama o'zgarganda chaqiriladi)"""
+        self.cache.clear()
+
+    def add_reload_listener(self, callback):
+        """Baza almashtirilganda chaqiriladigan funksiyani ro'yxatga olish (masalan, boshqa keshlarni tozalash)"""
+        self._reload_listeners.append(callback)
+
+    def reload(self):
+        """Baza tiklangandan keyin jarayonni to'xtatmasdan qayta yuklash"""
+        # Eski nusxadan kelgan bazada yangi ustun/jadvallar bo'lmasligi mumkin
+        self.init_database()
+        self.clear_caches()
+        for callback in self._reload_listeners:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Qayta yuklash listenerida xatolik: {e}")
+
     def get_db_path(self) -> str:
         """Database faylining to'liq yo'lini qaytarish"""
         if self.use_postgres:
             return "PostgreSQL (Railway)"
         return os.path.abspath(self.db_path)
     
+    def _sqlite_connection(self) -> sqlite3.Connection:
+        """Joriy thread uchun doimiy SQLite ulanishi (kerak bo'lsa yaratiladi)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+                factory=ObservedConnection
+            )
+            conn.observer = self.query_stats
+            conn.execute(f"PRAGMA busy_timeout = {int(SQLITE_BUSY_TIMEOUT_MS)}")
+            conn.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+            # Manfiy qiymat - KB da
+            conn.execute(f"PRAGMA cache_size = -{int(SQLITE_CACHE_SIZE_KB)}")
+            conn.execute(f"PRAGMA mmap_size = {int(SQLITE_MMAP_SIZE_MB) * 1024 * 1024}")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    def close(self):
+        """Joriy thread ning doimiy SQLite ulanishini yopish"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _enable_wal(self):
+        """WAL rejimi: o'quvchilar yozuvchini, yozuvchi o'quvchilarni bloklamaydi (faylda saqlanadi)"""
+        conn = sqlite3.connect(self.db_path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+        finally:
+            conn.close()
+
     @contextmanager
-    def get_connection(self):
-        """Database bilan bog'lanish (context manager)"""
+    def get_connection(self, write: bool = False):
+        """Database bilan bog'lanish (context manager)
+
+        SQLite da `write=True` bo'lsa, blok yozuvchi qulfi ostida bajariladi:
+        jarayondagi barcha yozishlar ketma-ket bo'ladi va "database is locked"
+        xatosi o'rniga qisqa navbat hosil bo'ladi. O'qishlar qulfsiz ishlaydi.
+        """
         if self.use_postgres:
             # Railway PostgreSQL URL ni to'g'rilash
             url = DATABASE_URL
             if url.startswith('postgres://'):
                 url = url.replace('postgres://', 'postgresql://', 1)
-            conn = psycopg2.connect(url)
+            conn = psycopg2.connect(url, connection_factory=ObservedPgConnection)
+            conn.observer = self.query_stats
             try:
                 yield conn
             finally:
                 conn.close()
         else:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._sqlite_connection()
+            lock = self._write_lock if write else None
+            if lock:
+                lock.acquire()
+            self._local.depth += 1
             try:
                 yield conn
             finally:
-                conn.close()
+                self._local.depth -= 1
+                # Tashqi blok tugaganda commit qilinmagan tranzaksiya qolmasligi kerak
+                # (avval ulanish yopilganda shunday bo'lardi)
+                if self._local.depth == 0 and conn.in_transaction:
+                    conn.rollback()
+                if lock:
+                    lock.release()
     
+    def ping(self) -> bool:
+        """Baza javob berayotganini tekshirish (health check uchun)"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            return True
+        except Exception as e:
+            print(f"Bazaga ulanib bo'lmadi: {e}")
+            return False
+
     def _get_placeholder(self) -> str:
         """SQL placeholder - PostgreSQL uchun %s, SQLite uchun ?"""
         return "%s" if self.use_postgres else "?"
@@ -86,7 +225,7 @@ class DatabaseManager:
     
     def init_database(self):
         """Database jadvallarini yaratish"""
-        with self.get_connection() as conn:
+        with self.get_connection(write=True) as conn:
             cursor = conn.cursor()
             
             # PostgreSQL va SQLite uchun mos SQL
@@ -241,6 +380,47 @@ class DatabaseManager:
                         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 ''')
+
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS delivery_dead_letters (
+                        id SERIAL PRIMARY KEY,
+                        code TEXT,
+                        user_id BIGINT,
+                        channel_id TEXT,
+                        message_id INTEGER,
+                        error TEXT,
+                        attempts INTEGER DEFAULT 1,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS backup_log (
+                        id SERIAL PRIMARY KEY,
+                        kind TEXT NOT NULL,
+                        snapshot_at TEXT,
+                        since TEXT,
+                        size INTEGER,
+                        compressed_size INTEGER,
+                        destination TEXT,
+                        location TEXT,
+                        status TEXT DEFAULT 'ok',
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS premium_request_messages (
+                        id SERIAL PRIMARY KEY,
+                        request_id INTEGER NOT NULL,
+                        chat_id BIGINT NOT NULL,
+                        message_id BIGINT NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_premium_request_messages_request ON premium_request_messages (request_id)"
+                )
             else:
                 # SQLite uchun jadvallar
                 cursor.execute('''
@@ -392,6 +572,47 @@ class DatabaseManager:
                         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 ''')
+
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS delivery_dead_letters (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        code TEXT,
+                        user_id INTEGER,
+                        channel_id TEXT,
+                        message_id INTEGER,
+                        error TEXT,
+                        attempts INTEGER DEFAULT 1,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS backup_log (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        kind TEXT NOT NULL,
+                        snapshot_at TEXT,
+                        since TEXT,
+                        size INTEGER,
+                        compressed_size INTEGER,
+                        destination TEXT,
+                        location TEXT,
+                        status TEXT DEFAULT 'ok',
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS premium_request_messages (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        request_id INTEGER NOT NULL,
+                        chat_id INTEGER NOT NULL,
+                        message_id INTEGER NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_premium_request_messages_request ON premium_request_messages (request_id)"
+                )
             
             # Boshlang'ich ma'lumotlarni kiritish
             self._init_default_data(cursor)
@@ -452,6 +673,119 @@ class DatabaseManager:
         except Exception as e:
             # Ustun allaqachon mavjud bo'lsa, o'tkazib yuborish
             pass
+
+        # Migration: premium muddati nazorati uchun holat ustunlari va indeks
+        try:
+            if self.use_postgres:
+                cursor.execute("ALTER TABLE premium_users ADD COLUMN IF NOT EXISTS status TEXT DEFAULT 'active'")
+                cursor.execute("ALTER TABLE premium_users ADD COLUMN IF NOT EXISTS reminder_sent INTEGER DEFAULT 0")
+            else:
+                cursor.execute("PRAGMA table_info(premium_users)")
+                columns = [col[1] for col in cursor.fetchall()]
+                if 'status' not in columns:
+                    cursor.execute("ALTER TABLE premium_users ADD COLUMN status TEXT DEFAULT 'active'")
+                if 'reminder_sent' not in columns:
+                    cursor.execute("ALTER TABLE premium_users ADD COLUMN reminder_sent INTEGER DEFAULT 0")
+            # Faqat faol obunalar ichidan muddat bo'yicha qidiriladi
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_premium_users_status_expires ON premium_users (status, expires_at)"
+            )
+            # Admin ro'yxatlari uchun keyset sahifalash: holat ichida id bo'yicha
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_premium_requests_status_id ON premium_requests (status, id)"
+            )
+        except Exception as e:
+            pass
+
+        # Migration: movies jadvaliga baza kanal tekshiruvi natijasi (status, checked_at)
+        try:
+            if self.use_postgres:
+                cursor.execute("ALTER TABLE movies ADD COLUMN IF NOT EXISTS status TEXT DEFAULT 'ok'")
+                cursor.execute("ALTER TABLE movies ADD COLUMN IF NOT EXISTS checked_at TIMESTAMP")
+            else:
+                cursor.execute("PRAGMA table_info(movies)")
+                columns = [col[1] for col in cursor.fetchall()]
+                if 'status' not in columns:
+                    cursor.execute("ALTER TABLE movies ADD COLUMN status TEXT DEFAULT 'ok'")
+                if 'checked_at' not in columns:
+                    cursor.execute("ALTER TABLE movies ADD COLUMN checked_at TIMESTAMP")
+        except Exception as e:
+            pass
+
+        # Migration: kino nomi va janri bo'yicha qidiruv
+        self._init_movie_search(cursor)
+
+    def _init_movie_search(self, cursor):
+        """movies.search_text ustuni, qidiruv indeksi va eski kinolarni to'ldirish
+
+        search_text - nom va janrning normallashtirilgan (kirill -> lotin) ko'rinishi.
+        SQLite da u trigram tokenizerli FTS5 jadvaliga triggerlar orqali yoziladi,
+        PostgreSQL da pg_trgm GIN indeksi quriladi. Ikkalasi ham bo'lmasa LIKE ishlatiladi.
+        """
+        self.movie_search_mode = 'like'
+        try:
+            if self.use_postgres:
+                cursor.execute("ALTER TABLE movies ADD COLUMN IF NOT EXISTS search_text TEXT")
+            else:
+                cursor.execute("PRAGMA table_info(movies)")
+                columns = [col[1] for col in cursor.fetchall()]
+                if 'search_text' not in columns:
+                    cursor.execute("ALTER TABLE movies ADD COLUMN search_text TEXT")
+            # Qisqa so'rovlar nom boshidan qidiriladi
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_movies_search_text ON movies (search_text)")
+        except Exception as e:
+            print(f"Qidiruv ustunini yaratishda xatolik: {e}")
+            return
+
+        rebuild = False
+        if self.use_postgres:
+            # Kengaytma yaratish huquqi bo'lmasa, tranzaksiya buzilmasligi uchun savepoint
+            cursor.execute("SAVEPOINT movie_search")
+            try:
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_movies_search_trgm ON movies USING gin (search_text gin_trgm_ops)"
+                )
+                cursor.execute("RELEASE SAVEPOINT movie_search")
+                self.movie_search_mode = 'trgm'
+            except Exception as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT movie_search")
+                print(f"pg_trgm mavjud emas, qidiruv LIKE orqali ishlaydi: {e}")
+        else:
+            try:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'movies_fts'")
+                rebuild = cursor.fetchone() is None
+                cursor.execute('''
+                    CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts
+                    USING fts5(search_text, content='movies', content_rowid='id', tokenize='trigram')
+                ''')
+                # Har bir trigramma nechta kinoda uchrashi: taxminiy qidiruv kam uchraydiganlarini tanlaydi
+                cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts_vocab USING fts5vocab(movies_fts, row)")
+                for trigger in MOVIE_FTS_TRIGGERS:
+                    cursor.execute(trigger)
+                self.movie_search_mode = 'fts'
+            except Exception as e:
+                rebuild = False
+                print(f"FTS5 mavjud emas, qidiruv LIKE orqali ishlaydi: {e}")
+
+        try:
+            self._refresh_movie_search(cursor, rebuild)
+        except Exception as e:
+            print(f"Kinolar qidiruv matnini to'ldirishda xatolik: {e}")
+
+    def _refresh_movie_search(self, cursor, rebuild: bool = True):
+        """search_text i bo'sh kinolarni to'ldirish va FTS indeksini qayta qurish
+
+        Qidiruv qo'shilishidan oldingi bazalar va eksport importidan keyin chaqiriladi
+        (FTS jadvallari eksportga kirmaydi).
+        """
+        ph = self._get_placeholder()
+        cursor.execute("SELECT id, movie_name, movie_genre FROM movies WHERE search_text IS NULL")
+        updates = [(movie_search_text(name, genre), row_id) for row_id, name, genre in cursor.fetchall()]
+        if updates:
+            cursor.executemany(f"UPDATE movies SET search_text = {ph} WHERE id = {ph}", updates)
+        if rebuild and self.movie_search_mode == 'fts':
+            cursor.execute("INSERT INTO movies_fts (movies_fts) VALUES ('rebuild')")
     
     def execute_query(self, query: str, params: tuple = (), fetch: str = None):
         """Universal SQL so'rov bajarish metodi
@@ -468,7 +802,7 @@ class DatabaseManager:
             # SQL ni database turiga moslashtirish
             adapted_query = self._adapt_sql(query)
             
-            with self.get_connection() as conn:
+            with self.get_connection(write=fetch is None) as conn:
                 cursor = conn.cursor()
                 cursor.execute(adapted_query, params)
                 
@@ -487,7 +821,7 @@ class DatabaseManager:
         """Baza kanalini sozlash"""
         try:
             ph = self._get_placeholder()
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 
                 # Avvalgi kanallarni o'chirish
@@ -497,6 +831,7 @@ class DatabaseManager:
                 cursor.execute(f"INSERT INTO settings (id, channel_id) VALUES (1, {ph})", (channel_id,))
                 
                 conn.commit()
+            self.clear_caches()
             return True
         except Exception as e:
             print(f"Kanal sozlashda xatolik: {e}")
@@ -504,6 +839,9 @@ class DatabaseManager:
     
     def get_channel(self) -> Optional[str]:
         """Baza kanalini olish"""
+        cached = self.cache.get('channel', MISSING)
+        if cached is not MISSING:
+            return cached
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
@@ -511,9 +849,9 @@ class DatabaseManager:
                 cursor.execute("SELECT channel_id FROM settings WHERE id = 1")
                 result = cursor.fetchone()
                 
-                if result:
-                    return result[0]
-                return None
+            channel_id = result[0] if result else None
+            self.cache.set('channel', channel_id)
+            return channel_id
         except Exception as e:
             print(f"Kanal olishda xatolik: {e}")
             return None
@@ -522,8 +860,8 @@ class DatabaseManager:
         """Kinoni bazaga qo'shish"""
         try:
             result = self.execute_query(
-                "INSERT INTO movies (code, message_id, channel_id, movie_name, movie_genre, movie_duration) VALUES (?, ?, ?, ?, ?, ?)",
-                (code, message_id, channel_id, movie_name, movie_genre, movie_duration)
+                "INSERT INTO movies (code, message_id, channel_id, movie_name, movie_genre, movie_duration, search_text) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (code, message_id, channel_id, movie_name, movie_genre, movie_duration, movie_search_text(movie_name, movie_genre))
             )
             return result is not None
         except Exception as e:
@@ -543,6 +881,182 @@ class DatabaseManager:
             print(f"Kino topishda xatolik: {e}")
             return None
     
+    def get_movie_info(self, code: str) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+        """Kino kodi bo'yicha (code, movie_name, movie_genre): search_movies bilan bir xil ko'rinish
+
+        search_movies kabi 'dead' kinolar qaytarilmaydi.
+        """
+        try:
+            result = self.execute_query(
+                "SELECT code, movie_name, movie_genre FROM movies WHERE code = ? AND COALESCE(status, '') <> 'dead'",
+                (code,),
+                fetch='one'
+            )
+            return tuple(result) if result else None
+        except Exception as e:
+            print(f"Kino olishda xatolik: {e}")
+            return None
+
+    def get_movie_for_delivery(self, code: str) -> Optional[Tuple[int, str, str]]:
+        """Kinoni yuborish uchun: (message_id, channel_id, status)"""
+        try:
+            result = self.execute_query(
+                "SELECT message_id, channel_id, status FROM movies WHERE code = ?",
+                (code,),
+                fetch='one'
+            )
+            return tuple(result) if result else None
+        except Exception as e:
+            print(f"Kino olishda xatolik: {e}")
+            return None
+
+    def get_movies_batch(self, after_id: int = 0, limit: int = 200) -> List[Tuple[int, str, int, str, str]]:
+        """Kinolarni id bo'yicha bo'laklab olish: (id, code, message_id, channel_id, status)"""
+        try:
+            result = self.execute_query(
+                "SELECT id, code, message_id, channel_id, status FROM movies WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit),
+                fetch='all'
+            )
+            return [tuple(row) for row in result or []]
+        except Exception as e:
+            print(f"Kinolarni olishda xatolik: {e}")
+            return []
+
+    def search_movies(self, query: str, limit: int = 50) -> List[Tuple[str, Optional[str], Optional[str]]]:
+        """Kinolarni nomi va janri bo'yicha qidirish: [(code, movie_name, movie_genre), ...]
+
+        Avval so'rov so'zlari uchragan kinolar (nomi so'rov bilan boshlanganlari oldinda),
+        natija kam bo'lsa xato yozilgan so'rovga o'xshash nomlar qo'shiladi. Posti kanaldan
+        o'chirilgan ('dead') kinolar ko'rsatilmaydi: ularni yuborib bo'lmaydi.
+        """
+        normalized = normalize_search_text(query)
+        if not normalized or limit <= 0:
+            return []
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                if self.movie_search_mode == 'fts':
+                    return self._search_movies_fts(cursor, normalized, limit)
+                if self.movie_search_mode == 'trgm':
+                    return self._search_movies_trgm(cursor, normalized, limit)
+                return self._search_movies_like(cursor, normalized, limit)
+        except Exception as e:
+            print(f"Kino qidirishda xatolik: {e}")
+            return []
+
+    def _search_movies_fts(self, cursor, normalized: str, limit: int) -> List[Tuple]:
+        # Nomi so'rov bilan boshlanganlar - oddiy indeks bo'yicha oraliq
+        # (search_text faqat [0-9a-z ] dan iborat, '{' esa 'z' dan keyingi belgi)
+        cursor.execute('''
+            SELECT code, movie_name, movie_genre FROM movies
+            WHERE search_text >= ? AND search_text < ? AND COALESCE(status, '') <> 'dead'
+            ORDER BY search_text LIMIT ?
+        ''', (normalized, normalized + '{', limit))
+        results = [tuple(row) for row in cursor.fetchall()]
+        words = normalized.split()
+        long_words = [word for word in words if len(word) >= 3]
+        # Trigram indeksi 3 belgidan qisqa so'zni topa olmaydi: ular faqat nom boshidan qidiriladi
+        if len(results) >= limit or not long_words:
+            return results
+
+        # So'rovning barcha so'zlari uchragan kinolar, yangilari oldinda. bm25 (rank) har bir
+        # mos qatorni hisoblaydi, rowid tartibi esa LIMIT da to'xtaydi
+        found = {row[0] for row in results}
+        cursor.execute('''
+            SELECT m.code, m.movie_name, m.movie_genre, m.search_text
+            FROM movies m JOIN (
+                SELECT rowid FROM movies_fts WHERE movies_fts MATCH ? ORDER BY rowid DESC LIMIT ?
+            ) AS f ON m.id = f.rowid
+            WHERE COALESCE(m.status, '') <> 'dead'
+            ORDER BY m.id DESC
+        ''', (' AND '.join(f'"{word}"' for word in long_words), SEARCH_CANDIDATES))
+        word_starts, others = [], []
+        for code, name, genre, text in cursor.fetchall():
+            padded = f" {text}"
+            if code in found or not all(word in text for word in words):
+                continue
+            # So'z boshidan mos kelganlar (" kun" -> "kunlar") so'z ichidagilardan oldin
+            target = word_starts if all(f" {word}" in padded for word in words) else others
+            target.append((code, name, genre))
+        results = (results + word_starts + others)[:limit]
+        if len(results) >= min(limit, SEARCH_FUZZY_BELOW):
+            return results
+        return results + self._search_movies_fuzzy(cursor, normalized, long_words, results, limit - len(results))
+
+    def _search_movies_fuzzy(self, cursor, normalized: str, long_words: List[str], results, limit: int) -> List[Tuple]:
+        """Xato yozilgan so'rov: trigrammalarining yarmidan ko'pi uchragan nomlar
+
+        O'xshash nom so'rov trigrammalarining kamida yarmini o'z ichiga oladi, demak eng kam
+        uchraydigan (yarmi + 1) tasidan bittasi albatta bor: nomzodlar faqat shular bo'yicha olinadi.
+        """
+        grams = sorted({word[index:index + 3] for word in long_words for index in range(len(word) - 2)})
+        cursor.execute(
+            f"SELECT term, doc FROM movies_fts_vocab WHERE term IN ({', '.join('?' * len(grams))})", grams
+        )
+        counts = dict(cursor.fetchall())
+        present = sorted((gram for gram in grams if gram in counts), key=counts.get)
+        if not present:
+            return []
+        rare = present[:len(grams) - int(len(grams) * SEARCH_FUZZY_MIN_SIMILARITY) + 1]
+        cursor.execute('''
+            SELECT m.code, m.movie_name, m.movie_genre, m.search_text
+            FROM movies m JOIN (
+                SELECT rowid FROM movies_fts WHERE movies_fts MATCH ? ORDER BY rowid DESC LIMIT ?
+            ) AS f ON m.id = f.rowid
+            WHERE COALESCE(m.status, '') <> 'dead'
+        ''', (' OR '.join(f'"{gram}"' for gram in rare), SEARCH_FUZZY_CANDIDATES))
+        found = {row[0] for row in results}
+        scored = []
+        for code, name, genre, text in cursor.fetchall():
+            if code in found:
+                continue
+            score = word_similarity(normalized, text or '')
+            if score >= SEARCH_FUZZY_MIN_SIMILARITY:
+                scored.append((-score, -len(scored), code, name, genre))
+        scored.sort()
+        return [(code, name, genre) for _, _, code, name, genre in scored[:limit]]
+
+    def _search_movies_trgm(self, cursor, normalized: str, limit: int) -> List[Tuple]:
+        # pg_trgm: LIKE '%...%' va "<%" (word_similarity) GIN indeksdan foydalanadi
+        pattern = f"%{normalized}%"
+        cursor.execute('''
+            SELECT code, movie_name, movie_genre FROM movies
+            WHERE (search_text LIKE %s OR %s <%% search_text) AND COALESCE(status, '') <> 'dead'
+            ORDER BY search_text LIKE %s DESC, search_text LIKE %s DESC,
+                     word_similarity(%s, search_text) DESC, id DESC
+            LIMIT %s
+        ''', (pattern, normalized, normalized + '%', pattern, normalized, limit))
+        return [tuple(row) for row in cursor.fetchall()]
+
+    def _search_movies_like(self, cursor, normalized: str, limit: int) -> List[Tuple]:
+        ph = self._get_placeholder()
+        cursor.execute(f'''
+            SELECT code, movie_name, movie_genre FROM movies
+            WHERE search_text LIKE {ph} AND COALESCE(status, '') <> 'dead'
+            ORDER BY search_text LIKE {ph} DESC, id DESC
+            LIMIT {ph}
+        ''', (f"%{normalized}%", normalized + '%', limit))
+        return [tuple(row) for row in cursor.fetchall()]
+
+    def set_movies_status(self, updates: List[Tuple[str, str]]) -> bool:
+        """Kinolar holatini yangilash: [(status, code), ...]"""
+        if not updates:
+            return True
+        try:
+            ph = self._get_placeholder()
+            with self.get_connection(write=True) as conn:
+                cursor = conn.cursor()
+                cursor.executemany(
+                    f"UPDATE movies SET status = {ph}, checked_at = CURRENT_TIMESTAMP WHERE code = {ph}",
+                    updates
+                )
+                conn.commit()
+            return True
+        except Exception as e:
+            print(f"Kino holatini yangilashda xatolik: {e}")
+            return False
+
     def get_stats(self) -> dict:
         """Bot statistikasi uchun kengaytirilgan ma'lumotlar"""
         try:
@@ -674,12 +1188,17 @@ class DatabaseManager:
     
     def get_subscription_status(self) -> bool:
         """Majburiy obuna holatini olish"""
+        cached = self.cache.get('subscription_status', MISSING)
+        if cached is not MISSING:
+            return cached
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT is_enabled FROM subscription_settings WHERE id = 1")
                 result = cursor.fetchone()
-            return bool(result[0]) if result else False
+            status = bool(result[0]) if result else False
+            self.cache.set('subscription_status', status)
+            return status
         except Exception as e:
             print(f"Obuna holatini olishda xatolik: {e}")
             return False
@@ -701,7 +1220,7 @@ class DatabaseManager:
     def update_start_message(self, message: str) -> bool:
         """/start xabarini yangilash"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "INSERT OR REPLACE INTO bot_messages (key, value) VALUES ('start_message', ?)",
@@ -716,10 +1235,11 @@ class DatabaseManager:
     def set_subscription_status(self, is_enabled: bool) -> bool:
         """Majburiy obuna holatini o'zgartirish"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute("UPDATE subscription_settings SET is_enabled = ? WHERE id = 1", (1 if is_enabled else 0,))
                 conn.commit()
+            self.clear_caches()
             return True
         except Exception as e:
             print(f"Obuna holatini o'zgartirishda xatolik: {e}")
@@ -736,7 +1256,7 @@ class DatabaseManager:
             channel_type: 'channel' (oddiy), 'request' (so'rovli), 'link' (havola)
         """
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 sql = self._adapt_sql(
                     "INSERT INTO subscription_channels (channel_id, channel_name, channel_username, is_required, channel_type) VALUES (?, ?, ?, ?, ?)"
@@ -746,6 +1266,7 @@ class DatabaseManager:
                     (channel_id, channel_name, channel_username, 1 if is_required else 0, channel_type)
                 )
                 conn.commit()
+            self.clear_caches()
             return True
         except Exception as e:
             print(f"Kanal qo'shishda xatolik: {e}")
@@ -753,12 +1274,16 @@ class DatabaseManager:
     
     def get_subscription_channels(self) -> list:
         """Barcha kanallar va havolalarni olish"""
+        cached = self.cache.get('subscription_channels', MISSING)
+        if cached is not MISSING:
+            return cached
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 sql = self._adapt_sql("SELECT channel_id, channel_name, channel_username, is_required, channel_type FROM subscription_channels")
                 cursor.execute(sql)
                 results = cursor.fetchall()
+            self.cache.set('subscription_channels', results)
             return results
         except Exception as e:
             print(f"Kanallarni olishda xatolik: {e}")
@@ -767,11 +1292,10 @@ class DatabaseManager:
     def get_subscription_channels_with_ids(self) -> list:
         """Majburiy obuna kanallarini (row id bilan) olish"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, channel_id, channel_name, channel_username FROM subscription_channels")
-            results = cursor.fetchall()
-            conn.close()
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id, channel_id, channel_name, channel_username FROM subscription_channels")
+                results = cursor.fetchall()
             return results
         except Exception as e:
             print(f"Kanallarni olishda xatolik (id bilan): {e}")
@@ -792,10 +1316,11 @@ class DatabaseManager:
     def update_channel_required_status(self, channel_id: str, is_required: bool) -> bool:
         """Kanalning majburiy/ixtiyoriy holatini o'zgartirish"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute("UPDATE subscription_channels SET is_required = ? WHERE channel_id = ?", (1 if is_required else 0, channel_id))
                 conn.commit()
+            self.clear_caches()
             return True
         except Exception as e:
             print(f"Kanal holatini o'zgartirishda xatolik: {e}")
@@ -804,10 +1329,11 @@ class DatabaseManager:
     def delete_subscription_channel(self, channel_id: str) -> bool:
         """Majburiy obuna kanalini o'chirish"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM subscription_channels WHERE channel_id = ?", (channel_id,))
                 conn.commit()
+            self.clear_caches()
             return True
         except Exception as e:
             print(f"Kanalni o'chirishda xatolik: {e}")
@@ -816,11 +1342,11 @@ class DatabaseManager:
     def delete_subscription_channel_by_id(self, row_id: int) -> bool:
         """Majburiy obuna kanalini row id orqali o'chirish"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM subscription_channels WHERE id = ?", (row_id,))
-            conn.commit()
-            conn.close()
+            with self.get_connection(write=True) as conn:
+                cursor = conn.cursor()
+                cursor.execute(self._adapt_sql("DELETE FROM subscription_channels WHERE id = ?"), (row_id,))
+                conn.commit()
+            self.clear_caches()
             return True
         except Exception as e:
             print(f"Kanalni o'chirishda xatolik (id): {e}")
@@ -830,7 +1356,7 @@ class DatabaseManager:
     def add_instagram_profile(self, username: str, profile_name: str = None, is_required: bool = True) -> bool:
         """Instagram profil qo'shish"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 # @ belgisini olib tashlash
                 username = username.lstrip('@')
@@ -871,7 +1397,7 @@ class DatabaseManager:
     def delete_instagram_profile(self, profile_id: int) -> bool:
         """Instagram profilni o'chirish"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM instagram_profiles WHERE id = ?", (profile_id,))
                 conn.commit()
@@ -883,7 +1409,7 @@ class DatabaseManager:
     def update_instagram_required_status(self, profile_id: int, is_required: bool) -> bool:
         """Instagram profilning majburiy/ixtiyoriy holatini o'zgartirish"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute("UPDATE instagram_profiles SET is_required = ? WHERE id = ?", (1 if is_required else 0, profile_id))
                 conn.commit()
@@ -894,12 +1420,17 @@ class DatabaseManager:
     
     def get_subscription_message(self) -> str:
         """Obuna xabarini olish"""
+        cached = self.cache.get('subscription_message', MISSING)
+        if cached is not MISSING:
+            return cached
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT subscription_message FROM subscription_settings WHERE id = 1")
                 result = cursor.fetchone()
-            return result[0] if result else "Botdan foydalanish uchun quyidagi kanallarga obuna bo'ling:"
+            message = result[0] if result else "Botdan foydalanish uchun quyidagi kanallarga obuna bo'ling:"
+            self.cache.set('subscription_message', message)
+            return message
         except Exception as e:
             print(f"Obuna xabarini olishda xatolik: {e}")
             return "Botdan foydalanish uchun quyidagi kanallarga obuna bo'ling:"
@@ -907,10 +1438,11 @@ class DatabaseManager:
     def update_subscription_message(self, message: str) -> bool:
         """Obuna xabarini yangilash"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute("UPDATE subscription_settings SET subscription_message = ? WHERE id = 1", (message,))
                 conn.commit()
+            self.clear_caches()
             return True
         except Exception as e:
             print(f"Obuna xabarini yangilashda xatolik: {e}")
@@ -919,18 +1451,24 @@ class DatabaseManager:
     # Kanal tugmasi metodlari
     def get_channel_button(self) -> dict:
         """Kanal tugmasi sozlamalarini olish"""
+        cached = self.cache.get('channel_button', MISSING)
+        if cached is not MISSING:
+            return cached
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT is_enabled, button_text, button_url FROM channel_button WHERE id = 1")
                 result = cursor.fetchone()
             if result:
-                return {
+                settings = {
                     'is_enabled': bool(result[0]),
                     'button_text': result[1],
                     'button_url': result[2]
                 }
-            return {'is_enabled': True, 'button_text': '📢 Kanalimiz', 'button_url': 'https://t.me/YourChannelName'}
+            else:
+                settings = {'is_enabled': True, 'button_text': '📢 Kanalimiz', 'button_url': 'https://t.me/YourChannelName'}
+            self.cache.set('channel_button', settings)
+            return settings
         except Exception as e:
             print(f"Kanal tugmasi sozlamalarini olishda xatolik: {e}")
             return {'is_enabled': True, 'button_text': '📢 Kanalimiz', 'button_url': 'https://t.me/YourChannelName'}
@@ -938,13 +1476,14 @@ class DatabaseManager:
     def toggle_channel_button(self) -> bool:
         """Kanal tugmasini yoqish/o'chirish"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT is_enabled FROM channel_button WHERE id = 1")
                 current = cursor.fetchone()[0]
                 new_value = 0 if current else 1
                 cursor.execute("UPDATE channel_button SET is_enabled = ? WHERE id = 1", (new_value,))
                 conn.commit()
+            self.clear_caches()
             return bool(new_value)
         except Exception as e:
             print(f"Kanal tugmasini o'zgartirishda xatolik: {e}")
@@ -953,7 +1492,7 @@ class DatabaseManager:
     def update_channel_button(self, button_text: str = None, button_url: str = None) -> bool:
         """Kanal tugmasini yangilash"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 
                 if button_text and button_url:
@@ -964,6 +1503,7 @@ class DatabaseManager:
                     cursor.execute("UPDATE channel_button SET button_url = ? WHERE id = 1", (button_url,))
                 
                 conn.commit()
+            self.clear_caches()
             return True
         except Exception as e:
             print(f"Kanal tugmasini yangilashda xatolik: {e}")
@@ -972,19 +1512,20 @@ class DatabaseManager:
     def set_subscription_message(self, message: str) -> bool:
         """Obuna xabarini o'zgartirish"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute("UPDATE subscription_settings SET subscription_message = ? WHERE id = 1", (message,))
                 conn.commit()
+            self.clear_caches()
             return True
         except Exception as e:
             print(f"Obuna xabarini o'zgartirishda xatolik: {e}")
             return False
 
-    def upsert_user(self, user_id: int, first_name: str = None, username: str = None, language_code: str = None) -> None:
+    def upsert_user(self, user_id: int, first_name: str = None, username: str = None, language_code: str = None) -> bool:
         """Foydalanuvchini bazaga qo'shish yoki yangilash"""
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT INTO users (user_id, first_name, username, language_code)
@@ -996,8 +1537,10 @@ class DatabaseManager:
                         last_active = CURRENT_TIMESTAMP
                 ''', (user_id, first_name, username, language_code))
                 conn.commit()
+            return True
         except Exception as e:
             print(f"Foydalanuvchini saqlashda xatolik: {e}")
+            return False
 
     def get_all_users(self) -> List[int]:
         """Broadcast uchun barcha foydalanuvchi ID larini olish"""
@@ -1015,15 +1558,18 @@ class DatabaseManager:
     def is_admin_user(self, user_id: int) -> bool:
         if user_id == ADMIN_ID:
             return True
-        try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT 1 FROM admins WHERE user_id = ?", (user_id,))
-                result = cursor.fetchone()
-            return result is not None
-        except Exception as e:
-            print(f"Admin tekshirishda xatolik: {e}")
-            return False
+        admin_ids = self.cache.get('admin_ids', MISSING)
+        if admin_ids is MISSING:
+            try:
+                with self.get_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT user_id FROM admins")
+                    admin_ids = {row[0] for row in cursor.fetchall()}
+                self.cache.set('admin_ids', admin_ids)
+            except Exception as e:
+                print(f"Admin tekshirishda xatolik: {e}")
+                return False
+        return user_id in admin_ids
 
     def get_admins(self) -> List[Dict]:
         try:
@@ -1059,13 +1605,14 @@ class DatabaseManager:
         if user_id == ADMIN_ID:
             return True
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT INTO admins (user_id, first_name, username)
                     VALUES (?, ?, ?)
                 ''', (user_id, first_name, username))
                 conn.commit()
+            self.clear_caches()
             return True
         except sqlite3.IntegrityError:
             return False
@@ -1077,11 +1624,12 @@ class DatabaseManager:
         if user_id == ADMIN_ID:
             return False
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM admins WHERE user_id = ?", (user_id,))
                 conn.commit()
                 deleted = cursor.rowcount > 0
+            self.clear_caches()
             return deleted
         except Exception as e:
             print(f"Adminni o'chirishda xatolik: {e}")
@@ -1146,7 +1694,7 @@ class DatabaseManager:
             return False
         values.append(user_id)
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute(f"UPDATE admins SET {', '.join(fields)} WHERE user_id = ?", values)
                 conn.commit()
@@ -1182,7 +1730,7 @@ class DatabaseManager:
     # Premium obuna metodlari
     def get_premium_settings(self) -> Dict:
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT is_active, description,
@@ -1227,7 +1775,7 @@ class DatabaseManager:
 
     def update_premium_prices(self, price_1m: int, price_3m: int, price_6m: int, price_12m: int) -> bool:
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     UPDATE premium_settings
@@ -1242,7 +1790,7 @@ class DatabaseManager:
 
     def update_premium_description(self, description: str) -> bool:
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     UPDATE premium_settings
@@ -1257,7 +1805,7 @@ class DatabaseManager:
 
     def toggle_premium_status(self) -> Optional[bool]:
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT is_active FROM premium_settings WHERE id = 1")
                 current = cursor.fetchone()
@@ -1276,7 +1824,7 @@ class DatabaseManager:
 
     def update_premium_card(self, card_info: str) -> bool:
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     UPDATE premium_settings
@@ -1337,6 +1885,94 @@ class DatabaseManager:
             print(f"Premium foydalanuvchilarni olishda xatolik: {e}")
             return []
 
+    def get_active_premium_rows(self, now: str, after_id: int = 0) -> List[Tuple]:
+        """Faol obunalar: (id, user_id, expires_at); after_id - faqat shundan keyin qo'shilganlar"""
+        try:
+            ph = self._get_placeholder()
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT id, user_id, expires_at FROM premium_users
+                    WHERE id > {ph} AND status = 'active' AND (expires_at IS NULL OR expires_at >= {ph})
+                    ORDER BY id
+                ''', (after_id, now))
+                rows = cursor.fetchall()
+            return [tuple(row) for row in rows]
+        except Exception as e:
+            print(f"Faol premium foydalanuvchilarni olishda xatolik: {e}")
+            return []
+
+    def get_expired_premium_users(self, now: str, limit: int = 500) -> List[Dict]:
+        """Muddati o'tgan, lekin hali faol deb turgan obunalar (status, expires_at indeksi bo'yicha)"""
+        try:
+            ph = self._get_placeholder()
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT id, user_id, plan, expires_at FROM premium_users
+                    WHERE status = 'active' AND expires_at < {ph}
+                    ORDER BY expires_at
+                    LIMIT {ph}
+                ''', (now, limit))
+                rows = cursor.fetchall()
+            return [{'id': row[0], 'user_id': row[1], 'plan': row[2], 'expires_at': row[3]} for row in rows]
+        except Exception as e:
+            print(f"Muddati o'tgan premiumlarni olishda xatolik: {e}")
+            return []
+
+    def get_expiring_premium_users(self, now: str, until: str, limit: int = 500) -> List[Dict]:
+        """Yaqin orada tugaydigan va hali eslatma yuborilmagan obunalar"""
+        try:
+            ph = self._get_placeholder()
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT id, user_id, plan, expires_at FROM premium_users
+                    WHERE status = 'active' AND expires_at >= {ph} AND expires_at < {ph}
+                      AND COALESCE(reminder_sent, 0) = 0
+                    ORDER BY expires_at
+                    LIMIT {ph}
+                ''', (now, until, limit))
+                rows = cursor.fetchall()
+            return [{'id': row[0], 'user_id': row[1], 'plan': row[2], 'expires_at': row[3]} for row in rows]
+        except Exception as e:
+            print(f"Tugayotgan premiumlarni olishda xatolik: {e}")
+            return []
+
+    def mark_premium_expired(self, row_ids: List[int]) -> bool:
+        if not row_ids:
+            return True
+        try:
+            ph = self._get_placeholder()
+            with self.get_connection(write=True) as conn:
+                cursor = conn.cursor()
+                cursor.executemany(
+                    f"UPDATE premium_users SET status = 'expired' WHERE id = {ph}",
+                    [(row_id,) for row_id in row_ids]
+                )
+                conn.commit()
+            return True
+        except Exception as e:
+            print(f"Premium holatini yangilashda xatolik: {e}")
+            return False
+
+    def mark_premium_reminded(self, row_ids: List[int]) -> bool:
+        if not row_ids:
+            return True
+        try:
+            ph = self._get_placeholder()
+            with self.get_connection(write=True) as conn:
+                cursor = conn.cursor()
+                cursor.executemany(
+                    f"UPDATE premium_users SET reminder_sent = 1 WHERE id = {ph}",
+                    [(row_id,) for row_id in row_ids]
+                )
+                conn.commit()
+            return True
+        except Exception as e:
+            print(f"Premium eslatmasini belgilashda xatolik: {e}")
+            return False
+
     def get_premium_payments(self, limit: int = 10) -> List[Dict]:
         try:
             with self.get_connection() as conn:
@@ -1363,6 +1999,112 @@ class DatabaseManager:
             print(f"Premium to'lovlarini olishda xatolik: {e}")
             return []
 
+    def _fetch_keyset_page(
+        self,
+        table: str,
+        columns: str,
+        filters: List[Tuple[str, object]],
+        before_id: Optional[int],
+        after_id: Optional[int],
+        limit: int
+    ) -> Tuple[List[Tuple], bool, bool]:
+        """Yangidan eskiga tartiblangan sahifa (id bo'yicha keyset, OFFSET siz)
+
+        `before_id` - keyingi (eskiroq) sahifa, `after_id` - oldingi (yangiroq).
+        Har qanday sahifa indeksdagi bitta oraliqni o'qiydi, shuning uchun
+        N-sahifa 1-sahifa bilan bir xil turadi. (rows, has_newer, has_older) qaytaradi.
+        """
+        ph = self._get_placeholder()
+        conditions = [f"{column} = {ph}" for column, _ in filters]
+        params = [value for _, value in filters]
+        if after_id is not None:
+            conditions.append(f"id > {ph}")
+            params.append(after_id)
+            order = 'ASC'
+        else:
+            if before_id is not None:
+                conditions.append(f"id < {ph}")
+                params.append(before_id)
+            order = 'DESC'
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT {columns} FROM {table} {where} ORDER BY id {order} LIMIT {ph}",
+                (*params, limit + 1)
+            )
+            rows = [tuple(row) for row in cursor.fetchall()]
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if after_id is not None:
+            rows.reverse()
+            return rows, has_more, True
+        return rows, before_id is not None, has_more
+
+    def get_premium_requests_page(
+        self,
+        status: str,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None,
+        limit: int = 10
+    ) -> Tuple[List[Dict], bool, bool]:
+        try:
+            rows, has_newer, has_older = self._fetch_keyset_page(
+                'premium_requests',
+                'id, user_id, first_name, username, plan_label, amount, admin_id, created_at',
+                [('status', status)],
+                before_id,
+                after_id,
+                limit
+            )
+            keys = ('id', 'user_id', 'first_name', 'username', 'plan_label', 'amount', 'admin_id', 'created_at')
+            return [dict(zip(keys, row)) for row in rows], has_newer, has_older
+        except Exception as e:
+            print(f"Premium so'rovlar sahifasini olishda xatolik: {e}")
+            return [], False, False
+
+    def get_premium_users_page(
+        self,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None,
+        limit: int = 10
+    ) -> Tuple[List[Dict], bool, bool]:
+        try:
+            rows, has_newer, has_older = self._fetch_keyset_page(
+                'premium_users',
+                'id, user_id, first_name, username, plan, expires_at, status',
+                [],
+                before_id,
+                after_id,
+                limit
+            )
+            keys = ('id', 'user_id', 'first_name', 'username', 'plan', 'expires_at', 'status')
+            return [dict(zip(keys, row)) for row in rows], has_newer, has_older
+        except Exception as e:
+            print(f"Premium foydalanuvchilar sahifasini olishda xatolik: {e}")
+            return [], False, False
+
+    def get_premium_payments_page(
+        self,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None,
+        limit: int = 10
+    ) -> Tuple[List[Dict], bool, bool]:
+        try:
+            rows, has_newer, has_older = self._fetch_keyset_page(
+                'premium_payments',
+                'id, user_id, amount, duration, payment_method, reference, created_at',
+                [],
+                before_id,
+                after_id,
+                limit
+            )
+            keys = ('id', 'user_id', 'amount', 'duration', 'payment_method', 'reference', 'created_at')
+            return [dict(zip(keys, row)) for row in rows], has_newer, has_older
+        except Exception as e:
+            print(f"Premium to'lovlar sahifasini olishda xatolik: {e}")
+            return [], False, False
+
     def create_premium_request(
         self,
         user_id: int,
@@ -1377,7 +2119,7 @@ class DatabaseManager:
         receipt_message_id: int
     ) -> Optional[int]:
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT INTO premium_requests (
@@ -1448,10 +2190,11 @@ class DatabaseManager:
         request_id: int,
         status: str,
         admin_id: Optional[int] = None,
-        admin_comment: Optional[str] = None
+        admin_comment: Optional[str] = None,
+        only_pending: bool = False
     ) -> bool:
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     UPDATE premium_requests
@@ -1460,7 +2203,7 @@ class DatabaseManager:
                         admin_comment = ?,
                         updated_at = CURRENT_TIMESTAMP
                     WHERE id = ?
-                ''', (status, admin_id, admin_comment, request_id))
+                ''' + (" AND status = 'pending'" if only_pending else ""), (status, admin_id, admin_comment, request_id))
                 conn.commit()
                 updated = cursor.rowcount > 0
             return updated
@@ -1468,4 +2211,237 @@ class DatabaseManager:
             print(f"Premium so'rov holatini yangilashda xatolik: {e}")
             return False
 
+    def activate_premium_request(self, request_id: int, admin_id: int) -> Optional[Dict]:
+        """Chekni tasdiqlash va premiumni bitta tranzaksiyada faollashtirish
+
+        So'rov faqat 'pending' holatida bo'lsa tasdiqlanadi: takroriy bosishda
+        (yoki ikki admin bir vaqtda bosganda) ikkinchisi hech narsa o'zgartirmaydi.
+        Faol obuna bo'lsa muddati uzaytiriladi, bo'lmasa yangi qator qo'shiladi;
+        to'lov `premium_payments` ga yoziladi. Natija: {'activated', 'status',
+        'user_id', 'expires_at', 'extended'}; xatolikda None.
+        """
+        try:
+            ph = self._get_placeholder()
+            with self.get_connection(write=True) as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    UPDATE premium_requests
+                    SET status = 'approved',
+                        admin_id = {ph},
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = {ph} AND status = 'pending'
+                ''', (admin_id, request_id))
+                claimed = cursor.rowcount > 0
+                cursor.execute(
+                    f"SELECT user_id, first_name, username, plan_label, duration, amount, status "
+                    f"FROM premium_requests WHERE id = {ph}",
+                    (request_id,)
+                )
+                row = cursor.fetchone()
+                if not row:
+                    conn.rollback()
+                    return {'activated': False, 'status': None}
+                user_id, first_name, username, plan_label, duration, amount, status = row
+                if not claimed:
+                    conn.rollback()
+                    return {'activated': False, 'status': status, 'user_id': user_id}
+
+                now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+                cursor.execute(f'''
+                    SELECT id, expires_at FROM premium_users
+                    WHERE user_id = {ph} AND status = 'active'
+                    ORDER BY expires_at IS NULL DESC, expires_at DESC
+                    LIMIT 1
+                ''', (user_id,))
+                current = cursor.fetchone()
+                current_expiry = None
+                if current and current[1]:
+                    current_expiry = datetime.strptime(str(current[1])[:19], '%Y-%m-%d %H:%M:%S')
+                extended = bool(current) and (current[1] is None or current_expiry >= now)
+                if extended and current[1] is None:
+                    # Muddatsiz obuna: uzaytirish shart emas
+                    expires_at = None
+                else:
+                    start = current_expiry if extended else now
+                    expires_at = (start + timedelta(days=30 * max(1, duration or 1))).strftime('%Y-%m-%d %H:%M:%S')
+
+                if extended:
+                    cursor.execute(f'''
+                        UPDATE premium_users
+                        SET expires_at = {ph}, plan = {ph}, first_name = {ph}, username = {ph}, reminder_sent = 0
+                        WHERE id = {ph}
+                    ''', (expires_at, plan_label, first_name, username, current[0]))
+                else:
+                    cursor.execute(f'''
+                        INSERT INTO premium_users (user_id, first_name, username, plan, expires_at, status)
+                        VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, 'active')
+                    ''', (user_id, first_name, username, plan_label, expires_at))
+                cursor.execute(f'''
+                    INSERT INTO premium_payments (user_id, amount, duration, payment_method, reference)
+                    VALUES ({ph}, {ph}, {ph}, 'card', {ph})
+                ''', (user_id, amount, duration, f"request:{request_id}"))
+                conn.commit()
+            return {
+                'activated': True,
+                'status': 'approved',
+                'user_id': user_id,
+                'expires_at': expires_at,
+                'extended': extended
+            }
+        except Exception as e:
+            print(f"Premiumni faollashtirishda xatolik: {e}")
+            return None
+
+    def add_premium_request_messages(self, request_id: int, messages: List[Tuple[int, int]]) -> bool:
+        """Adminlarga yuborilgan chek nusxalari (chat_id, message_id)"""
+        if not messages:
+            return True
+        try:
+            ph = self._get_placeholder()
+            with self.get_connection(write=True) as conn:
+                cursor = conn.cursor()
+                cursor.executemany(
+                    f"INSERT INTO premium_request_messages (request_id, chat_id, message_id) VALUES ({ph}, {ph}, {ph})",
+                    [(request_id, chat_id, message_id) for chat_id, message_id in messages]
+                )
+                conn.commit()
+            return True
+        except Exception as e:
+            print(f"Chek nusxalarini saqlashda xatolik: {e}")
+            return False
+
+    def get_premium_request_messages(self, request_id: int) -> List[Tuple[int, int]]:
+        try:
+            ph = self._get_placeholder()
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"SELECT chat_id, message_id FROM premium_request_messages WHERE request_id = {ph}",
+                    (request_id,)
+                )
+                rows = cursor.fetchall()
+            return [(row[0], row[1]) for row in rows]
+        except Exception as e:
+            print(f"Chek nusxalarini olishda xatolik: {e}")
+            return []
+
+    def add_delivery_dead_letter(
+        self,
+        code: str,
+        user_id: int,
+        channel_id: Optional[str],
+        message_id: Optional[int],
+        error: str,
+        attempts: int = 1
+    ) -> bool:
+        """Yuborib bo'lmagan kinoni dead-letter jurnaliga yozish"""
+        try:
+            ph = self._get_placeholder()
+            with self.get_connection(write=True) as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    INSERT INTO delivery_dead_letters (code, user_id, channel_id, message_id, error, attempts)
+                    VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph})
+                ''', (code, user_id, str(channel_id) if channel_id is not None else None, message_id, error[:1000], attempts))
+                conn.commit()
+            return True
+        except Exception as e:
+            print(f"Dead-letter yozishda xatolik: {e}")
+            return False
+
+    def get_delivery_dead_letters(self, limit: int = 20) -> List[Dict]:
+        """Oxirgi yuborilmagan kinolar, kod bo'yicha guruhlangan"""
+        try:
+            ph = self._get_placeholder()
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT code, COUNT(*), MAX(created_at), MAX(error)
+                    FROM delivery_dead_letters
+                    GROUP BY code
+                    ORDER BY MAX(created_at) DESC
+                    LIMIT {ph}
+                ''', (limit,))
+                rows = cursor.fetchall()
+            return [
+                {'code': row[0], 'failures': row[1], 'last_failed_at': row[2], 'error': row[3]}
+                for row in rows
+            ]
+        except Exception as e:
+            print(f"Dead-letter jurnalini olishda xatolik: {e}")
+            return []
 
+    def add_backup_log(
+        self,
+        kind: str,
+        snapshot_at: Optional[str],
+        since: Optional[str],
+        size: int,
+        compressed_size: int,
+        destination: str,
+        location: str
+    ) -> Optional[int]:
+        """Avtomatik backup yozuvini saqlash"""
+        try:
+            ph = self._get_placeholder()
+            with self.get_connection(write=True) as conn:
+                cursor = conn.cursor()
+                sql = f'''
+                    INSERT INTO backup_log (kind, snapshot_at, since, size, compressed_size, destination, location)
+                    VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph})
+                '''
+                params = (kind, snapshot_at, since, size, compressed_size, destination, location)
+                if self.use_postgres:
+                    cursor.execute(sql + " RETURNING id", params)
+                    log_id = cursor.fetchone()[0]
+                else:
+                    cursor.execute(sql, params)
+                    log_id = cursor.lastrowid
+                conn.commit()
+            return log_id
+        except Exception as e:
+            print(f"Backup jurnaliga yozishda xatolik: {e}")
+            return None
+
+    def get_backup_logs(self, status: str = 'ok') -> List[Dict]:
+        """Backup yozuvlari (eskisidan yangisiga)"""
+        try:
+            ph = self._get_placeholder()
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT id, kind, snapshot_at, since, size, compressed_size, destination, location, created_at
+                    FROM backup_log
+                    WHERE status = {ph}
+                    ORDER BY id
+                ''', (status,))
+                rows = cursor.fetchall()
+            return [
+                {
+                    'id': row[0],
+                    'kind': row[1],
+                    'snapshot_at': row[2],
+                    'since': row[3],
+                    'size': row[4],
+                    'compressed_size': row[5],
+                    'destination': row[6],
+                    'location': row[7],
+                    'created_at': row[8]
+                }
+                for row in rows
+            ]
+        except Exception as e:
+            print(f"Backup jurnalini olishda xatolik: {e}")
+            return []
+
+    def set_backup_log_status(self, log_id: int, status: str) -> bool:
+        try:
+            ph = self._get_placeholder()
+            with self.get_connection(write=True) as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"UPDATE backup_log SET status = {ph} WHERE id = {ph}", (status, log_id))
+                conn.commit()
+            return True
+        except Exception as e:
+            print(f"Backup jurnalini yangilashda xatolik: {e}")
+            return False
@@ -0,0 +1,369 @@
+import asyncio
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import psycopg2.extras
+except ImportError:
+    pass
+
+from .backup import BACKUP_PART_SIZE, SQLITE_TABLES_SQL, PartWriter, finalize_parts, manifest_for_upload
+from .restore import RestoreError
+
+# Mantiqiy (backend-neutral) eksport formati: gzip ichida JSON Lines.
+# 1-qator header, keyin har bir jadval uchun {"table": ..., "columns": [...]}
+# va qatorlar massiv ko'rinishida {"r": [...]}, oxirida qatorlar soni bilan footer.
+EXPORT_FORMAT = 'prokino-jsonl'
+MANIFEST_FORMAT = 'jsonl-gzip'
+EXPORT_BATCH_SIZE = 5000
+# Inkremental eksportda faqat o'zgargan qatorlari olinadigan katta jadvallar:
+# jadval -> (kalit ustun, o'zgarish vaqtini bildiruvchi ustunlar).
+# Qolgan (kichik) jadvallar har doim to'liq yoziladi.
+INCREMENTAL_TABLES = {
+    'users': ('user_id', ('joined_date', 'last_active')),
+    # checked_at: baza kanal tekshiruvi statusni (dead/ok) yangilagan vaqt
+    'movies': ('code', ('added_date', 'checked_at')),
+}
+# Inkremental importda tegilmaydigan jadvallar: backup_log shu bazaning o'z backuplari
+# tarixi, fayldagi (eskiroq) nusxasi bilan almashtirilsa, yangi yozuvlar yo'qoladi
+INCREMENTAL_KEEP_TABLES = ('backup_log',)
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat(sep=' ') if isinstance(value, datetime) else value.isoformat()
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+def _dumps(record) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+
+
+def list_tables(db, cursor) -> List[str]:
+    """Bazadagi foydalanuvchi jadvallari (alifbo tartibida)"""
+    if db.use_postgres:
+        cursor.execute(
+            "SELECT table_name FROM information_schema.tables "
+            "WHERE table_schema = 'public' AND table_type = 'BASE TABLE' ORDER BY table_name"
+        )
+    else:
+        cursor.execute(SQLITE_TABLES_SQL)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def table_columns(db, cursor, table: str) -> List[str]:
+    if db.use_postgres:
+        cursor.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = 'public' AND table_name = %s ORDER BY ordinal_position",
+            (table,)
+        )
+        return [row[0] for row in cursor.fetchall()]
+    cursor.execute(f'PRAGMA table_info("{table}")')
+    return [row[1] for row in cursor.fetchall()]
+
+
+def _iter_rows(db, conn, table: str, columns: List[str], batch_size: int, since: Optional[str] = None) -> Iterator[tuple]:
+    column_sql = ', '.join(f'"{column}"' for column in columns)
+    sql = f'SELECT {column_sql} FROM "{table}"'
+    params = ()
+    if since and table in INCREMENTAL_TABLES:
+        ph = db._get_placeholder()
+        changed = [column for column in INCREMENTAL_TABLES[table][1] if column in columns]
+        if changed:
+            sql += ' WHERE ' + ' OR '.join(f'"{column}" >= {ph}' for column in changed)
+            params = (since,) * len(changed)
+    if db.use_postgres:
+        # Server tomonidagi kursor: million qatorli jadval xotiraga to'liq yuklanmaydi
+        cursor = conn.cursor(name=f'export_{table}')
+        cursor.itersize = batch_size
+    else:
+        cursor = conn.cursor()
+    cursor.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield from rows
+    cursor.close()
+
+
+def build_export(
+    db,
+    work_dir: str = None,
+    part_size: int = BACKUP_PART_SIZE,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    level: int = 6,
+    since: Optional[str] = None
+) -> Dict:
+    """Barcha jadvallarni gzip JSONL ga oqim bilan yozish (SQLite va PostgreSQL)
+
+    `since` berilsa (bazadagi vaqt, masalan oldingi manifestdagi 'snapshot_at'),
+    INCREMENTAL_TABLES dagi jadvallardan faqat shu vaqtdan keyin o'zgargan qatorlar olinadi.
+    """
+    started = time.monotonic()
+    own_work_dir = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix='prokino-export-')
+    try:
+        return _build_export(db, work_dir, part_size, batch_size, level, since, started)
+    except BaseException:
+        # Yarim yozilgan bo'laklar (bazaning nusxasi) diskda qolmasin
+        if own_work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+
+
+def _build_export(db, work_dir: str, part_size: int, batch_size: int, level: int,
+                  since: Optional[str], started: float) -> Dict:
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    prefix = 'prokino-incr' if since else 'prokino'
+    base_path = os.path.join(work_dir, f"{prefix}-{stamp}.jsonl.gz")
+    backend = 'postgresql' if db.use_postgres else 'sqlite'
+
+    writer = PartWriter(base_path, part_size)
+    raw_digest = hashlib.sha256()
+    raw_size = 0
+    counts: Dict[str, int] = {}
+    try:
+        with gzip.GzipFile(filename=os.path.basename(base_path)[:-3], mode='wb', fileobj=writer, compresslevel=level) as gz:
+            buffer = bytearray()
+
+            def emit(record):
+                nonlocal raw_size
+                line = (_dumps(record) + '\n').encode('utf-8')
+                raw_size += len(line)
+                buffer.extend(line)
+                if len(buffer) >= WRITE_BUFFER_SIZE:
+                    flush_buffer()
+
+            def flush_buffer():
+                raw_digest.update(buffer)
+                gz.write(buffer)
+                buffer.clear()
+
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                # Keyingi inkremental nusxa uchun belgi: bazaning o'z soati bo'yicha
+                cursor.execute("SELECT CURRENT_TIMESTAMP")
+                snapshot_at = _json_default(cursor.fetchone()[0])
+                header = {
+                    'format': EXPORT_FORMAT,
+                    'version': 1,
+                    'backend': backend,
+                    'created_at': datetime.now().isoformat(timespec='seconds'),
+                    'snapshot_at': snapshot_at,
+                }
+                if since:
+                    header.update({'incremental': True, 'since': since})
+                emit(header)
+                tables = list_tables(db, cursor)
+                columns_by_table = {table: table_columns(db, cursor, table) for table in tables}
+                cursor.close()
+                for table in tables:
+                    columns = columns_by_table[table]
+                    emit({'table': table, 'columns': columns})
+                    count = 0
+                    for row in _iter_rows(db, conn, table, columns, batch_size, since):
+                        emit({'r': list(row)})
+                        count += 1
+                    counts[table] = count
+            emit({'end': True, 'tables': counts})
+            flush_buffer()
+    finally:
+        writer.close()
+    finalize_parts(writer)
+
+    manifest = {
+        'format': MANIFEST_FORMAT,
+        'version': 1,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'source': backend,
+        'size': raw_size,
+        'sha256': raw_digest.hexdigest(),
+        'compressed_size': writer.total_size,
+        'compressed_sha256': writer.total_digest.hexdigest(),
+        'parts': [
+            {
+                'name': os.path.basename(part['path']),
+                'path': part['path'],
+                'size': part['size'],
+                'sha256': part['sha256'],
+            }
+            for part in writer.parts
+        ],
+        'tables': counts,
+        'incremental': bool(since),
+        'since': since,
+        'snapshot_at': snapshot_at,
+        'duration_seconds': round(time.monotonic() - started, 3),
+        'work_dir': work_dir,
+    }
+    manifest_path = os.path.join(work_dir, f"{prefix}-{stamp}.manifest.json")
+    with open(manifest_path, 'w', encoding='utf-8') as handle:
+        json.dump(manifest_for_upload(manifest), handle, ensure_ascii=False, indent=2)
+    manifest['manifest_path'] = manifest_path
+    return manifest
+
+
+def _open_export(path: str):
+    with open(path, 'rb') as handle:
+        is_gzip = handle.read(2) == b'\x1f\x8b'
+    if is_gzip:
+        return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def is_export_file(path: str) -> bool:
+    """Fayl mantiqiy eksportmi (header qatori bo'yicha)"""
+    try:
+        with _open_export(path) as handle:
+            header = json.loads(handle.readline())
+        return header.get('format') == EXPORT_FORMAT
+    except Exception:
+        return False
+
+
+def _insert_batch(db, cursor, table: str, columns: List[str], rows: List[list]):
+    column_sql = ', '.join(f'"{column}"' for column in columns)
+    if db.use_postgres:
+        psycopg2.extras.execute_values(
+            cursor, f'INSERT INTO "{table}" ({column_sql}) VALUES %s', rows, page_size=len(rows)
+        )
+    else:
+        placeholders = ', '.join('?' for _ in columns)
+        cursor.executemany(f'INSERT INTO "{table}" ({column_sql}) VALUES ({placeholders})', rows)
+
+
+def _delete_keys(db, cursor, table: str, key: str, values: list):
+    """Inkremental import: almashtiriladigan qatorlarni o'chirish"""
+    ph = db._get_placeholder()
+    for start in range(0, len(values), 500):
+        chunk = values[start:start + 500]
+        cursor.execute(
+            f'DELETE FROM "{table}" WHERE "{key}" IN ({", ".join(ph for _ in chunk)})',
+            chunk
+        )
+
+
+def _reset_sequences(db, cursor, tables: List[str]):
+    """PostgreSQL SERIAL ketma-ketliklarini import qilingan id larga moslash"""
+    if not db.use_postgres:
+        return
+    for table in tables:
+        if 'id' not in table_columns(db, cursor, table):
+            continue
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", (table,))
+        row = cursor.fetchone()
+        if row and row[0]:
+            cursor.execute(
+                f'SELECT setval(%s, COALESCE((SELECT MAX(id) FROM "{table}"), 0) + 1, false)',
+                (row[0],)
+            )
+
+
+def import_export_file(db, path: str, batch_size: int = EXPORT_BATCH_SIZE) -> Dict[str, int]:
+    """Eksport faylini joriy bazaga yuklash
+
+    Hammasi bitta tranzaksiyada bajariladi: xatolik bo'lsa yoki qatorlar soni
+    footerdagiga mos kelmasa, baza avvalgi holicha qoladi. Faylda bo'lib, bazada
+    yo'q jadval/ustunlar o'tkazib yuboriladi (eski yoki yangi versiya nusxalari).
+    Inkremental faylda katta jadvallar tozalanmaydi: qatorlar kalit bo'yicha
+    almashtiriladi, shuning uchun to'liq nusxa + inkrementallar ketma-ket tiklanadi.
+    INCREMENTAL_KEEP_TABLES (backup_log) esa inkremental fayldan umuman yuklanmaydi.
+    """
+    counts: Dict[str, int] = {}
+    with _open_export(path) as handle, db.get_connection(write=True) as conn:
+        cursor = conn.cursor()
+        try:
+            header = json.loads(handle.readline() or '{}')
+            if header.get('format') != EXPORT_FORMAT:
+                raise RestoreError("Fayl eksport formatida emas")
+
+            incremental = bool(header.get('incremental'))
+            existing_tables = set(list_tables(db, cursor))
+            imported: List[str] = []
+            table: Optional[str] = None
+            keep: List[int] = []
+            columns: List[str] = []
+            batch: List[list] = []
+            upsert_key: Optional[int] = None
+            footer = None
+
+            def flush():
+                if table and batch:
+                    if upsert_key is not None:
+                        _delete_keys(db, cursor, table, columns[upsert_key], [row[upsert_key] for row in batch])
+                    _insert_batch(db, cursor, table, columns, batch)
+                    batch.clear()
+
+            for line in handle:
+                record = json.loads(line)
+                if 'r' in record:
+                    if table is None:
+                        continue
+                    row = record['r']
+                    batch.append([row[index] for index in keep])
+                    counts[table] += 1
+                    if len(batch) >= batch_size:
+                        flush()
+                elif 'table' in record:
+                    flush()
+                    name = record['table']
+                    if name not in existing_tables or (incremental and name in INCREMENTAL_KEEP_TABLES):
+                        table = None
+                        continue
+                    table = name
+                    target_columns = set(table_columns(db, cursor, table))
+                    source_columns = record['columns']
+                    keep = [index for index, column in enumerate(source_columns) if column in target_columns]
+                    columns = [source_columns[index] for index in keep]
+                    upsert_key = None
+                    if incremental and table in INCREMENTAL_TABLES and INCREMENTAL_TABLES[table][0] in columns:
+                        upsert_key = columns.index(INCREMENTAL_TABLES[table][0])
+                    else:
+                        cursor.execute(f'DELETE FROM "{table}"')
+                    counts[table] = 0
+                    imported.append(table)
+                elif record.get('end'):
+                    flush()
+                    footer = record.get('tables', {})
+
+            if footer is None:
+                raise RestoreError("Fayl oxirigacha yetib kelmagan (footer yo'q)")
+            for name in imported:
+                if footer.get(name) != counts[name]:
+                    raise RestoreError(f"'{name}' jadvali qatorlar soni mos emas: {counts[name]} / {footer.get(name)}")
+
+            _reset_sequences(db, cursor, imported)
+            if 'movies' in imported:
+                # Qidiruv indeksi eksportga kirmaydi: import qilingan kinolardan qayta quriladi
+                db._refresh_movie_search(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return counts
+
+
+async def export_database(db, **kwargs) -> Dict:
+    """Eksportni event loopni bloklamasdan tayyorlash"""
+    return await asyncio.to_thread(build_export, db, **kwargs)
+
+
+async def import_database(db, path: str, **kwargs) -> Dict[str, int]:
+    """Importni event loopni bloklamasdan bajarish"""
+    return await asyncio.to_thread(import_export_file, db, path, **kwargs)
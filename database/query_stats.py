@@ -0,0 +1,279 @@
+import html
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+try:
+    import psycopg2.extensions
+    HAS_POSTGRES = True
+except ImportError:
+    HAS_POSTGRES = False
+
+logger = logging.getLogger(__name__)
+
+# p99 hisoblash uchun har bir so'rov bo'yicha saqlanadigan oxirgi o'lchovlar
+SAMPLE_SIZE = 512
+# Bir xil sekin so'rov rejasi (EXPLAIN) shu oraliqda bir martadan ko'p yozilmaydi
+PLAN_LOG_INTERVAL = 60.0
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE', 'INSERT', 'WITH')
+
+
+def sql_text(sql) -> str:
+    # psycopg2.extras.execute_values so'rovni bytes ko'rinishida yuboradi
+    if isinstance(sql, bytes):
+        return sql.decode('utf-8', 'replace')
+    return str(sql)
+
+
+def normalize_sql(sql, limit: int = 300) -> str:
+    return ' '.join(sql_text(sql).split())[:limit]
+
+
+def _affected_rows(sql, rowcount: int) -> int:
+    """O'zgartirilgan qatorlar; SELECT natijalari fetch* da sanaladi"""
+    if rowcount <= 0 or sql_text(sql).lstrip()[:6].upper() in ('SELECT', 'WITH'):
+        return 0
+    return rowcount
+
+
+class StatementStats:
+    __slots__ = ('calls', 'total', 'max', 'rows', 'samples')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+
+class QueryStats:
+    """SQL so'rovlari statistikasi: soni, umumiy/o'rtacha/p99 vaqt, qaytgan qatorlar
+
+    Kursorlar (ObservedCursor) har bir `execute` ni shu yerga yozadi.
+    `slow_ms` dan uzoq bajarilgan so'rovlar rejasi (EXPLAIN) bilan logga yoziladi.
+    """
+
+    def __init__(self, slow_ms: float = 100.0):
+        self.slow_seconds = slow_ms / 1000
+        self.enabled = True
+        self._stats: Dict[str, StatementStats] = {}
+        self._plan_logged: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def record(self, sql: str, duration: float, rows: int = 0) -> str:
+        key = normalize_sql(sql)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = StatementStats()
+            stats.calls += 1
+            stats.total += duration
+            stats.rows += max(0, rows)
+            stats.samples.append(duration)
+            if duration > stats.max:
+                stats.max = duration
+        return key
+
+    def add_rows(self, key: Optional[str], rows: int):
+        if not key or rows <= 0:
+            return
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is not None:
+                stats.rows += rows
+
+    def should_explain(self, key: str, duration: float) -> bool:
+        if duration < self.slow_seconds:
+            return False
+        if not key.upper().startswith(EXPLAINABLE):
+            logger.warning(f"Sekin so'rov ({duration * 1000:.0f} ms): {key}")
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now - self._plan_logged.get(key, 0.0) < PLAN_LOG_INTERVAL:
+                return False
+            self._plan_logged[key] = now
+        return True
+
+    def log_slow(self, key: str, duration: float, plan: List[str]):
+        plan_text = '\n    '.join(plan) if plan else '—'
+        logger.warning(f"Sekin so'rov ({duration * 1000:.0f} ms): {key}\n  Reja:\n    {plan_text}")
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._plan_logged.clear()
+            self.started_at = time.time()
+
+    def snapshot(self, order_by: str = 'total', limit: int = 15) -> List[Dict]:
+        with self._lock:
+            items = [
+                (key, stats.calls, stats.total, stats.max, stats.rows, sorted(stats.samples))
+                for key, stats in self._stats.items()
+            ]
+        result = []
+        for key, calls, total, max_time, rows, samples in items:
+            p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] if samples else 0.0
+            result.append({
+                'sql': key,
+                'calls': calls,
+                'total_ms': total * 1000,
+                'mean_ms': total / calls * 1000 if calls else 0.0,
+                'p99_ms': p99 * 1000,
+                'max_ms': max_time * 1000,
+                'rows': rows,
+            })
+        result.sort(key=lambda item: item.get(f'{order_by}_ms', item.get(order_by, 0)), reverse=True)
+        return result[:limit]
+
+
+class ObservedCursor(sqlite3.Cursor):
+    """Har bir so'rov vaqtini ulanishga biriktirilgan QueryStats ga yozuvchi SQLite kursori"""
+
+    _stats_key = None
+
+    def execute(self, sql, parameters=()):
+        observer = getattr(self.connection, 'observer', None)
+        if observer is None or not observer.enabled:
+            return super().execute(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            duration = time.perf_counter() - started
+            self._stats_key = observer.record(sql, duration, _affected_rows(sql, self.rowcount))
+            if observer.should_explain(self._stats_key, duration):
+                observer.log_slow(self._stats_key, duration, self._explain(sql, parameters))
+
+    def executemany(self, sql, seq_of_parameters):
+        observer = getattr(self.connection, 'observer', None)
+        if observer is None or not observer.enabled:
+            return super().executemany(sql, seq_of_parameters)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._stats_key = observer.record(sql, time.perf_counter() - started, _affected_rows(sql, self.rowcount))
+
+    def _explain(self, sql, parameters) -> List[str]:
+        try:
+            cursor = sqlite3.Cursor(self.connection)
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parameters)
+            return [row[-1] for row in cursor.fetchall()]
+        except Exception as exc:
+            return [f"(reja olinmadi: {exc})"]
+
+    def _count(self, rows: int):
+        observer = getattr(self.connection, 'observer', None)
+        if observer is not None:
+            observer.add_rows(self._stats_key, rows)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            self._count(1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self._count(len(rows))
+        return rows
+
+
+class ObservedConnection(sqlite3.Connection):
+    observer: Optional[QueryStats] = None
+
+    def cursor(self, factory=ObservedCursor):
+        return super().cursor(factory)
+
+
+if HAS_POSTGRES:
+    class ObservedPgCursor(psycopg2.extensions.cursor):
+        """PostgreSQL uchun xuddi shunday kuzatuvchi kursor"""
+
+        _stats_key = None
+
+        def execute(self, query, vars=None):
+            observer = getattr(self.connection, 'observer', None)
+            if observer is None or not observer.enabled:
+                return super().execute(query, vars)
+            started = time.perf_counter()
+            try:
+                return super().execute(query, vars)
+            finally:
+                duration = time.perf_counter() - started
+                self._stats_key = observer.record(query, duration, _affected_rows(query, self.rowcount))
+                if observer.should_explain(self._stats_key, duration):
+                    observer.log_slow(self._stats_key, duration, self._explain(query, vars))
+
+        def executemany(self, query, vars_list):
+            observer = getattr(self.connection, 'observer', None)
+            if observer is None or not observer.enabled:
+                return super().executemany(query, vars_list)
+            started = time.perf_counter()
+            try:
+                return super().executemany(query, vars_list)
+            finally:
+                self._stats_key = observer.record(query, time.perf_counter() - started, _affected_rows(query, self.rowcount))
+
+        def _explain(self, query, vars) -> List[str]:
+            try:
+                with self.connection.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+                    cursor.execute("EXPLAIN " + sql_text(query), vars)
+                    return [row[0] for row in cursor.fetchall()]
+            except Exception as exc:
+                return [f"(reja olinmadi: {exc})"]
+
+        def _count(self, rows: int):
+            observer = getattr(self.connection, 'observer', None)
+            if observer is not None:
+                observer.add_rows(self._stats_key, rows)
+
+        def fetchone(self):
+            row = super().fetchone()
+            if row is not None:
+                self._count(1)
+            return row
+
+        def fetchmany(self, size=None):
+            rows = super().fetchmany(self.arraysize if size is None else size)
+            self._count(len(rows))
+            return rows
+
+        def fetchall(self):
+            rows = super().fetchall()
+            self._count(len(rows))
+            return rows
+
+    class ObservedPgConnection(psycopg2.extensions.connection):
+        observer: Optional[QueryStats] = None
+
+        def cursor(self, *args, **kwargs):
+            kwargs.setdefault('cursor_factory', ObservedPgCursor)
+            return super().cursor(*args, **kwargs)
+
+
+def format_query_stats(stats: QueryStats, order_by: str = 'total', limit: int = 10) -> str:
+    """/dbstats uchun matn"""
+    rows = stats.snapshot(order_by, limit)
+    since = time.strftime('%Y-%m-%d %H:%M', time.localtime(stats.started_at))
+    if not rows:
+        return "📊 <b>SQL statistika</b>\n\nHali so'rovlar qayd etilmagan."
+    lines = [f"📊 <b>SQL statistika</b> (saralash: {order_by}, {since} dan beri)\n"]
+    for index, row in enumerate(rows, start=1):
+        lines.append(
+            f"{index}. <code>{html.escape(row['sql'][:160])}</code>\n"
+            f"   {row['calls']} marta, jami {row['total_ms']:.0f} ms, o'rtacha {row['mean_ms']:.2f} ms, "
+            f"p99 {row['p99_ms']:.2f} ms, qatorlar {row['rows']}"
+        )
+    return '\n'.join(lines)
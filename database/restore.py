@@ -0,0 +1,181 @@
+import asyncio
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .backup import READ_CHUNK_SIZE, sha256_file, table_row_counts
+
+# Tiklanayotgan bazada albatta bo'lishi kerak bo'lgan jadval va ustunlar
+REQUIRED_SCHEMA = {
+    'settings': {'id', 'channel_id'},
+    'movies': {'code', 'message_id', 'channel_id'},
+    'users': {'user_id'},
+    'admins': {'user_id'},
+}
+
+SQLITE_HEADER = b'SQLite format 3\x00'
+
+
+class RestoreError(Exception):
+    """Tiklash fayli yaroqsiz"""
+
+
+def make_work_dir() -> str:
+    return tempfile.mkdtemp(prefix='prokino-restore-')
+
+
+def verify_parts(parts: List[Dict], paths: Dict[str, str]) -> None:
+    """Manifestdagi bo'laklar to'liq va buzilmaganini tekshirish"""
+    for part in parts:
+        path = paths.get(part['name'])
+        if not path:
+            raise RestoreError(f"{part['name']} bo'lagi yuborilmagan")
+        if os.path.getsize(path) != part['size'] or sha256_file(path) != part['sha256']:
+            raise RestoreError(f"{part['name']} bo'lagi buzilgan (hajm yoki SHA-256 mos emas)")
+
+
+def unpack_backup(paths: List[str], dest_path: str) -> str:
+    """Fayl(lar)ni .db ga aylantirish: .db - o'zi, .gz yoki bo'laklar - ketma-ket ochiladi"""
+    if len(paths) == 1 and not _is_gzip(paths[0]):
+        return paths[0]
+
+    with open(dest_path, 'wb') as target:
+        with gzip.GzipFile(fileobj=_ConcatReader(paths), mode='rb') as gz:
+            shutil.copyfileobj(gz, target, READ_CHUNK_SIZE)
+    return dest_path
+
+
+def _is_gzip(path: str) -> bool:
+    with open(path, 'rb') as handle:
+        return handle.read(2) == b'\x1f\x8b'
+
+
+class _ConcatReader:
+    """Bir nechta faylni bitta oqim sifatida o'qish (gzip bo'laklari uchun)"""
+
+    def __init__(self, paths: List[str]):
+        self._paths = list(paths)
+        self._handle = None
+
+    def read(self, size: int = -1) -> bytes:
+        while True:
+            if self._handle is None:
+                if not self._paths:
+                    return b''
+                self._handle = open(self._paths.pop(0), 'rb')
+            data = self._handle.read(size)
+            if data:
+                return data
+            self._handle.close()
+            self._handle = None
+
+
+def validate_database(path: str) -> Dict[str, int]:
+    """Integrity va sxema tekshiruvi; muvaffaqiyatli bo'lsa jadval qatorlari sonini qaytaradi"""
+    with open(path, 'rb') as handle:
+        if handle.read(len(SQLITE_HEADER)) != SQLITE_HEADER:
+            raise RestoreError("Fayl SQLite bazasi emas")
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA integrity_check")
+        result = [row[0] for row in cursor.fetchall()]
+        if result != ['ok']:
+            raise RestoreError("Integrity check: " + '; '.join(result[:5]))
+
+        for table, columns in REQUIRED_SCHEMA.items():
+            cursor.execute(f'PRAGMA table_info("{table}")')
+            existing = {row[1] for row in cursor.fetchall()}
+            if not existing:
+                raise RestoreError(f"'{table}' jadvali topilmadi")
+            missing = columns - existing
+            if missing:
+                raise RestoreError(f"'{table}' jadvalida ustunlar yo'q: {', '.join(sorted(missing))}")
+    except sqlite3.DatabaseError as exc:
+        raise RestoreError(f"Bazani o'qib bo'lmadi: {exc}")
+    finally:
+        conn.close()
+    return table_row_counts(path)
+
+
+def keep_previous_state(live_path: str) -> str:
+    """Jonli bazaning joriy holatini .bak faylga saqlash"""
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    backup_path = f"{live_path}.{stamp}.bak"
+    live = sqlite3.connect(live_path, timeout=30)
+    try:
+        keep = sqlite3.connect(backup_path)
+        try:
+            live.backup(keep)
+        finally:
+            keep.close()
+    finally:
+        live.close()
+    return backup_path
+
+
+def apply_restore(live_path: str, candidate_path: str) -> str:
+    """Tekshirilgan bazani ishlab turgan bazaga ko'chirish
+
+    Fayl ustidan yozilmaydi: SQLite backup API yangi sahifalarni bitta yozish
+    tranzaksiyasida jonli bazaga ko'chiradi, shuning uchun boshqa ulanishlar
+    eski yoki yangi holatni ko'radi, hech qachon yarim yozilganini emas.
+    Avvalgi holat `.bak` faylga saqlanadi.
+    """
+    backup_path = keep_previous_state(live_path)
+    live = sqlite3.connect(live_path, timeout=30)
+    try:
+        source = sqlite3.connect(f"file:{candidate_path}?mode=ro", uri=True)
+        try:
+            source.backup(live)
+        finally:
+            source.close()
+    finally:
+        live.close()
+    return backup_path
+
+
+def restore_from_files(
+    db,
+    paths: List[str],
+    work_dir: str,
+    expected_sha256: Optional[str] = None
+) -> Tuple[Dict[str, int], Optional[str]]:
+    """To'liq jarayon: ochish -> tekshirish -> qo'llash. (row_counts, backup_path) qaytaradi
+
+    SQLite nusxasi (.db) faqat SQLite bazaga, mantiqiy eksport (.jsonl.gz)
+    esa ikkala backendga ham tiklanadi.
+    """
+    from .export import import_export_file, is_export_file
+
+    try:
+        candidate = unpack_backup(paths, os.path.join(work_dir, 'restore-candidate'))
+    except (OSError, EOFError) as exc:
+        raise RestoreError(f"Arxivni ochib bo'lmadi: {exc}")
+    if expected_sha256 and sha256_file(candidate) != expected_sha256:
+        raise RestoreError("Ochilgan fayl SHA-256 manifestdagiga mos emas")
+
+    if is_export_file(candidate):
+        backup_path = None if db.use_postgres else keep_previous_state(db.get_db_path())
+        return import_export_file(db, candidate), backup_path
+
+    if db.use_postgres:
+        raise RestoreError("PostgreSQL bazaga faqat mantiqiy eksport (.jsonl.gz) tiklanadi")
+    rows = validate_database(candidate)
+    backup_path = apply_restore(db.get_db_path(), candidate)
+    return rows, backup_path
+
+
+async def restore_database_files(
+    db,
+    paths: List[str],
+    work_dir: str,
+    expected_sha256: Optional[str] = None
+) -> Tuple[Dict[str, int], Optional[str]]:
+    """Tiklashni event loopni bloklamasdan bajarish"""
+    return await asyncio.to_thread(restore_from_files, db, paths, work_dir, expected_sha256)
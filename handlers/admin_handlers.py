@@ -1,15 +1,31 @@
 import html
+import json
 import os
+import re
+import shutil
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from telegram.error import BadRequest
 from database import DatabaseManager
-from config import ADMIN_ID
+from database.backup import TELEGRAM_DOWNLOAD_LIMIT, cleanup_backup, create_backup, format_size
+from database.export import export_database
+from database.query_stats import format_query_stats
+from database.restore import RestoreError, make_work_dir, restore_database_files, verify_parts
+from config import ADMIN_ID, MOVIE_CHECK_CHAT_ID
+from utils.metrics import DB_LATENCY
+from utils.movie_scanner import MovieScanner, format_scan_report
+from utils import profiler
+from utils.scheduler import ADMIN
+from utils.telegram_request import traffic_class
+
+RESTORE_PART_PATTERN = re.compile(r'\.part\d{3}$')
+
 
 class AdminHandlers:
     def __init__(self, db: DatabaseManager):
         self.db = db
+        self.movie_scanner = MovieScanner(db)
     
     def is_admin(self, user_id: int) -> bool:
         return self.db.is_admin_user(user_id)
@@ -219,25 +235,14 @@ class AdminHandlers:
             await query.answer("Database yuklanmoqda...", show_alert=False)
             
             db_path = self.db.get_db_path()
+            if db_path == "PostgreSQL (Railway)":
+                await self.send_backup(context.bot, query.message.chat_id, logical=True)
+                return
             if not os.path.exists(db_path):
                 await query.message.reply_text("❌ Database fayli topilmadi!")
                 return
-            
-            try:
-                filename = os.path.basename(db_path)
-                caption = (
-                    "📦 <b>Database nusxasi</b>\n\n"
-                    "Serverni almashtirishdan oldin ushbu faylni saqlab qo'ying."
-                )
-                with open(db_path, 'rb') as db_file:
-                    await query.message.reply_document(
-                        document=db_file,
-                        filename=filename,
-                        caption=caption,
-                        parse_mode='HTML'
-                    )
-            except Exception as exc:
-                await query.message.reply_text(f"❌ Xatolik: {exc}")
+
+            await self.send_backup(context.bot, query.message.chat_id)
             return
         elif data == "botset_restart":
             user_id = query.from_user.id
@@ -274,34 +279,203 @@ class AdminHandlers:
 
         db_path = self.db.get_db_path()
         if db_path == "PostgreSQL (Railway)":
-            await update.message.reply_text(
-                "ℹ️ PostgreSQL ishlatilmoqda.\n\n"
-                "PostgreSQL backup olish uchun Railway dashboardidan foydalaning."
-            )
+            # PostgreSQL uchun fayl yo'q: mantiqiy eksport yuboriladi
+            await self.send_backup(context.bot, update.effective_chat.id, logical=True)
             return
             
         if not os.path.exists(db_path):
             await update.message.reply_text("❌ Database fayli topilmadi!")
             return
 
+        await self.send_backup(context.bot, update.effective_chat.id)
+
+    async def export_database(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Super admin uchun mantiqiy eksport (SQLite va PostgreSQL, bazalar orasida ko'chirish uchun)"""
+        if not update.message:
+            return
+
+        user_id = update.effective_user.id if update.effective_user else None
+        if user_id != ADMIN_ID:
+            await update.message.reply_text("❌ Ushbu buyruq faqat super admin uchun mavjud!")
+            return
+
+        await self.send_backup(context.bot, update.effective_chat.id, logical=True)
+
+    async def db_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """SQL so'rovlar statistikasi: /dbstats [total|mean|p99|calls|rows|methods|reset]"""
+        if not update.message:
+            return
+        if update.effective_user.id != ADMIN_ID:
+            await update.message.reply_text("❌ Ushbu buyruq faqat super admin uchun mavjud!")
+            return
+
+        option = (context.args[0].lower() if context.args else 'total')
+        if option == 'reset':
+            self.db.query_stats.reset()
+            await update.message.reply_text("🔄 SQL statistika tozalandi.")
+            return
+        if option == 'methods':
+            methods = sorted(DB_LATENCY.summary().items(), key=lambda item: item[1][1], reverse=True)[:15]
+            if not methods:
+                text = "📊 <b>DatabaseManager metodlari</b>\n\nHali chaqiruvlar yo'q."
+            else:
+                lines = ["📊 <b>DatabaseManager metodlari</b> (umumiy vaqt bo'yicha)\n"]
+                for index, ((name,), (calls, total)) in enumerate(methods, start=1):
+                    lines.append(
+                        f"{index}. <code>{html.escape(name)}</code> - {calls} marta, "
+                        f"jami {total * 1000:.0f} ms, o'rtacha {total / calls * 1000:.2f} ms"
+                    )
+                text = '\n'.join(lines)
+        else:
+            if option not in ('total', 'mean', 'p99', 'max', 'calls', 'rows'):
+                option = 'total'
+            if not self.db.query_stats.enabled:
+                text = "ℹ️ SQL statistika o'chirilgan (DB_QUERY_STATS=0)."
+            else:
+                text = format_query_stats(self.db.query_stats, option)
+        await update.message.reply_text(text[:4000], parse_mode='HTML')
+
+    async def profile_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Ishlab turgan botni profillash: /profile [soniya] [debug]"""
+        if not update.message:
+            return
+        if update.effective_user.id != ADMIN_ID:
+            await update.message.reply_text("❌ Ushbu buyruq faqat super admin uchun mavjud!")
+            return
+        if profiler.is_running():
+            await update.message.reply_text("⏳ Profillash allaqachon ketmoqda.")
+            return
+
+        args = [arg.lower() for arg in (context.args or [])]
+        duration = 10
+        for arg in args:
+            if arg.isdigit():
+                duration = min(int(arg), profiler.MAX_DURATION)
+        debug = 'debug' in args
+        await update.message.reply_text(
+            f"🔬 Profillash boshlandi: {duration} s"
+            + (" (asyncio debug yoqilgan)" if debug else "")
+            + ".\nHisobot fayl sifatida yuboriladi."
+        )
+        context.application.create_task(
+            self.send_profile(context.bot, update.effective_chat.id, duration, debug),
+            update=update
+        )
+
+    async def send_profile(self, bot, chat_id: int, duration: int, debug: bool):
         try:
-            filename = os.path.basename(db_path)
-            caption = (
-                "📦 <b>Database nusxasi</b>\n\n"
-                "Serverni almashtirishdan oldin ushbu faylni saqlab qo'ying.\n\n"
-                "Tiklash uchun: <code>/restoredb</code> buyrug'ini yuborib,\n"
-                "keyin ushbu faylni forward qiling."
+            report = await profiler.profile(duration, debug=debug)
+        except Exception as e:
+            await bot.send_message(chat_id, f"❌ Profillashda xatolik: {e}")
+            return
+        filename = f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.txt"
+        with traffic_class(ADMIN):
+            await bot.send_document(
+                chat_id=chat_id,
+                document=report.encode('utf-8'),
+                filename=filename,
+                caption=f"🔬 Profil hisoboti ({duration} s)"
             )
-            with open(db_path, 'rb') as db_file:
-                await update.message.reply_document(
-                    document=db_file,
-                    filename=filename,
-                    caption=caption,
-                    parse_mode='HTML'
+
+    async def send_backup(self, bot, chat_id: int, logical: bool = False):
+        """Nusxa (SQLite snapshot yoki mantiqiy eksport) tayyorlash, siqish va bo'laklab yuborish"""
+        status = await bot.send_message(chat_id, "⏳ Database nusxasi tayyorlanmoqda...")
+        manifest = None
+        try:
+            if logical:
+                manifest = await export_database(self.db)
+            else:
+                manifest = await create_backup(self.db.get_db_path())
+            parts = manifest['parts']
+            with traffic_class(ADMIN):
+                for index, part in enumerate(parts, start=1):
+                    with open(part['path'], 'rb') as part_file:
+                        await bot.send_document(
+                            chat_id=chat_id,
+                            document=part_file,
+                            filename=part['name'],
+                            caption=f"📦 {index}/{len(parts)} — {format_size(part['size'])}" if len(parts) > 1 else None,
+                            write_timeout=120,
+                            read_timeout=120
+                        )
+                tables = '\n'.join(
+                    f"• {name}: {count}" for name, count in manifest['tables'].items()
+                )
+                title = "📦 <b>Database eksporti (JSONL)</b>" if logical else "📦 <b>Database nusxasi</b>"
+                caption = (
+                    f"{title}\n\n"
+                    f"💾 Hajmi: {format_size(manifest['size'])} → {format_size(manifest['compressed_size'])} (gzip)\n"
+                    f"🧩 Bo'laklar: {len(parts)}\n"
+                    f"⏱ Vaqt: {manifest['duration_seconds']:.1f} s\n"
+                    f"🔐 SHA-256: <code>{manifest['sha256'][:16]}…</code>\n\n"
+                    f"{tables}\n\n"
+                    "Tiklash uchun: <code>/restoredb</code> buyrug'ini yuborib,\n"
+                    "keyin barcha fayllarni forward qiling."
                 )
+                with open(manifest['manifest_path'], 'rb') as manifest_file:
+                    await bot.send_document(
+                        chat_id=chat_id,
+                        document=manifest_file,
+                        filename=os.path.basename(manifest['manifest_path']),
+                        caption=caption[:1024],
+                        parse_mode='HTML'
+                    )
+            try:
+                await status.delete()
+            except Exception:
+                pass
         except Exception as exc:
-            await update.message.reply_text(f"❌ Nusxa olishda xatolik: {exc}")
+            await bot.send_message(chat_id, f"❌ Nusxa olishda xatolik: {exc}")
+        finally:
+            if manifest:
+                cleanup_backup(manifest)
     
+    async def check_movies(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Baza kanaldagi kino postlarini tekshirishni fonda boshlash"""
+        if not update.message:
+            return
+        if not self.has_permission(update.effective_user.id, 'movies'):
+            await update.message.reply_text("❌ Sizda kinolarni boshqarish huquqi yo'q!")
+            return
+        if not MOVIE_CHECK_CHAT_ID:
+            await update.message.reply_text(
+                "⚙️ Tekshiruv chati sozlanmagan.\n\n"
+                "Bot admin bo'lgan alohida yopiq kanal yoki guruh yarating va uning ID sini "
+                "<code>MOVIE_CHECK_CHAT_ID</code> muhit o'zgaruvchisiga yozing. "
+                "Tekshiruv nusxalari shu chatga yuboriladi va darhol o'chiriladi.",
+                parse_mode='HTML'
+            )
+            return
+        if self.movie_scanner.running:
+            await update.message.reply_text("⏳ Tekshiruv allaqachon ketmoqda, natija tugagach yuboriladi.")
+            return
+
+        await update.message.reply_text(
+            "🔎 Baza kanal tekshiruvi boshlandi.\n"
+            "Natija tugagach kinolar adminlariga yuboriladi."
+        )
+        context.application.create_task(self.run_movie_scan(context.bot), update=update)
+
+    async def run_movie_scan(self, bot):
+        """Kinolarni tekshirish va natijani adminlarga yuborish"""
+        report = await self.movie_scanner.scan(bot)
+        if report.get('skipped'):
+            return
+        await self.notify_movie_admins(bot, format_scan_report(report))
+
+    async def notify_movie_admins(self, bot, text: str):
+        """Kinolarni boshqarish huquqi bor adminlarga xabar yuborish"""
+        recipients = {ADMIN_ID} if ADMIN_ID else set()
+        for admin in self.db.get_admins():
+            if admin.get('can_manage_movies'):
+                recipients.add(admin['user_id'])
+        with traffic_class(ADMIN):
+            for admin_id in recipients:
+                try:
+                    await bot.send_message(admin_id, text, parse_mode='HTML')
+                except Exception:
+                    pass
+
     async def restore_database(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Super admin uchun database faylini tiklash komandasi"""
         if not update.message:
@@ -312,19 +486,147 @@ class AdminHandlers:
             await update.message.reply_text("❌ Ushbu buyruq faqat super admin uchun mavjud!")
             return
 
-        db_path = self.db.get_db_path()
-        if db_path == "PostgreSQL (Railway)":
-            await update.message.reply_text(
-                "ℹ️ PostgreSQL ishlatilmoqda.\n\n"
-                "PostgreSQL restore qilish uchun Railway dashboardidan foydalaning."
-            )
-            return
-        
+        self._reset_restore_upload(context)
         context.user_data['awaiting_restore_db'] = True
         await update.message.reply_text(
             "📥 <b>Database tiklash</b>\n\n"
-            "Database faylini (.db) yuboring yoki forward qiling.\n\n"
-            "⚠️ <b>Diqqat:</b> Joriy barcha ma'lumotlar o'chiriladi!",
+            "Database faylini (.db, .db.gz yoki eksport .jsonl.gz) yuboring yoki forward qiling.\n"
+            "PostgreSQL ishlatilsa, faqat /exportdb eksporti tiklanadi.\n"
+            "Nusxa bir necha bo'lakdan iborat bo'lsa, barcha bo'laklarni va manifest (.json) faylini yuboring.\n\n"
+            "⚠️ <b>Diqqat:</b> Joriy barcha ma'lumotlar almashtiriladi (eski holat .bak faylda saqlanadi)!",
+            parse_mode='HTML'
+        )
+
+    def _reset_restore_upload(self, context: ContextTypes.DEFAULT_TYPE):
+        upload = context.user_data.pop('restore_upload', None)
+        if upload:
+            shutil.rmtree(upload['work_dir'], ignore_errors=True)
+
+    async def handle_restore_file(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/restoredb dan keyin yuborilgan faylni qabul qilish va tiklash"""
+        doc = update.message.document
+        if not doc:
+            await update.message.reply_text("❌ Iltimos, .db faylini yuboring!")
+            return
+
+        file_name = os.path.basename(doc.file_name or '')
+        is_part = bool(RESTORE_PART_PATTERN.search(file_name))
+        is_manifest = file_name.endswith('.json')
+        if not (file_name.endswith(('.db', '.gz', '.jsonl')) or is_part or is_manifest):
+            await update.message.reply_text(
+                "❌ Faqat .db, .db.gz, .jsonl.gz, .partNNN bo'laklari yoki manifest (.json) fayllari qabul qilinadi!"
+            )
+            return
+
+        # Bot API getFile 20 MB dan katta faylni bermaydi: yuklashga urinmasdan aytamiz
+        if doc.file_size and doc.file_size > TELEGRAM_DOWNLOAD_LIMIT:
+            await update.message.reply_text(
+                self._too_big_for_restore_text(file_name, doc.file_size), parse_mode='HTML'
+            )
+            return
+
+        upload = context.user_data.get('restore_upload')
+        if not upload:
+            upload = {'work_dir': make_work_dir(), 'parts': {}, 'manifest': None}
+            context.user_data['restore_upload'] = upload
+
+        local_path = os.path.join(upload['work_dir'], file_name)
+        try:
+            file = await context.bot.get_file(doc.file_id)
+        except BadRequest as exc:
+            if 'too big' not in str(exc).lower():
+                raise
+            await update.message.reply_text(
+                self._too_big_for_restore_text(file_name, doc.file_size), parse_mode='HTML'
+            )
+            return
+        await file.download_to_drive(local_path)
+
+        if is_manifest:
+            try:
+                with open(local_path, 'r', encoding='utf-8') as handle:
+                    manifest = json.load(handle)
+                if manifest.get('format') not in ('sqlite-gzip', 'jsonl-gzip') or not manifest.get('parts'):
+                    raise ValueError
+            except Exception:
+                await update.message.reply_text("❌ Manifest fayli yaroqsiz!")
+                return
+            too_big = [part for part in manifest['parts'] if part.get('size', 0) > TELEGRAM_DOWNLOAD_LIMIT]
+            if too_big:
+                # Eski (45 MB lik bo'lakli) nusxa: bo'laklarni yuborishdan oldin ogohlantiramiz
+                part = too_big[0]
+                await update.message.reply_text(
+                    self._too_big_for_restore_text(part['name'], part['size'], len(too_big)), parse_mode='HTML'
+                )
+                self._reset_restore_upload(context)
+                return
+            upload['manifest'] = manifest
+        elif is_part:
+            upload['parts'][file_name] = local_path
+        else:
+            await self._run_restore(update, context, [local_path])
+            return
+
+        manifest = upload['manifest']
+        if not manifest:
+            await update.message.reply_text(
+                f"✅ {html.escape(file_name)} qabul qilindi. Qolgan bo'laklar va manifest faylini yuboring.",
+                parse_mode='HTML'
+            )
+            return
+        expected = [part['name'] for part in manifest['parts']]
+        received = [name for name in expected if name in upload['parts']]
+        if len(received) < len(expected):
+            await update.message.reply_text(f"✅ Bo'laklar: {len(received)}/{len(expected)}. Qolganlarini yuboring.")
+            return
+
+        try:
+            verify_parts(manifest['parts'], upload['parts'])
+        except RestoreError as exc:
+            await update.message.reply_text(f"❌ {exc}")
+            return
+        paths = [upload['parts'][name] for name in expected]
+        await self._run_restore(update, context, paths, manifest.get('sha256'))
+
+    @staticmethod
+    def _too_big_for_restore_text(file_name: str, size: int = None, count: int = 1) -> str:
+        size_text = f" ({format_size(size)})" if size else ""
+        more = f" va yana {count - 1} ta bo'lak" if count > 1 else ""
+        return (
+            f"❌ <b>{html.escape(file_name)}</b>{size_text}{more} bot orqali tiklab bo'lmaydi: "
+            f"Telegram botlarga {format_size(TELEGRAM_DOWNLOAD_LIMIT)} dan katta faylni yuklab olishga ruxsat bermaydi.\n\n"
+            "Nima qilish mumkin:\n"
+            "1. Yangi nusxa oling (/backupdb yoki /exportdb): bo'laklar endi 19 MB dan oshmaydi.\n"
+            "2. SQLite (.db.gz) nusxasini server ichida tiklang: bo'laklarni birlashtiring "
+            "(<code>cat nusxa.db.gz.part* &gt; nusxa.db.gz</code>), <code>gunzip</code> qiling, "
+            "bot to'xtatilgan holda <code>DATABASE_PATH</code> faylini almashtiring va botni qayta ishga tushiring."
+        )
+
+    async def _run_restore(self, update: Update, context: ContextTypes.DEFAULT_TYPE, paths, expected_sha256: str = None):
+        upload = context.user_data['restore_upload']
+        status = await update.message.reply_text("⏳ Database tekshirilmoqda va tiklanmoqda...")
+        try:
+            rows, backup_path = await restore_database_files(
+                self.db, paths, upload['work_dir'], expected_sha256
+            )
+            self.db.reload()
+        except RestoreError as exc:
+            await status.edit_text(f"❌ Fayl tiklash uchun yaroqsiz: {exc}\n\nJoriy baza o'zgartirilmadi.")
+            self._reset_restore_upload(context)
+            return
+        except Exception as exc:
+            await status.edit_text(f"❌ Xatolik: {exc}")
+            self._reset_restore_upload(context)
+            return
+
+        self._reset_restore_upload(context)
+        context.user_data['awaiting_restore_db'] = False
+        tables = '\n'.join(f"• {name}: {count}" for name, count in rows.items())
+        await status.edit_text(
+            "✅ <b>Database muvaffaqiyatli tiklandi!</b>\n\n"
+            f"{tables}\n\n"
+            "Bot qayta ishga tushirilmasdan yangi ma'lumotlar bilan ishlayapti."
+            + (f"\nEski holat: <code>{html.escape(os.path.basename(backup_path))}</code>" if backup_path else ""),
             parse_mode='HTML'
         )
     
@@ -66,11 +66,10 @@ class MovieAdminHandlers:
                 text = "📋 <b>Kinolar ro'yxati</b>\n\n❌ Hech qanday kino qo'shilmagan"
             else:
                 # Oxirgi 10 ta kinoni ko'rsatish
-                conn = self.db.get_connection()
-                cursor = conn.cursor()
-                cursor.execute("SELECT code, movie_name, added_date FROM movies ORDER BY id DESC LIMIT 10")
-                movies = cursor.fetchall()
-                conn.close()
+                with self.db.get_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT code, movie_name, added_date FROM movies ORDER BY id DESC LIMIT 10")
+                    movies = cursor.fetchall()
                 
                 text = f"📋 <b>Kinolar ro'yxati</b>\n\n"
                 text += f"Jami kinolar: {stats['total_movies']}\n\n"
@@ -1,12 +1,39 @@
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import (
+    Update, InlineKeyboardButton, InlineKeyboardMarkup,
+    InlineQueryResultArticle, InlineQueryResultsButton, InputTextMessageContent
+)
 from telegram.ext import ContextTypes
 from database import DatabaseManager
+from config import SUBSCRIPTION_CACHE_TTL, INLINE_CACHE_TIME, INLINE_DEBOUNCE, INLINE_MAX_RESULTS
+from utils import TTLCache
+from utils.delivery import DeliveryJob, delivery_queue, classify_error, is_missing_message_error, DELIVERED, QUEUED, RECIPIENT
+from utils.movie_scanner import MOVIE_DEAD
+from utils.search_text import normalize_search_text
+import asyncio
+import html
 import random
 import string
 
+# Nom bo'yicha qidiruv: bir sahifadagi kinolar va bir so'rovda olinadigan eng ko'p natija
+SEARCH_PAGE_SIZE = 8
+SEARCH_MAX_RESULTS = 50
+SEARCH_MIN_LENGTH = 2
+SEARCH_NAME_MAX = 40
+
 class MovieHandlers:
-    def __init__(self, db: DatabaseManager):
+    def __init__(self, db: DatabaseManager, premium=None, notify_admins=None):
         self.db = db
+        # Kino adminlariga xabar yuborish: async (bot, text) - masalan AdminHandlers.notify_movie_admins
+        self.notify_admins = notify_admins
+        # Faol premium foydalanuvchilar keshi (PremiumExpiryEngine) - majburiy obuna talab etilmaydi
+        self.premium = premium
+        # Kanalga a'zoligi tasdiqlangan (user_id, chat_id) juftliklari.
+        # Faqat ijobiy natija saqlanadi: obuna bo'lgan foydalanuvchi darhol o'tadi.
+        self.member_cache = TTLCache(ttl=SUBSCRIPTION_CACHE_TTL, maxsize=200000)
+        # Inline so'rov natijalari (normallashtirilgan so'rov -> kinolar) va har bir
+        # foydalanuvchining oxirgi inline so'rovi (debounce uchun)
+        self.inline_cache = TTLCache(ttl=INLINE_CACHE_TIME, maxsize=5000)
+        self._inline_latest = {}
     
     def generate_code(self, length: int = 8) -> str:
         """Tasodifiy kod generatsiya qilish"""
@@ -28,6 +55,8 @@ class MovieHandlers:
             - request_channels: So'rovli kanallar (har doim ko'rsatiladi)
             - link_channels: Havolalar (har doim ko'rsatiladi)
         """
+        if self.premium is not None and self.premium.is_premium(user_id):
+            return [], [], []
         if self.db.is_admin_user(user_id):
             return [], [], []
         if not self.db.get_subscription_status():
@@ -68,12 +97,17 @@ class MovieHandlers:
                     chat_id = int(chat_id)
                 except ValueError:
                     pass
+            cache_key = (user_id, chat_id)
+            if cache_key in self.member_cache:
+                continue
             try:
                 member = await bot.get_chat_member(chat_id, user_id)
                 status = getattr(member, 'status', '')
                 is_member = getattr(member, 'is_member', True)
                 if status in ('left', 'kicked') or (status == 'restricted' and not is_member):
                     unsubscribed.append((channel_id, channel_name, channel_username))
+                else:
+                    self.member_cache.set(cache_key, True)
             except Exception:
                 # Tekshirib bo'lmasa, obuna bo'lmagan deb hisoblaymiz
                 unsubscribed.append((channel_id, channel_name, channel_username))
@@ -112,7 +146,7 @@ class MovieHandlers:
             if buttons:
                 buttons.append([InlineKeyboardButton("✅ Davom etish", callback_data=f"verify_sub:{code}")])
                 reply_markup = InlineKeyboardMarkup(buttons)
-                await update.message.reply_text('\n'.join(text_lines), parse_mode='HTML', reply_markup=reply_markup)
+                await update.effective_message.reply_text('\n'.join(text_lines), parse_mode='HTML', reply_markup=reply_markup)
                 context.user_data[shown_key] = True
                 context.user_data['pending_movie_code'] = code
             
@@ -144,16 +178,19 @@ class MovieHandlers:
         buttons.append([InlineKeyboardButton("✅ Obunani tekshirish", callback_data=verify_data)])
 
         reply_markup = InlineKeyboardMarkup(buttons)
-        await update.message.reply_text('\n'.join(text_lines), parse_mode='HTML', reply_markup=reply_markup)
+        await update.effective_message.reply_text('\n'.join(text_lines), parse_mode='HTML', reply_markup=reply_markup)
         context.user_data['pending_movie_code'] = code
         return False
 
     async def _deliver_movie(self, chat_id: int, code: str, context: ContextTypes.DEFAULT_TYPE):
-        movie_data = self.db.get_movie(code)
+        movie_data = self.db.get_movie_for_delivery(code)
         if not movie_data:
             return False, "❌ Kino topilmadi!\nIltimos, kodni to'g'ri kiriting."
 
-        message_id, channel_id = movie_data
+        message_id, channel_id, status = movie_data
+        if status == MOVIE_DEAD:
+            # Post baza kanaldan o'chirilgan: API ga so'rov yubormasdan javob beramiz
+            return False, "❌ Bu kino vaqtincha mavjud emas. Adminlar xabardor qilingan."
         button_settings = self.db.get_channel_button()
         reply_markup = None
         if button_settings.get('is_enabled'):
@@ -161,17 +198,55 @@ class MovieHandlers:
                 button_settings['button_text'], url=button_settings['button_url']
             )]])
 
-        try:
-            await context.bot.copy_message(
+        bot = context.bot
+
+        async def send():
+            await bot.copy_message(
                 chat_id=chat_id,
                 from_chat_id=channel_id,
                 message_id=message_id,
                 reply_markup=reply_markup
             )
-        except Exception as e:
-            return False, f"❌ Kinoni yuborishda xatolik!\n\nSabab: {str(e)}"
 
-        return True, None
+        async def on_failure(error: Exception, attempts: int):
+            await self._record_failed_delivery(bot, code, chat_id, channel_id, message_id, error, attempts)
+            try:
+                await bot.send_message(
+                    chat_id,
+                    f"❌ {code} kodli kinoni yuborib bo'lmadi. Iltimos, birozdan keyin qayta urinib ko'ring."
+                )
+            except Exception:
+                pass
+
+        job = DeliveryJob(send, key=f"movie:{code}:{chat_id}", on_failure=on_failure)
+        result = await delivery_queue.deliver(job)
+        if result == DELIVERED:
+            return True, None
+        if result == QUEUED:
+            return True, "⏳ Hozir Telegram band. Kino bir necha soniyada avtomatik yuboriladi."
+
+        await self._record_failed_delivery(bot, code, chat_id, channel_id, message_id, job.last_error, job.attempts)
+        return False, "❌ Kinoni yuborishda xatolik! Iltimos, keyinroq qayta urinib ko'ring."
+
+    async def _record_failed_delivery(self, bot, code: str, chat_id: int, channel_id, message_id: int,
+                                      error: Exception, attempts: int):
+        """Doimiy xatolikni dead-letter jurnaliga yozish (foydalanuvchi botni bloklagan bo'lsa emas)
+
+        Baza kanaldagi post topilmasa kino 'dead' deb belgilanadi va kino adminlariga xabar beriladi.
+        """
+        if classify_error(error) == RECIPIENT:
+            return
+        self.db.add_delivery_dead_letter(code, chat_id, channel_id, message_id, str(error), attempts)
+        if not is_missing_message_error(error):
+            return
+        self.db.set_movies_status([(MOVIE_DEAD, code)])
+        if self.notify_admins is not None:
+            await self.notify_admins(
+                bot,
+                f"⚠️ <b>{html.escape(code)}</b> kodli kino baza kanalda topilmadi "
+                f"(post {message_id}) va foydalanuvchilarga yuborilmaydi.\n"
+                f"Postni qayta joylang yoki kinoni o'chiring."
+            )
     
     async def add_movie(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Admin tomonidan kino qo'shish"""
@@ -269,14 +344,22 @@ class MovieHandlers:
            context.user_data.get('adding_movie'):
             return  # Boshqa handlerga o'tkazish
         
-        # Kodning formatini tekshirish (faqat raqam va 1-10000 oralig'i)
+        # Raqam bo'lmagan matn - kino nomi yoki janri bo'yicha qidiruv
         if not code.isdigit():
+            if len(normalize_search_text(code)) >= SEARCH_MIN_LENGTH:
+                await self.search_movies(update, context, code)
+                return
             await update.message.reply_text(
                 "❌ Kod faqat raqamlardan iborat bo'lishi kerak!\n"
-                "Masalan: 1, 21, 137, 2024"
+                "Masalan: 1, 21, 137, 2024\n\n"
+                "🔎 Kino nomini yozib qidirishingiz ham mumkin."
             )
             return
         
+        await self.send_movie(update, context, code)
+
+    async def send_movie(self, update: Update, context: ContextTypes.DEFAULT_TYPE, code: str):
+        """Kod bo'yicha kinoni yuborish (xabar yoki /start <kod> havolasi orqali)"""
         code_num = int(code)
         if code_num < 1 or code_num > 10000:
             await update.message.reply_text(
@@ -290,9 +373,153 @@ class MovieHandlers:
             return
         
         delivered, error_text = await self._deliver_movie(update.effective_chat.id, code, context)
-        if not delivered and error_text:
+        if error_text:
             await update.message.reply_text(error_text)
 
+    def _search_page(self, query_text: str, results, page: int):
+        """Qidiruv natijalarining bitta sahifasi: (matn, tugmalar)"""
+        pages = max(1, (len(results) + SEARCH_PAGE_SIZE - 1) // SEARCH_PAGE_SIZE)
+        page = min(max(page, 0), pages - 1)
+        text = f"🔎 <b>{html.escape(query_text)}</b> bo'yicha {len(results)} ta kino topildi"
+        if len(results) >= SEARCH_MAX_RESULTS:
+            text += f" (birinchi {SEARCH_MAX_RESULTS} tasi)"
+        text += ":"
+        if pages > 1:
+            text += f"\n📄 Sahifa {page + 1}/{pages}"
+
+        buttons = []
+        for code, movie_name, movie_genre in results[page * SEARCH_PAGE_SIZE:(page + 1) * SEARCH_PAGE_SIZE]:
+            name = movie_name or 'Nomsiz'
+            if len(name) > SEARCH_NAME_MAX:
+                name = name[:SEARCH_NAME_MAX - 1] + '…'
+            label = f"🎬 {name}"
+            if movie_genre:
+                label += f" · {movie_genre}"
+            buttons.append([InlineKeyboardButton(f"{label} [{code}]", callback_data=f"msearch_get:{code}")])
+        if pages > 1:
+            nav = []
+            if page > 0:
+                nav.append(InlineKeyboardButton("⬅️ Oldingi", callback_data=f"msearch:{page - 1}"))
+            if page < pages - 1:
+                nav.append(InlineKeyboardButton("Keyingi ➡️", callback_data=f"msearch:{page + 1}"))
+            buttons.append(nav)
+        return text, InlineKeyboardMarkup(buttons)
+
+    async def search_movies(self, update: Update, context: ContextTypes.DEFAULT_TYPE, query_text: str):
+        """Kino nomi yoki janri bo'yicha qidirish va natijalarni sahifalab ko'rsatish"""
+        results = self.db.search_movies(query_text, limit=SEARCH_MAX_RESULTS)
+        if not results:
+            await update.message.reply_text(
+                f"😕 <b>{html.escape(query_text)}</b> bo'yicha kino topilmadi.\n"
+                f"Nomini boshqacha yozib ko'ring yoki kino kodini yuboring.",
+                parse_mode='HTML'
+            )
+            return
+        # Sahifalar orasida yurishda qidiruv qayta bajarilmasligi uchun
+        context.user_data['movie_search'] = {'query': query_text, 'results': results}
+        text, reply_markup = self._search_page(query_text, results, 0)
+        await update.message.reply_text(text, parse_mode='HTML', reply_markup=reply_markup)
+
+    async def search_page_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Qidiruv natijalari sahifasini almashtirish (msearch:<sahifa>)"""
+        query = update.callback_query
+        try:
+            page = int(query.data.split(':', 1)[1])
+        except (IndexError, ValueError):
+            await query.answer()
+            return
+        search = context.user_data.get('movie_search')
+        if not search:
+            await query.answer("⌛ Qidiruv eskirgan. Kino nomini qayta yuboring.", show_alert=True)
+            return
+        await query.answer()
+        text, reply_markup = self._search_page(search['query'], search['results'], page)
+        try:
+            await query.edit_message_text(text, parse_mode='HTML', reply_markup=reply_markup)
+        except Exception:
+            pass
+
+    async def search_pick_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Qidiruv natijasidan kino tanlash (msearch_get:<kod>)"""
+        query = update.callback_query
+        code = (query.data or '').split(':', 1)[-1]
+        await query.answer()
+        if not code or not await self._ensure_subscription(update, context, code):
+            return
+        delivered, error_text = await self._deliver_movie(query.message.chat_id, code, context)
+        if error_text:
+            await context.bot.send_message(query.message.chat_id, error_text)
+
+    def _inline_movies(self, text: str):
+        """Inline so'rov uchun kinolar: raqam bo'lsa kod bo'yicha, aks holda nom/janr bo'yicha (keshlangan)"""
+        key = ('code', text) if text.isdigit() else ('search', normalize_search_text(text))
+        movies = self.inline_cache.get(key)
+        if movies is None:
+            if text.isdigit():
+                movie = self.db.get_movie_info(text)
+                movies = [movie] if movie else []
+            else:
+                movies = self.db.search_movies(text, limit=INLINE_MAX_RESULTS)
+            self.inline_cache.set(key, movies)
+        return movies
+
+    async def inline_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Inline rejim: @bot 137 yoki @bot kino nomi
+
+        Natija - kino haqida xabar va botni /start <kod> bilan ochadigan tugma: kino
+        bot orqali yuboriladi, shuning uchun obuna tekshiruvi ham o'sha yerda takrorlanadi.
+        """
+        query = update.inline_query
+        user_id = query.from_user.id
+        text = (query.query or '').strip()
+
+        # Debounce: foydalanuvchi yozishda davom etsa, yangi so'rov eskisini bekor qiladi
+        # (javobsiz qolgan so'rovni Telegram o'zi bekor qiladi)
+        self._inline_latest[user_id] = query.id
+        if INLINE_DEBOUNCE > 0:
+            await asyncio.sleep(INLINE_DEBOUNCE)
+            if self._inline_latest.get(user_id) != query.id:
+                return
+        self._inline_latest.pop(user_id, None)
+
+        if not text.isdigit() and len(normalize_search_text(text)) < SEARCH_MIN_LENGTH:
+            await query.answer([], cache_time=INLINE_CACHE_TIME)
+            return
+
+        subscription_required = self.db.get_subscription_status()
+        unsubscribed, _, _ = await self._get_unsubscribed_channels(context.bot, user_id)
+        if unsubscribed:
+            # Obuna bo'lmagan foydalanuvchiga natija o'rniga botga o'tish tugmasi
+            await query.answer(
+                [], cache_time=0, is_personal=True,
+                button=InlineQueryResultsButton(
+                    text="📢 Avval kanallarga obuna bo'ling",
+                    start_parameter=text if text.isdigit() else 'inline'
+                )
+            )
+            return
+
+        bot_username = context.bot.username
+        results = []
+        for code, movie_name, movie_genre in self._inline_movies(text)[:INLINE_MAX_RESULTS]:
+            name = movie_name or 'Nomsiz'
+            message_text = f"🎬 <b>{html.escape(name)}</b>\n"
+            if movie_genre:
+                message_text += f"🎭 {html.escape(movie_genre)}\n"
+            message_text += f"🔢 Kod: <code>{html.escape(code)}</code>"
+            description = f"Kod: {code}" + (f" · {movie_genre}" if movie_genre else '')
+            results.append(InlineQueryResultArticle(
+                id=code[:64],
+                title=f"🎬 {name}",
+                description=description,
+                input_message_content=InputTextMessageContent(message_text, parse_mode='HTML'),
+                reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton(
+                    "▶️ Kinoni ko'rish", url=f"https://t.me/{bot_username}?start={code}"
+                )]])
+            ))
+        # Majburiy obuna yoqilgan bo'lsa, Telegram natijani boshqa foydalanuvchilarga bermasin
+        await query.answer(results, cache_time=INLINE_CACHE_TIME, is_personal=subscription_required)
+
     async def verify_subscription_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         query = update.callback_query
         user_id = query.from_user.id
@@ -348,6 +575,8 @@ class MovieHandlers:
                 await query.message.delete()
             except Exception:
                 pass
+            if error_text:
+                await context.bot.send_message(query.message.chat_id, error_text)
         else:
             await query.answer("❌ Kino topilmadi", show_alert=True)
             if error_text:
@@ -1,9 +1,20 @@
+import html
 from typing import Optional, Tuple
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
 from database import DatabaseManager
 
+# Ro'yxat sahifasidagi yozuvlar soni
+PREMIUM_PAGE_SIZE = 10
+
+REQUEST_VIEWS = {
+    'pending': "⏳ Kutilmoqda",
+    'approved': "✅ Tasdiqlangan",
+    'rejected': "❌ Rad etilgan",
+    'partial': "⚠️ To'liq emas",
+}
+
 
 class PremiumHandlers:
     def __init__(self, db: DatabaseManager):
@@ -47,7 +58,8 @@ class PremiumHandlers:
                 InlineKeyboardButton("💳 Karta qo'shish", callback_data="premium_card")
             ],
             [
-                InlineKeyboardButton("👥 Premium foydalanuvchilar", callback_data="premium_users")
+                InlineKeyboardButton("👥 Premium foydalanuvchilar", callback_data="premium_users"),
+                InlineKeyboardButton("📥 Cheklar", callback_data="premium_page:pending")
             ]
         ]
         return text, InlineKeyboardMarkup(keyboard)
@@ -157,49 +169,104 @@ class PremiumHandlers:
             await query.answer("Statistika", show_alert=False)
             await query.message.reply_text(text, parse_mode='HTML')
             return
-        if data == "premium_users":
-            users = self.db.get_premium_users()
-            if not users:
-                body = "Hozircha premium foydalanuvchilar yo'q."
-            else:
-                lines = []
-                for idx, user in enumerate(users, start=1):
-                    name = user['first_name'] or "Noma'lum"
-                    if user['username']:
-                        name += f" (@{user['username']})"
-                    plan = user['plan'] or '—'
-                    expires = user['expires_at'] or '—'
-                    lines.append(f"{idx}. {name} - {plan} (tugash: {expires})")
-                body = '\n'.join(lines)
-            await query.answer("Foydalanuvchilar", show_alert=False)
-            await query.message.reply_text(
-                "👥 <b>Premium foydalanuvchilar</b>\n\n" + body,
-                parse_mode='HTML'
-            )
+        if data in ("premium_users", "premium_payments"):
+            view = 'users' if data == "premium_users" else 'payments'
+            text, markup = self._build_page(view)
+            await query.answer()
+            await query.message.reply_text(text, parse_mode='HTML', reply_markup=markup)
             return
-        if data == "premium_payments":
-            payments = self.db.get_premium_payments()
-            if not payments:
-                body = "Hali to'lovlar qayd etilmagan."
-            else:
-                lines = []
-                for payment in payments:
-                    amount = self._format_amount(payment['amount'])
-                    duration = payment['duration'] or 0
-                    method = payment['payment_method'] or '—'
-                    reference = payment['reference'] or '—'
-                    lines.append(
-                        f"• {amount} / {duration} oy\n  Usul: {method}\n  Chek: {reference}\n"
-                    )
-                body = '\n'.join(lines)
-            await query.answer("To'lovlar", show_alert=False)
-            await query.message.reply_text(
-                "🧾 <b>So'nggi to'lovlar</b>\n\n" + body,
-                parse_mode='HTML'
+        if data.startswith("premium_page:"):
+            parts = data.split(':')
+            view = parts[1] if len(parts) > 1 else 'pending'
+            direction = parts[2] if len(parts) > 2 else ''
+            try:
+                cursor_id = int(parts[3]) if len(parts) > 3 else None
+            except ValueError:
+                cursor_id = None
+            text, markup = self._build_page(
+                view,
+                before_id=cursor_id if direction == 'n' else None,
+                after_id=cursor_id if direction == 'p' else None
             )
+            await query.answer()
+            try:
+                await query.edit_message_text(text, parse_mode='HTML', reply_markup=markup)
+            except Exception:
+                pass
             return
         await query.answer()
 
+    def _build_page(
+        self,
+        view: str,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None
+    ) -> Tuple[str, InlineKeyboardMarkup]:
+        """Cheklar / foydalanuvchilar / to'lovlar ro'yxatining bitta sahifasi"""
+        if view == 'users':
+            rows, has_newer, has_older = self.db.get_premium_users_page(before_id, after_id, PREMIUM_PAGE_SIZE)
+            title = "👥 <b>Premium foydalanuvchilar</b>"
+            empty = "Hozircha premium foydalanuvchilar yo'q."
+            lines = []
+            for row in rows:
+                name = html.escape(row['first_name'] or "Noma'lum")
+                if row['username']:
+                    name += f" (@{html.escape(row['username'])})"
+                plan = html.escape(row['plan'] or '—')
+                expires = str(row['expires_at'])[:16] if row['expires_at'] else 'muddatsiz'
+                state = '' if row['status'] in (None, 'active') else f" [{row['status']}]"
+                lines.append(f"• {name} <code>{row['user_id']}</code> - {plan} (tugash: {expires}){state}")
+        elif view == 'payments':
+            rows, has_newer, has_older = self.db.get_premium_payments_page(before_id, after_id, PREMIUM_PAGE_SIZE)
+            title = "🧾 <b>To'lovlar</b>"
+            empty = "Hali to'lovlar qayd etilmagan."
+            lines = []
+            for row in rows:
+                lines.append(
+                    f"• {self._format_amount(row['amount'])} / {row['duration'] or 0} oy - "
+                    f"<code>{row['user_id']}</code>\n"
+                    f"  Usul: {html.escape(row['payment_method'] or '—')}, "
+                    f"chek: {html.escape(row['reference'] or '—')}, {str(row['created_at'] or '')[:16]}"
+                )
+        else:
+            if view not in REQUEST_VIEWS:
+                view = 'pending'
+            rows, has_newer, has_older = self.db.get_premium_requests_page(
+                view, before_id, after_id, PREMIUM_PAGE_SIZE
+            )
+            title = f"📥 <b>Cheklar: {REQUEST_VIEWS[view]}</b>"
+            empty = "Bu holatda cheklar yo'q."
+            lines = []
+            for row in rows:
+                name = html.escape(row['first_name'] or "Noma'lum")
+                if row['username']:
+                    name += f" (@{html.escape(row['username'])})"
+                lines.append(
+                    f"• #{row['id']} {name} <code>{row['user_id']}</code> - "
+                    f"{html.escape(row['plan_label'] or '—')}, {self._format_amount(row['amount'])}, "
+                    f"{str(row['created_at'] or '')[:16]}"
+                )
+
+        text = title + "\n\n" + ('\n'.join(lines) if lines else empty)
+        keyboard = []
+        if view in REQUEST_VIEWS:
+            keyboard.append([
+                InlineKeyboardButton(
+                    ("• " if key == view else "") + label.split(' ', 1)[0],
+                    callback_data=f"premium_page:{key}"
+                )
+                for key, label in REQUEST_VIEWS.items()
+            ])
+        navigation = []
+        if rows and has_newer:
+            navigation.append(InlineKeyboardButton("◀️ Yangiroq", callback_data=f"premium_page:{view}:p:{rows[0]['id']}"))
+        if rows and has_older:
+            navigation.append(InlineKeyboardButton("Eskiroq ▶️", callback_data=f"premium_page:{view}:n:{rows[-1]['id']}"))
+        if navigation:
+            keyboard.append(navigation)
+        keyboard.append([InlineKeyboardButton("🔄 Boshiga", callback_data=f"premium_page:{view}")])
+        return text, InlineKeyboardMarkup(keyboard)
+
     def _parse_prices(self, text: str) -> dict:
         values = {}
         lines = [line.strip() for line in text.split('\n') if line.strip()]
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+# Testlar har doim vaqtinchalik SQLite bazada ishlaydi (.env dagi DATABASE_URL e'tiborsiz)
+os.environ['DATABASE_URL'] = ''
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager  # noqa: E402
+
+
+@pytest.fixture
+def make_db(tmp_path):
+    """Vaqtinchalik SQLite bazalar yaratuvchi: make_db('a.db')"""
+    created = []
+
+    def make(name: str = 'movies.db') -> DatabaseManager:
+        db = DatabaseManager(str(tmp_path / name))
+        created.append(db)
+        return db
+
+    yield make
+    for db in created:
+        db.close()
+
+
+@pytest.fixture
+def db(make_db):
+    return make_db()
+
+
+def fetch_all(db, sql: str, params=()):
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        return [tuple(row) for row in cursor.fetchall()]
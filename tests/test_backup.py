@@ -0,0 +1,103 @@
+import gzip
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+from database import backup
+from database.backup import BACKUP_PART_SIZE, TELEGRAM_DOWNLOAD_LIMIT, build_backup, cleanup_backup, sha256_file
+from database.restore import RestoreError, unpack_backup, verify_parts
+
+
+def _add_movies(db, count: int):
+    # Tasodifiy nomlar yaxshi siqilmaydi: kichik part_size bilan bir necha bo'lak chiqadi
+    for code in range(1, count + 1):
+        db.add_movie(str(code), code, '-100123', os.urandom(24).hex())
+
+
+def _part_paths(manifest):
+    return {part['name']: part['path'] for part in manifest['parts']}
+
+
+def test_default_part_size_fits_download_limit():
+    assert BACKUP_PART_SIZE < TELEGRAM_DOWNLOAD_LIMIT
+
+
+def test_parts_match_manifest_checksums(db, tmp_path):
+    _add_movies(db, 300)
+    manifest = build_backup(db.get_db_path(), part_size=4096)
+    try:
+        assert len(manifest['parts']) > 1
+        assert all(part['size'] <= 4096 for part in manifest['parts'])
+        verify_parts(manifest['parts'], _part_paths(manifest))
+
+        candidate = unpack_backup([part['path'] for part in manifest['parts']], str(tmp_path / 'candidate.db'))
+        assert sha256_file(candidate) == manifest['sha256']
+        assert os.path.getsize(candidate) == manifest['size']
+        conn = sqlite3.connect(candidate)
+        try:
+            assert conn.execute("SELECT COUNT(*) FROM movies").fetchone()[0] == 300
+        finally:
+            conn.close()
+    finally:
+        cleanup_backup(manifest)
+    assert not os.path.exists(manifest['work_dir'])
+
+
+def test_single_part_is_plain_gzip(db):
+    manifest = build_backup(db.get_db_path())
+    try:
+        assert len(manifest['parts']) == 1
+        path = manifest['parts'][0]['path']
+        assert path.endswith('.gz')
+        with gzip.open(path, 'rb') as handle:
+            assert handle.read(16) == b'SQLite format 3\x00'
+    finally:
+        cleanup_backup(manifest)
+
+
+def test_corrupted_part_is_rejected(db):
+    _add_movies(db, 300)
+    manifest = build_backup(db.get_db_path(), part_size=4096)
+    try:
+        path = manifest['parts'][1]['path']
+        with open(path, 'r+b') as handle:
+            first = handle.read(1)
+            handle.seek(0)
+            handle.write(bytes([first[0] ^ 0xFF]))
+        with pytest.raises(RestoreError, match='buzilgan'):
+            verify_parts(manifest['parts'], _part_paths(manifest))
+    finally:
+        cleanup_backup(manifest)
+
+
+def test_missing_part_is_rejected(db):
+    _add_movies(db, 300)
+    manifest = build_backup(db.get_db_path(), part_size=4096)
+    try:
+        paths = _part_paths(manifest)
+        paths.pop(manifest['parts'][-1]['name'])
+        with pytest.raises(RestoreError, match='yuborilmagan'):
+            verify_parts(manifest['parts'], paths)
+    finally:
+        cleanup_backup(manifest)
+
+
+def test_failed_build_removes_work_dir(db, monkeypatch):
+    created = []
+    real_mkdtemp = tempfile.mkdtemp
+
+    def mkdtemp(*args, **kwargs):
+        path = real_mkdtemp(*args, **kwargs)
+        created.append(path)
+        return path
+
+    def broken_snapshot(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(backup.tempfile, 'mkdtemp', mkdtemp)
+    monkeypatch.setattr(backup, 'create_snapshot', broken_snapshot)
+    with pytest.raises(OSError):
+        build_backup(db.get_db_path())
+    assert created and not os.path.exists(created[0])
@@ -0,0 +1,107 @@
+from database.backup import cleanup_backup
+from database.export import build_export, import_export_file
+
+from conftest import fetch_all
+
+OLD = '2000-01-01 00:00:00'
+SINCE = '2001-01-01 00:00:00'
+
+
+def _export(db, since=None):
+    manifest = build_export(db, since=since)
+    return manifest, manifest['parts'][0]['path']
+
+
+def _backdate(db):
+    """Mavjud qatorlarni SINCE dan oldinga surish: inkrementalga faqat keyingi o'zgarishlar tushadi"""
+    with db.get_connection(write=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE users SET joined_date = ?, last_active = ?", (OLD, OLD))
+        cursor.execute("UPDATE movies SET added_date = ?, checked_at = NULL", (OLD,))
+        conn.commit()
+
+
+def _seed(db):
+    for user_id in (1, 2):
+        db.upsert_user(user_id, f'User{user_id}', None, 'uz')
+    for code in (1, 2, 3):
+        db.add_movie(str(code), code, '-100', f'Kino {code}')
+    _backdate(db)
+
+
+def test_round_trip_full_export(make_db):
+    source = make_db('source.db')
+    _seed(source)
+    target = make_db('target.db')
+    target.add_movie('99', 99, '-100', 'Ortiqcha')
+
+    manifest, path = _export(source)
+    try:
+        counts = import_export_file(target, path)
+    finally:
+        cleanup_backup(manifest)
+
+    assert counts['movies'] == 3 and counts['users'] == 2
+    assert fetch_all(target, "SELECT code FROM movies ORDER BY code") == [('1',), ('2',), ('3',)]
+
+
+def test_incremental_exports_only_changed_rows(db):
+    _seed(db)
+    db.upsert_user(3, 'User3', None, 'uz')
+    db.set_movies_status([('dead', '2')])
+    db.add_movie('4', 4, '-100', 'Kino 4')
+
+    manifest, _ = _export(db, since=SINCE)
+    try:
+        assert manifest['incremental']
+        assert manifest['tables']['users'] == 1
+        assert manifest['tables']['movies'] == 2
+    finally:
+        cleanup_backup(manifest)
+
+
+def test_full_plus_incremental_restores_latest_state(make_db):
+    source = make_db('source.db')
+    _seed(source)
+    full, full_path = _export(source)
+
+    source.upsert_user(1, 'Renamed', None, 'uz')
+    source.upsert_user(3, 'User3', None, 'uz')
+    source.set_movies_status([('dead', '2')])
+    source.add_movie('4', 4, '-100', 'Kino 4')
+    incremental, incremental_path = _export(source, since=SINCE)
+
+    target = make_db('target.db')
+    try:
+        import_export_file(target, full_path)
+        target.add_backup_log('full', SINCE, None, 1, 1, 'dir', '[]')
+        target.add_backup_log('incremental', SINCE, SINCE, 1, 1, 'dir', '[]')
+        import_export_file(target, incremental_path)
+    finally:
+        cleanup_backup(full)
+        cleanup_backup(incremental)
+
+    # Inkrementalda yo'q qatorlar o'chmaydi, borlari kalit bo'yicha almashtiriladi
+    assert fetch_all(target, "SELECT code, status FROM movies ORDER BY code") == [
+        ('1', 'ok'), ('2', 'dead'), ('3', 'ok'), ('4', 'ok')
+    ]
+    assert fetch_all(target, "SELECT user_id, first_name FROM users ORDER BY user_id") == [
+        (1, 'Renamed'), (2, 'User2'), (3, 'User3')
+    ]
+    # backup_log fayldagi eski nusxa bilan almashtirilmaydi
+    assert len(target.get_backup_logs()) == 2
+
+
+def test_incremental_import_is_idempotent(make_db):
+    source = make_db('source.db')
+    _seed(source)
+    source.add_movie('4', 4, '-100', 'Kino 4')
+    manifest, path = _export(source, since=SINCE)
+
+    target = make_db('target.db')
+    try:
+        import_export_file(target, path)
+        import_export_file(target, path)
+    finally:
+        cleanup_backup(manifest)
+    assert fetch_all(target, "SELECT code FROM movies") == [('4',)]
@@ -0,0 +1,58 @@
+import pytest
+
+
+def _ids(rows):
+    return [row['id'] for row in rows]
+
+
+@pytest.fixture
+def requests_db(db):
+    """25 ta 'pending' so'rov (id 1..25), 10- va 20-si tasdiqlangan"""
+    for index in range(25):
+        db.create_premium_request(100 + index, 'User', None, '1 oy', 1, 30000, 'file-id', 'photo', 100 + index, 1)
+    for request_id in (10, 20):
+        db.activate_premium_request(request_id, admin_id=1)
+    return db
+
+
+def test_pages_walk_from_newest_to_oldest(requests_db):
+    page, has_newer, has_older = requests_db.get_premium_requests_page('pending', limit=10)
+    assert _ids(page) == [25, 24, 23, 22, 21, 19, 18, 17, 16, 15]
+    assert (has_newer, has_older) == (False, True)
+
+    page, has_newer, has_older = requests_db.get_premium_requests_page('pending', before_id=15, limit=10)
+    assert _ids(page) == [14, 13, 12, 11, 9, 8, 7, 6, 5, 4]
+    assert (has_newer, has_older) == (True, True)
+
+    page, has_newer, has_older = requests_db.get_premium_requests_page('pending', before_id=4, limit=10)
+    assert _ids(page) == [3, 2, 1]
+    assert (has_newer, has_older) == (True, False)
+
+
+def test_going_back_returns_the_previous_page(requests_db):
+    first, _, _ = requests_db.get_premium_requests_page('pending', limit=10)
+    second, _, _ = requests_db.get_premium_requests_page('pending', before_id=first[-1]['id'], limit=10)
+
+    back, has_newer, has_older = requests_db.get_premium_requests_page('pending', after_id=second[0]['id'], limit=10)
+    assert _ids(back) == _ids(first)
+    assert (has_newer, has_older) == (False, True)
+
+
+def test_exact_multiple_has_no_empty_last_page(requests_db):
+    page, _, has_older = requests_db.get_premium_requests_page('approved', limit=2)
+    assert _ids(page) == [20, 10]
+    assert has_older is False
+
+
+def test_empty_status(requests_db):
+    assert requests_db.get_premium_requests_page('rejected') == ([], False, False)
+
+
+def test_payments_page_boundaries(requests_db):
+    page, has_newer, has_older = requests_db.get_premium_payments_page(limit=1)
+    assert [row['reference'] for row in page] == ['request:20']
+    assert (has_newer, has_older) == (False, True)
+
+    page, has_newer, has_older = requests_db.get_premium_payments_page(before_id=page[0]['id'], limit=1)
+    assert [row['reference'] for row in page] == ['request:10']
+    assert (has_newer, has_older) == (True, False)
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta, timezone
+
+from conftest import fetch_all
+
+
+def _request(db, user_id: int = 10, duration: int = 1, amount: int = 30000) -> int:
+    return db.create_premium_request(
+        user_id, 'Ali', 'ali', f'{duration} oy', duration, amount, 'file-id', 'photo', user_id, 1
+    )
+
+
+def _payments(db):
+    return fetch_all(db, "SELECT user_id, amount, reference FROM premium_payments ORDER BY id")
+
+
+def _active(db, user_id: int):
+    return fetch_all(db, "SELECT expires_at FROM premium_users WHERE user_id = ? AND status = 'active'", (user_id,))
+
+
+def _parse(value) -> datetime:
+    return datetime.strptime(str(value)[:19], '%Y-%m-%d %H:%M:%S')
+
+
+def test_activation_creates_subscription_and_payment(db):
+    request_id = _request(db)
+    result = db.activate_premium_request(request_id, admin_id=1)
+
+    assert result['activated'] and not result['extended']
+    assert result['user_id'] == 10
+    assert _payments(db) == [(10, 30000, f'request:{request_id}')]
+    [(expires_at,)] = _active(db, 10)
+    assert expires_at == result['expires_at']
+    assert fetch_all(db, "SELECT status, admin_id FROM premium_requests WHERE id = ?", (request_id,)) == [('approved', 1)]
+
+
+def test_second_approval_changes_nothing(db):
+    request_id = _request(db)
+    first = db.activate_premium_request(request_id, admin_id=1)
+    second = db.activate_premium_request(request_id, admin_id=2)
+
+    assert second == {'activated': False, 'status': 'approved', 'user_id': 10}
+    assert len(_payments(db)) == 1
+    assert _active(db, 10) == [(first['expires_at'],)]
+    # Birinchi tasdiqlagan admin saqlanadi
+    assert fetch_all(db, "SELECT admin_id FROM premium_requests WHERE id = ?", (request_id,)) == [(1,)]
+
+
+def test_rejected_request_is_not_activated(db):
+    request_id = _request(db)
+    db.execute_query("UPDATE premium_requests SET status = 'rejected' WHERE id = ?", (request_id,))
+
+    result = db.activate_premium_request(request_id, admin_id=1)
+    assert result['activated'] is False and result['status'] == 'rejected'
+    assert _payments(db) == []
+    assert _active(db, 10) == []
+
+
+def test_unknown_request(db):
+    assert db.activate_premium_request(12345, admin_id=1) == {'activated': False, 'status': None}
+
+
+def test_active_subscription_is_extended(db):
+    first = db.activate_premium_request(_request(db), admin_id=1)
+    second = db.activate_premium_request(_request(db, duration=2), admin_id=1)
+
+    assert second['activated'] and second['extended']
+    assert _parse(second['expires_at']) == _parse(first['expires_at']) + timedelta(days=60)
+    assert len(_active(db, 10)) == 1
+    assert len(_payments(db)) == 2
+
+
+def test_expired_subscription_starts_from_now(db):
+    db.activate_premium_request(_request(db), admin_id=1)
+    db.execute_query("UPDATE premium_users SET expires_at = '2000-01-01 00:00:00' WHERE user_id = ?", (10,))
+
+    result = db.activate_premium_request(_request(db), admin_id=1)
+    assert result['activated'] and not result['extended']
+    assert _parse(result['expires_at']) > datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=29)
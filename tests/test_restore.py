@@ -0,0 +1,132 @@
+import gzip
+import json
+import sqlite3
+
+import pytest
+
+from database.backup import build_backup, cleanup_backup
+from database.export import build_export
+from database.restore import RestoreError, restore_from_files, validate_database
+
+from conftest import fetch_all
+
+
+def _movie_codes(db):
+    return [row[0] for row in fetch_all(db, "SELECT code FROM movies ORDER BY code")]
+
+
+def _rewrite_export(path: str, edit):
+    """Eksport faylining qatorlarini (JSON) o'zgartirib qayta yozish"""
+    with gzip.open(path, 'rt', encoding='utf-8') as handle:
+        records = [json.loads(line) for line in handle]
+    edit(records)
+    with gzip.open(path, 'wt', encoding='utf-8') as handle:
+        for record in records:
+            handle.write(json.dumps(record) + '\n')
+
+
+def test_validate_rejects_non_sqlite_file(tmp_path):
+    path = tmp_path / 'notes.db'
+    path.write_bytes(b'not a database at all')
+    with pytest.raises(RestoreError, match='SQLite'):
+        validate_database(str(path))
+
+
+def test_validate_rejects_missing_schema(tmp_path):
+    path = str(tmp_path / 'other.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE settings (id INTEGER PRIMARY KEY, channel_id TEXT)")
+    conn.close()
+    with pytest.raises(RestoreError, match="'movies'"):
+        validate_database(path)
+
+
+def test_snapshot_restore_replaces_live_data_and_keeps_previous(make_db, tmp_path):
+    source = make_db('source.db')
+    source.add_movie('1', 1, '-100', 'Birinchi')
+    source.add_movie('2', 2, '-100', 'Ikkinchi')
+    live = make_db('live.db')
+    live.add_movie('9', 9, '-100', 'Eski')
+
+    manifest = build_backup(source.get_db_path())
+    try:
+        work_dir = tmp_path / 'work'
+        work_dir.mkdir()
+        rows, backup_path = restore_from_files(
+            live, [part['path'] for part in manifest['parts']], str(work_dir), manifest['sha256']
+        )
+    finally:
+        cleanup_backup(manifest)
+
+    assert rows['movies'] == 2
+    assert _movie_codes(live) == ['1', '2']
+    kept = sqlite3.connect(backup_path)
+    try:
+        assert kept.execute("SELECT code FROM movies").fetchall() == [('9',)]
+    finally:
+        kept.close()
+
+
+def test_sha256_mismatch_leaves_live_untouched(make_db, tmp_path):
+    source = make_db('source.db')
+    source.add_movie('1', 1, '-100', 'Birinchi')
+    live = make_db('live.db')
+    live.add_movie('9', 9, '-100', 'Eski')
+
+    manifest = build_backup(source.get_db_path())
+    try:
+        with pytest.raises(RestoreError, match='SHA-256'):
+            restore_from_files(live, [part['path'] for part in manifest['parts']], str(tmp_path), '0' * 64)
+    finally:
+        cleanup_backup(manifest)
+    assert _movie_codes(live) == ['9']
+
+
+def test_invalid_snapshot_leaves_live_untouched(db, tmp_path):
+    db.add_movie('9', 9, '-100', 'Eski')
+    broken = str(tmp_path / 'broken.db')
+    conn = sqlite3.connect(broken)
+    conn.execute("CREATE TABLE users (user_id INTEGER)")
+    conn.close()
+
+    with pytest.raises(RestoreError):
+        restore_from_files(db, [broken], str(tmp_path))
+    assert _movie_codes(db) == ['9']
+
+
+def test_export_with_wrong_footer_is_rolled_back(make_db, tmp_path):
+    source = make_db('source.db')
+    source.add_movie('1', 1, '-100', 'Birinchi')
+    live = make_db('live.db')
+    live.add_movie('9', 9, '-100', 'Eski')
+
+    manifest = build_export(source)
+    try:
+        path = manifest['parts'][0]['path']
+
+        def break_footer(records):
+            records[-1]['tables']['movies'] += 1
+
+        _rewrite_export(path, break_footer)
+        with pytest.raises(RestoreError, match="'movies'"):
+            restore_from_files(live, [path], str(tmp_path))
+    finally:
+        cleanup_backup(manifest)
+    assert _movie_codes(live) == ['9']
+
+
+def test_truncated_export_is_rolled_back(make_db, tmp_path):
+    source = make_db('source.db')
+    source.add_movie('1', 1, '-100', 'Birinchi')
+    live = make_db('live.db')
+    live.add_movie('9', 9, '-100', 'Eski')
+
+    manifest = build_export(source)
+    try:
+        path = manifest['parts'][0]['path']
+        _rewrite_export(path, lambda records: records.pop())
+        with pytest.raises(RestoreError, match='footer'):
+            restore_from_files(live, [path], str(tmp_path))
+    finally:
+        cleanup_backup(manifest)
+    assert _movie_codes(live) == ['9']
@@ -0,0 +1,74 @@
+import pytest
+
+from utils.search_text import movie_search_text, normalize_search_text, trigrams, word_similarity
+
+
+@pytest.mark.parametrize('text', ["O‘tgan kunlar", "O'tgan kunlar", "Oʻtgan  KUNLAR", "Ўтган кунлар"])
+def test_spellings_normalize_to_one_form(text):
+    assert normalize_search_text(text) == 'otgan kunlar'
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("Ер юзи", 'yer yuzi'),
+    ("Шоҳ ва Гадо", 'shoh va gado'),
+    ("Ғаройиб саргузаштлар", 'garoyib sarguzashtlar'),
+    ("Щука", 'shuka'),
+    ("Café Ñandú", 'cafe nandu'),
+    ("Qo‘rqma!  2-qism", 'qorqma 2 qism'),
+    ("", ''),
+    (None, ''),
+])
+def test_normalize(text, expected):
+    assert normalize_search_text(text) == expected
+
+
+def test_movie_search_text_joins_name_and_genre():
+    assert movie_search_text("Ўтган кунлар", "Драма") == 'otgan kunlar drama'
+    assert movie_search_text(None, "Drama") == 'drama'
+    assert movie_search_text(None, None) == ''
+
+
+def test_trigrams_are_padded_per_word():
+    assert trigrams('ab') == {'  a', ' ab', 'ab '}
+    assert trigrams('ab cd') == {'  a', ' ab', 'ab ', '  c', ' cd', 'cd '}
+    assert trigrams('') == frozenset()
+
+
+def test_word_similarity():
+    assert word_similarity('avatar', 'avatar 2') == 1.0
+    assert word_similarity('avatar', 'the avatar') == 1.0
+    assert word_similarity('avtar', 'avatar') > 0.5
+    assert word_similarity('xyz', 'avatar') == 0.0
+    assert word_similarity('', 'avatar') == 0.0
+    # So'z boshidagi trigrammalar faqat so'z boshiga mos keladi
+    assert word_similarity('tar', 'avatar') < word_similarity('tar', 'tarix')
+
+
+@pytest.fixture
+def movies_db(db):
+    db.add_movie('1', 1, '-100', "O‘tgan kunlar", 'Drama')
+    db.add_movie('2', 2, '-100', 'Avatar')
+    db.add_movie('3', 3, '-100', 'Avatar 2')
+    db.add_movie('4', 4, '-100', 'Ota-ona')
+    return db
+
+
+def _codes(results):
+    return [row[0] for row in results]
+
+
+def test_search_matches_any_spelling(movies_db):
+    assert _codes(movies_db.search_movies('Ўтган')) == ['1']
+    assert _codes(movies_db.search_movies("o'tgan kun")) == ['1']
+    assert _codes(movies_db.search_movies('drama')) == ['1']
+
+
+def test_search_skips_dead_movies(movies_db):
+    movies_db.set_movies_status([('dead', '3')])
+    assert _codes(movies_db.search_movies('avatar')) == ['2']
+
+
+def test_search_finds_misspelled_titles(movies_db):
+    if movies_db.movie_search_mode != 'fts':
+        pytest.skip('SQLite FTS5 (trigram) mavjud emas')
+    assert set(_codes(movies_db.search_movies('avtar'))) == {'2', '3'}
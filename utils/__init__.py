@@ -0,0 +1,3 @@
+from .cache import TTLCache, MISSING
+
+__all__ = ['TTLCache', 'MISSING']
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+from typing import Dict, List, Optional
+
+from config import BACKUP_CHAT_ID, BACKUP_DIR, BACKUP_FULL_EVERY, BACKUP_KEEP_FULL
+from database.backup import cleanup_backup, format_size
+from database.export import build_export
+from utils.scheduler import BULK
+from utils.telegram_request import traffic_class
+
+logger = logging.getLogger(__name__)
+
+FULL = 'full'
+INCREMENTAL = 'incremental'
+
+
+class BackupScheduler:
+    """Jadval bo'yicha backup: kam-kam to'liq nusxa, oralig'ida faqat o'zgarganlar
+
+    Har bir ishga tushishda oxirgi backupdan beri o'zgargan `users`/`movies`
+    qatorlari (va kichik jadvallar to'liq) JSONL eksport sifatida olinadi.
+    Har `full_every` marta bir to'liq nusxa olinadi. Nusxalar `directory`
+    papkasiga yoki `chat_id` chatiga yuboriladi; `keep_full` ta eng yangi to'liq
+    nusxa va ulardan keyingi inkrementallar saqlanadi, qolganlari o'chiriladi.
+    Tiklash: to'liq nusxa, keyin undan keyingi inkrementallar tartib bilan /restoredb.
+    """
+
+    def __init__(
+        self,
+        db,
+        directory: str = BACKUP_DIR,
+        chat_id: int = BACKUP_CHAT_ID,
+        full_every: int = BACKUP_FULL_EVERY,
+        keep_full: int = BACKUP_KEEP_FULL,
+    ):
+        self.db = db
+        self.directory = directory
+        self.chat_id = chat_id
+        self.full_every = max(1, full_every)
+        self.keep_full = max(1, keep_full)
+        self._lock = asyncio.Lock()
+
+    def _next_since(self, logs: List[Dict]) -> Optional[str]:
+        """Inkremental uchun boshlanish vaqti; None - to'liq nusxa kerak"""
+        last_full = None
+        for index, log in enumerate(logs):
+            if log['kind'] == FULL:
+                last_full = index
+        if last_full is None:
+            return None
+        if len(logs) - last_full >= self.full_every:
+            return None
+        return logs[-1]['snapshot_at']
+
+    async def run(self, bot) -> Optional[Dict]:
+        """Bitta backup olish, yetkazish va eskilarini tozalash"""
+        if self._lock.locked():
+            return None
+        async with self._lock:
+            logs = self.db.get_backup_logs()
+            since = self._next_since(logs)
+            manifest = await asyncio.to_thread(build_export, self.db, since=since)
+            try:
+                destination, location = await self._deliver(bot, manifest)
+            finally:
+                cleanup_backup(manifest)
+
+            kind = INCREMENTAL if since else FULL
+            self.db.add_backup_log(
+                kind,
+                manifest['snapshot_at'],
+                since,
+                manifest['size'],
+                manifest['compressed_size'],
+                destination,
+                json.dumps(location)
+            )
+            logger.info(
+                f"Avtomatik backup ({kind}): {format_size(manifest['compressed_size'])}, "
+                f"{manifest['duration_seconds']:.1f} s"
+            )
+            await self._prune(bot)
+            return manifest
+
+    async def _deliver(self, bot, manifest: Dict):
+        files = [part['path'] for part in manifest['parts']] + [manifest['manifest_path']]
+        if self.directory:
+            target_dir = os.path.abspath(self.directory)
+            os.makedirs(target_dir, exist_ok=True)
+            stored = []
+            for path in files:
+                destination = os.path.join(target_dir, os.path.basename(path))
+                await asyncio.to_thread(shutil.move, path, destination)
+                stored.append(destination)
+            return 'dir', stored
+
+        message_ids = []
+        kind = "inkremental" if manifest.get('incremental') else "to'liq"
+        with traffic_class(BULK):
+            for path in files:
+                with open(path, 'rb') as handle:
+                    message = await bot.send_document(
+                        chat_id=self.chat_id,
+                        document=handle,
+                        filename=os.path.basename(path),
+                        caption=f"🗄 Avtomatik backup ({kind})" if path == manifest['manifest_path'] else None,
+                        disable_notification=True,
+                        write_timeout=120,
+                        read_timeout=120
+                    )
+                message_ids.append(message.message_id)
+        return f"chat:{self.chat_id}", message_ids
+
+    async def _prune(self, bot):
+        """Saqlash siyosati: eng yangi `keep_full` ta to'liq nusxadan eskilarini o'chirish"""
+        logs = self.db.get_backup_logs()
+        full_ids = [log['id'] for log in logs if log['kind'] == FULL]
+        if len(full_ids) <= self.keep_full:
+            return
+        oldest_kept = full_ids[-self.keep_full]
+        for log in logs:
+            if log['id'] >= oldest_kept:
+                break
+            await self._remove(bot, log)
+            self.db.set_backup_log_status(log['id'], 'pruned')
+
+    async def _remove(self, bot, log: Dict):
+        try:
+            location = json.loads(log['location'] or '[]')
+        except ValueError:
+            location = []
+        destination = log['destination'] or ''
+        if destination == 'dir':
+            for path in location:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        elif destination.startswith('chat:'):
+            chat_id = int(destination.split(':', 1)[1])
+            for message_id in location:
+                try:
+                    await bot.delete_message(chat_id=chat_id, message_id=message_id)
+                except Exception:
+                    pass
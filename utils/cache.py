@@ -0,0 +1,58 @@
+import time
+from typing import Any, Hashable
+
+# Keshda "qiymat yo'q" holatini None dan ajratish uchun belgi
+MISSING = object()
+
+
+class TTLCache:
+    """Yashash muddati (TTL) cheklangan oddiy xotira keshi
+
+    Asyncio hodisalar siklida bitta oqimdan foydalanish uchun mo'ljallangan.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is not None:
+            expires_at, value = item
+            if expires_at > time.monotonic():
+                self.hits += 1
+                return value
+            self._data.pop(key, None)
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: float = None):
+        if key not in self._data and len(self._data) >= self.maxsize:
+            self._evict()
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.pop(key, None)
+        return item[1] if item is not None else default
+
+    def clear(self):
+        self._data.clear()
+
+    def _evict(self):
+        """Eskirgan yozuvlarni, ular yetmasa eng eski 10% yozuvni o'chirish"""
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._data.items() if expires_at <= now]
+        for key in expired:
+            del self._data[key]
+        if len(self._data) >= self.maxsize:
+            for key in list(self._data)[:max(1, self.maxsize // 10)]:
+                del self._data[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, MISSING) is not MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
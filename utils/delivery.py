@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import random
+from typing import Awaitable, Callable, Dict, Optional
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+from config import (
+    DELIVERY_BASE_DELAY,
+    DELIVERY_INLINE_WAIT,
+    DELIVERY_MAX_ATTEMPTS,
+    DELIVERY_MAX_DELAY,
+    DELIVERY_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Yuborish natijalari
+DELIVERED = 'delivered'
+QUEUED = 'queued'
+FAILED = 'failed'
+
+# Xatolik turlari
+TRANSIENT = 'transient'      # vaqtinchalik: qayta urinib ko'rish mumkin
+PERMANENT = 'permanent'      # doimiy: kino xabari o'chirilgan, kanal topilmadi va h.k.
+RECIPIENT = 'recipient'      # foydalanuvchi botni bloklagan - kino kodi aybdor emas
+
+
+def classify_error(error: Exception) -> str:
+    """Telegram xatosini turini aniqlash"""
+    if isinstance(error, RetryAfter):
+        return TRANSIENT
+    if isinstance(error, Forbidden):
+        return RECIPIENT
+    # BadRequest ham NetworkError dan meros oladi, shuning uchun avval tekshiriladi
+    if isinstance(error, BadRequest):
+        return PERMANENT
+    if isinstance(error, (TimedOut, NetworkError)):
+        return TRANSIENT
+    return PERMANENT
+
+
+# Baza kanaldagi manba post o'chirilganini bildiruvchi xatolar. "chat not found" bu yerda
+# emas: u qabul qiluvchi chatga ham tegishli bo'lishi mumkin, kino esa joyida
+MISSING_MESSAGE_ERRORS = (
+    'message to copy not found',
+    'message to forward not found',
+    'message_id_invalid',
+)
+
+
+def is_missing_message_error(error: Exception) -> bool:
+    """Xatolik manba xabar yo'qligini bildiradimi (kino "o'lik")"""
+    if not isinstance(error, BadRequest):
+        return False
+    text = str(error).lower()
+    return any(marker in text for marker in MISSING_MESSAGE_ERRORS)
+
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    value = error.retry_after
+    if hasattr(value, 'total_seconds'):
+        value = value.total_seconds()
+    return float(value)
+
+
+class DeliveryJob:
+    """Navbatdagi bitta yuborish"""
+
+    def __init__(
+        self,
+        send: Callable[[], Awaitable],
+        key: str,
+        on_success: Optional[Callable[[], Awaitable]] = None,
+        on_failure: Optional[Callable[[Exception, int], Awaitable]] = None,
+    ):
+        self.send = send
+        self.key = key
+        self.on_success = on_success
+        self.on_failure = on_failure
+        self.attempts = 0
+        self.last_error: Optional[Exception] = None
+
+
+class DeliveryQueue:
+    """Qayta urinishli yuborish navbati
+
+    Birinchi urinishlar so'rov ichida bajariladi (foydalanuvchi kutadi), lekin ular
+    `inline_wait` soniyadan oshmaydi. Agar vaqtinchalik xatolik (timeout, flood wait)
+    davom etsa, yuborish fondagi navbatga o'tadi va u yerda jitterli eksponensial
+    kechikish bilan `max_attempts` gacha qayta uriniladi. RetryAfter kelganda
+    Telegram ko'rsatgan vaqt kutiladi.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = DELIVERY_MAX_ATTEMPTS,
+        base_delay: float = DELIVERY_BASE_DELAY,
+        max_delay: float = DELIVERY_MAX_DELAY,
+        inline_wait: float = DELIVERY_INLINE_WAIT,
+        workers: int = DELIVERY_WORKERS,
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.inline_wait = inline_wait
+        self.workers = max(1, workers)
+        self._queue: Optional[asyncio.Queue] = None
+        # Kechiktirib navbatga qo'yiladigan ishlar va ularning taymerlari (stop() bekor qiladi)
+        self._scheduled: Dict[DeliveryJob, asyncio.TimerHandle] = {}
+        self._tasks = []
+
+    def backoff(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """Keyingi urinishgacha kutish vaqti (full jitter)"""
+        if isinstance(error, RetryAfter):
+            # Flood wait: Telegram aytgan vaqtdan oldin urinish befoyda
+            return _retry_after_seconds(error) + random.uniform(0, self.base_delay)
+        ceiling = min(self.max_delay, self.base_delay * (2 ** max(0, attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    async def _attempt(self, job: DeliveryJob) -> Optional[str]:
+        """Bitta urinish: muvaffaqiyatli bo'lsa None, aks holda xatolik turi"""
+        job.attempts += 1
+        try:
+            await job.send()
+        except Exception as exc:
+            job.last_error = exc
+            return classify_error(exc)
+        job.last_error = None
+        return None
+
+    async def deliver(self, job: DeliveryJob) -> str:
+        """Yuborish: DELIVERED, QUEUED yoki FAILED qaytaradi
+
+        FAILED bo'lganda `job.last_error` da sabab saqlanadi, `on_failure` chaqirilmaydi
+        (javobni chaqiruvchining o'zi beradi).
+        """
+        waited = 0.0
+        while True:
+            kind = await self._attempt(job)
+            if kind is None:
+                return DELIVERED
+            if kind != TRANSIENT or job.attempts >= self.max_attempts:
+                return FAILED
+            delay = self.backoff(job.attempts, job.last_error)
+            if waited + delay > self.inline_wait:
+                break
+            await asyncio.sleep(delay)
+            waited += delay
+
+        self._schedule(job, delay)
+        logger.info(f"Yuborish navbatga qo'yildi ({job.key}): {job.last_error}")
+        return QUEUED
+
+    def pending(self) -> int:
+        return len(self._scheduled) + (self._queue.qsize() if self._queue else 0)
+
+    def _schedule(self, job: DeliveryJob, delay: float):
+        """Ishni `delay` soniyadan keyin navbatga qo'yish (worker kutib o'tirmaydi)"""
+        self._ensure_workers()
+        self._scheduled[job] = asyncio.get_running_loop().call_later(delay, self._enqueue, job)
+
+    def _enqueue(self, job: DeliveryJob):
+        self._scheduled.pop(job, None)
+        self._queue.put_nowait(job)
+
+    def _ensure_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._retry(job)
+            except Exception as exc:
+                logger.error(f"Yuborish navbatida kutilmagan xatolik ({job.key}): {exc}")
+            finally:
+                self._queue.task_done()
+
+    async def _retry(self, job: DeliveryJob):
+        kind = await self._attempt(job)
+        if kind is None:
+            if job.on_success:
+                await job.on_success()
+            return
+        if kind != TRANSIENT or job.attempts >= self.max_attempts:
+            logger.warning(f"Yuborib bo'lmadi ({job.key}, {job.attempts} urinish): {job.last_error}")
+            if job.on_failure:
+                await job.on_failure(job.last_error, job.attempts)
+            return
+        self._schedule(job, self.backoff(job.attempts, job.last_error))
+
+    async def stop(self):
+        # Taymerlar ham bekor qilinadi: aks holda ular to'xtatilgan navbatga ish qo'yaveradi
+        if self._scheduled:
+            logger.info(f"Yuborish navbati to'xtatildi, {len(self._scheduled)} ta qayta urinish bekor qilindi")
+        for handle in self._scheduled.values():
+            handle.cancel()
+        self._scheduled.clear()
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._queue = None
+
+
+delivery_queue = DeliveryQueue()
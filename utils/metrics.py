@@ -0,0 +1,355 @@
+import asyncio
+import functools
+import inspect
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+# Kechikish gistogrammalari chegaralari (soniya)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+INF_LABEL = 'le="+Inf"'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [bucket_1, ..., bucket_n, count, sum]
+        self._values: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            data = self._values.get(labels)
+            if data is None:
+                data = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[index] += 1
+                    break
+            data[-2] += 1
+            data[-1] += value
+
+    def summary(self) -> Dict[Tuple, Tuple[int, float]]:
+        """labels -> (chaqiruvlar soni, umumiy vaqt)"""
+        with self._lock:
+            return {labels: (data[-2], data[-1]) for labels, data in self._values.items()}
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((labels, list(data)) for labels, data in self._values.items())
+        for labels, data in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, INF_LABEL)} {data[-2]}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {data[-2]}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(data[-1])}"
+
+
+class Gauge:
+    """Qiymati o'qish paytida callback orqali olinadigan ko'rsatkich
+
+    `collect()` {labels_tuple: value} lug'atini yoki bitta sonni qaytaradi.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], collect: Callable):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> Iterable[str]:
+        try:
+            values = self.collect()
+        except Exception as exc:
+            logger.debug(f"{self.name} ko'rsatkichini olib bo'lmadi: {exc}")
+            return
+        if not isinstance(values, dict):
+            values = {(): values}
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._caches: Dict[str, object] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str], collect: Callable) -> Gauge:
+        metric = Gauge(name, documentation, labelnames, collect)
+        self._metrics.append(metric)
+        return metric
+
+    def register_cache(self, name: str, cache):
+        """`hits`/`misses` hisoblagichlari bor keshni (TTLCache) kuzatuvga qo'shish"""
+        self._caches[name] = cache
+
+    def _cache_values(self, attribute: str) -> Dict[Tuple, float]:
+        return {(name,): getattr(cache, attribute, 0) for name, cache in self._caches.items()}
+
+    def _cache_ratios(self) -> Dict[Tuple, float]:
+        ratios = {}
+        for name, cache in self._caches.items():
+            total = cache.hits + cache.misses
+            ratios[(name,)] = round(cache.hits / total, 4) if total else 0.0
+        return ratios
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+HANDLER_LATENCY = registry.histogram(
+    'prokino_handler_seconds', "Update handlerlari ishlash vaqti", ('handler',)
+)
+HANDLER_ERRORS = registry.counter(
+    'prokino_handler_errors_total', "Handlerlarda ushlanmagan xatoliklar", ('handler',)
+)
+DB_LATENCY = registry.histogram(
+    'prokino_db_seconds', "DatabaseManager metodlari ishlash vaqti", ('method',),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+BOT_API_LATENCY = registry.histogram(
+    'prokino_bot_api_seconds', "Bot API so'rovlari kechikishi", ('method',)
+)
+BOT_API_ERRORS = registry.counter(
+    'prokino_bot_api_errors_total', "Muvaffaqiyatsiz Bot API so'rovlari", ('method',)
+)
+registry.gauge(
+    'prokino_cache_hits', "Kesh topilgan so'rovlar", ('cache',),
+    lambda: registry._cache_values('hits')
+)
+registry.gauge(
+    'prokino_cache_misses', "Keshda topilmagan so'rovlar", ('cache',),
+    lambda: registry._cache_values('misses')
+)
+registry.gauge(
+    'prokino_cache_hit_ratio', "Kesh samaradorligi (hits / jami)", ('cache',),
+    registry._cache_ratios
+)
+registry.gauge(
+    'prokino_cache_entries', "Keshdagi yozuvlar soni", ('cache',),
+    lambda: {(name,): len(cache) for name, cache in registry._caches.items()}
+)
+
+
+def timed(histogram: Histogram, label: str, errors: Optional[Counter] = None, span_kind: Optional[str] = None):
+    """Funksiya (sync yoki async) ishlash vaqtini gistogrammaga yozuvchi dekorator
+
+    `span_kind` berilsa, chaqiruv joriy trace ga ham span sifatida qo'shiladi.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                failed = False
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    failed = True
+                    if errors is not None:
+                        errors.inc(label)
+                    raise
+                finally:
+                    duration = time.perf_counter() - started
+                    histogram.observe(duration, label)
+                    if span_kind:
+                        tracing.record(span_kind, label, started, duration, failed)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            failed = False
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                failed = True
+                if errors is not None:
+                    errors.inc(label)
+                raise
+            finally:
+                duration = time.perf_counter() - started
+                histogram.observe(duration, label)
+                if span_kind:
+                    tracing.record(span_kind, label, started, duration, failed)
+        return wrapper
+    return decorator
+
+
+def instrument_object(
+    obj,
+    histogram: Histogram,
+    names: Optional[Iterable[str]] = None,
+    exclude: Iterable[str] = (),
+    span_kind: Optional[str] = None
+):
+    """Obyektning ochiq metodlarini (yoki `names` dagilarini) o'lchanadigan qilib almashtirish"""
+    excluded = set(exclude)
+    if names is None:
+        names = [
+            name for name, member in inspect.getmembers(type(obj), inspect.isfunction)
+            if not name.startswith('_') and not inspect.isgeneratorfunction(member)
+        ]
+    for name in names:
+        if name in excluded:
+            continue
+        method = getattr(obj, name, None)
+        if callable(method):
+            setattr(obj, name, timed(histogram, name, span_kind=span_kind)(method))
+
+
+def handler_label(handler) -> str:
+    """Handler nomi: callback uchun pattern, buyruq uchun /command, qolganlari funksiya nomi"""
+    pattern = getattr(handler, 'pattern', None)
+    if pattern is not None:
+        return getattr(pattern, 'pattern', str(pattern))
+    commands = getattr(handler, 'commands', None)
+    if commands:
+        return '/' + sorted(commands)[0]
+    return getattr(handler.callback, '__name__', type(handler).__name__)
+
+
+def instrument_application(application):
+    """Ro'yxatdan o'tgan barcha handlerlarni o'lchash va kuzatish (add_handler lardan keyin chaqiriladi)"""
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            label = handler_label(handler)
+            callback = timed(HANDLER_LATENCY, label, HANDLER_ERRORS)(handler.callback)
+            handler.callback = tracing.tracer.wrap_handler(label, callback)
+
+
+class MetricsServer:
+    """Minimal HTTP server: GET /metrics (Prometheus matn formati)
+
+    Boshqa yo'llarni `routes` ga qo'shish mumkin: path -> () -> (status, content_type, body).
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.routes: Dict[str, Callable] = {
+            '/metrics': lambda: (200, CONTENT_TYPE, registry.render()),
+        }
+        self._server = None
+
+    async def start(self):
+        try:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            logger.info(f"Metrics: http://{self.host}:{self.port}/metrics")
+        except OSError as exc:
+            logger.warning(f"Metrics serverini ishga tushirib bo'lmadi: {exc}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Sarlavhalarni o'qib tashlaymiz
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=5)
+                if not line or line in (b'\r\n', b'\n'):
+                    break
+            parts = request_line.decode('latin-1').split()
+            path = parts[1].split('?', 1)[0] if len(parts) > 1 else '/'
+            route = self.routes.get(path)
+            if parts and parts[0] != 'GET':
+                status, content_type, body = 405, 'text/plain', 'Method Not Allowed\n'
+            elif route is None:
+                status, content_type, body = 404, 'text/plain', 'Not Found\n'
+            else:
+                result = route()
+                if inspect.isawaitable(result):
+                    result = await result
+                status, content_type, body = result
+            payload = body.encode('utf-8')
+            writer.write(
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Connection: close\r\n\r\n".encode('latin-1') + payload
+            )
+            await writer.drain()
+        except Exception as exc:
+            logger.debug(f"Metrics so'rovida xatolik: {exc}")
+        finally:
+            writer.close()
@@ -0,0 +1,157 @@
+import asyncio
+import html
+import logging
+import time
+from typing import Dict, List, Optional
+
+from config import MOVIE_CHECK_BATCH_SIZE, MOVIE_CHECK_CHAT_ID, MOVIE_CHECK_CONCURRENCY
+from utils.delivery import RECIPIENT, TRANSIENT, classify_error, is_missing_message_error
+from utils.scheduler import BULK
+from utils.telegram_request import traffic_class
+
+logger = logging.getLogger(__name__)
+
+MOVIE_OK = 'ok'
+MOVIE_DEAD = 'dead'
+
+
+class ScanAborted(Exception):
+    """Tekshiruv chati yoki baza kanal bilan ishlab bo'lmaydi: kinolar holati o'zgartirilmaydi"""
+
+
+class MovieScanner:
+    """Baza kanaldagi kino postlari hali mavjudligini tekshiruvchi
+
+    Har bir kino `MOVIE_CHECK_CHAT_ID` ga ovozsiz nusxalanadi va nusxa darhol
+    o'chiriladi. Faqat manba post yo'qligi haqidagi xato kinoni 'dead' qiladi;
+    chat topilmasa yoki bot chatdan chiqarilgan bo'lsa tekshiruv to'xtatiladi.
+
+    Kinolar id bo'yicha bo'laklab o'qiladi, bir vaqtda `concurrency`
+    tagacha so'rov yuboriladi; so'rovlar BULK sinfida ketadi, shuning uchun
+    global tezlik chegarasi va foydalanuvchilarga javob ustuvorligi saqlanadi.
+    """
+
+    def __init__(
+        self,
+        db,
+        check_chat_id: int = MOVIE_CHECK_CHAT_ID,
+        batch_size: int = MOVIE_CHECK_BATCH_SIZE,
+        concurrency: int = MOVIE_CHECK_CONCURRENCY,
+    ):
+        self.db = db
+        self.check_chat_id = check_chat_id
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    async def _check_one(self, bot, semaphore: asyncio.Semaphore, movie) -> Optional[str]:
+        """Bitta kinoni tekshirish: 'ok', 'dead' yoki None (aniqlab bo'lmadi)"""
+        _, code, message_id, channel_id, _ = movie
+        async with semaphore:
+            try:
+                copied = await bot.copy_message(
+                    chat_id=self.check_chat_id,
+                    from_chat_id=channel_id,
+                    message_id=message_id,
+                    disable_notification=True
+                )
+            except Exception as exc:
+                if is_missing_message_error(exc):
+                    return MOVIE_DEAD
+                if classify_error(exc) == RECIPIENT or 'chat not found' in str(exc).lower():
+                    # Tekshiruv chati yoki baza kanal bilan muammo - kinolar aybdor emas
+                    raise ScanAborted(str(exc)) from exc
+                if classify_error(exc) != TRANSIENT:
+                    logger.warning(f"Kino {code} ni tekshirib bo'lmadi: {exc}")
+                return None
+            try:
+                await bot.delete_message(chat_id=self.check_chat_id, message_id=copied.message_id)
+            except Exception:
+                pass
+            return MOVIE_OK
+
+    async def scan(self, bot) -> Dict:
+        """Barcha kinolarni tekshirish va holatini bazaga yozish"""
+        if self.running:
+            return {'skipped': True}
+        async with self._lock:
+            started = time.monotonic()
+            report = {'checked': 0, 'ok': 0, 'dead': [], 'unknown': 0, 'revived': 0}
+            if not self.check_chat_id:
+                report['error'] = "MOVIE_CHECK_CHAT_ID sozlanmagan"
+                return report
+            semaphore = asyncio.Semaphore(self.concurrency)
+            with traffic_class(BULK):
+                try:
+                    await bot.get_chat(self.check_chat_id)
+                except Exception as exc:
+                    report['error'] = f"tekshiruv chati ({self.check_chat_id}) mavjud emas: {exc}"
+                    logger.warning(f"Baza kanal tekshiruvi boshlanmadi: {report['error']}")
+                    return report
+                try:
+                    await self._scan_batches(bot, semaphore, report)
+                except ScanAborted as exc:
+                    report['error'] = f"chat bilan ishlab bo'lmadi: {exc}"
+                    logger.warning(f"Baza kanal tekshiruvi to'xtatildi: {exc}")
+            report['duration'] = time.monotonic() - started
+            logger.info(
+                f"Baza kanal tekshiruvi: {report['checked']} ta kino, "
+                f"{len(report['dead'])} ta topilmadi, {report['duration']:.1f} s"
+            )
+            return report
+
+    async def _scan_batches(self, bot, semaphore: asyncio.Semaphore, report: Dict):
+        last_id = 0
+        while True:
+            batch = self.db.get_movies_batch(last_id, self.batch_size)
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            results = await asyncio.gather(
+                *(self._check_one(bot, semaphore, movie) for movie in batch),
+                return_exceptions=True
+            )
+            # Bo'lak holati yozilmasdan to'xtatiladi
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            updates = []
+            for movie, status in zip(batch, results):
+                report['checked'] += 1
+                if status is None:
+                    report['unknown'] += 1
+                    continue
+                if status == MOVIE_DEAD:
+                    report['dead'].append(movie[1])
+                else:
+                    report['ok'] += 1
+                    if movie[4] == MOVIE_DEAD:
+                        report['revived'] += 1
+                updates.append((status, movie[1]))
+            self.db.set_movies_status(updates)
+
+
+def format_scan_report(report: Dict, limit: int = 50) -> str:
+    """Tekshiruv natijasini adminlar uchun matnga aylantirish"""
+    dead: List[str] = report.get('dead', [])
+    lines = [
+        "🔎 <b>Baza kanal tekshiruvi yakunlandi</b>\n",
+        f"🎬 Tekshirildi: {report.get('checked', 0)}",
+        f"✅ Joyida: {report.get('ok', 0)}",
+        f"❌ Topilmadi: {len(dead)}",
+    ]
+    if report.get('error'):
+        lines.insert(1, f"⛔️ Tekshiruv to'xtatildi: {html.escape(report['error'])}\n")
+    if report.get('unknown'):
+        lines.append(f"⚠️ Aniqlab bo'lmadi: {report['unknown']}")
+    if report.get('duration') is not None:
+        lines.append(f"⏱ Vaqt: {report['duration']:.0f} s")
+    if dead:
+        codes = ', '.join(f"<code>{code}</code>" for code in dead[:limit])
+        more = f" va yana {len(dead) - limit} ta" if len(dead) > limit else ""
+        lines.append(f"\n🗑 O'chirilgan postlar kodlari: {codes}{more}")
+    return '\n'.join(lines)
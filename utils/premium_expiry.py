@@ -0,0 +1,182 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import (
+    PREMIUM_CACHE_SYNC_SECONDS, PREMIUM_CACHE_TTL, PREMIUM_EXPIRY_BATCH, PREMIUM_REMIND_DAYS
+)
+from utils.scheduler import BULK
+from utils.telegram_request import traffic_class
+
+logger = logging.getLogger(__name__)
+
+# Bazadagi TIMESTAMP qiymatlari bilan solishtirish formati (CURRENT_TIMESTAMP - UTC)
+DB_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def db_time(value: Optional[datetime] = None) -> str:
+    value = value or datetime.now(timezone.utc)
+    return value.strftime(DB_TIME_FORMAT)
+
+
+def _db_value(value) -> Optional[str]:
+    """Baza qiymatini (str yoki datetime) solishtiriladigan matnga keltirish"""
+    return str(value)[:19] if value else None
+
+
+def _format_expiry(value) -> str:
+    text = str(value or '')
+    return text[:16] if text else '—'
+
+
+class PremiumExpiryEngine:
+    """Premium obunalar muddatini kuzatuvchi
+
+    Faol premium foydalanuvchilar xotirada saqlanadi: `user_id -> tugash vaqti`
+    lug'ati va tugash vaqti bo'yicha min-heap. `is_premium()` bazaga murojaat
+    qilmaydi (O(1)); muddati o'tganlar heap boshidan olib tashlanadi, yangi
+    obunalar esa har `sync_interval` soniyada faqat oxirgi ko'rilgan `id` dan
+    keyingi qatorlarni o'qib qo'shiladi. To'liq qayta yuklash `cache_ttl` da bir marta.
+
+    Davriy `run()` faqat (status, expires_at) indeksi bo'yicha muddati endi
+    o'tgan va yaqinda tugaydigan qatorlarni bo'laklab oladi, ularni belgilaydi
+    va foydalanuvchilarga BULK sinfida xabar yuboradi.
+    """
+
+    def __init__(
+        self,
+        db,
+        batch_size: int = PREMIUM_EXPIRY_BATCH,
+        remind_days: int = PREMIUM_REMIND_DAYS,
+        cache_ttl: int = PREMIUM_CACHE_TTL,
+        sync_interval: int = PREMIUM_CACHE_SYNC_SECONDS,
+    ):
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        self.remind_days = remind_days
+        self.cache_ttl = cache_ttl
+        self.sync_interval = sync_interval
+        # user_id -> eng kech tugash vaqti (None - muddatsiz)
+        self._expires: Optional[Dict[int, Optional[str]]] = None
+        self._heap: List[Tuple[str, int]] = []
+        self._last_row_id = 0
+        self._loaded_at = 0.0
+        self._synced_at = 0.0
+        self._evicted_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def refresh(self) -> Dict[int, Optional[str]]:
+        """Faol obunalarni bazadan to'liq qayta yuklash"""
+        self._expires = {}
+        self._heap = []
+        self._last_row_id = 0
+        self._apply_rows(self.db.get_active_premium_rows(db_time()))
+        self._loaded_at = self._synced_at = time.monotonic()
+        return self._expires
+
+    def sync(self):
+        """Oxirgi yuklashdan keyin qo'shilgan obunalarni o'qish"""
+        self._apply_rows(self.db.get_active_premium_rows(db_time(), self._last_row_id))
+        self._synced_at = time.monotonic()
+
+    def _apply_rows(self, rows: List[Tuple]):
+        for row_id, user_id, expires_at in rows:
+            self._last_row_id = max(self._last_row_id, row_id)
+            self._extend(user_id, _db_value(expires_at))
+
+    def _extend(self, user_id: int, expires_at: Optional[str]):
+        if user_id in self._expires:
+            current = self._expires[user_id]
+            if current is None or (expires_at is not None and expires_at <= current):
+                return
+        self._expires[user_id] = expires_at
+        if expires_at is not None:
+            heapq.heappush(self._heap, (expires_at, user_id))
+
+    def _evict(self, now: str):
+        heap = self._heap
+        while heap and heap[0][0] < now:
+            expires_at, user_id = heapq.heappop(heap)
+            # Uzaytirilgan obunaning eski yozuvi bo'lsa, tashlab ketiladi
+            if self._expires.get(user_id) == expires_at:
+                del self._expires[user_id]
+
+    def invalidate(self):
+        self._expires = None
+
+    def active_expiries(self) -> Dict[int, Optional[str]]:
+        now = time.monotonic()
+        if self._expires is None or now - self._loaded_at > self.cache_ttl:
+            self.refresh()
+        elif now - self._synced_at > self.sync_interval:
+            self.sync()
+        if self._heap and now - self._evicted_at >= 1:
+            self._evict(db_time())
+            self._evicted_at = now
+        return self._expires
+
+    def active_ids(self) -> Set[int]:
+        return set(self.active_expiries())
+
+    def is_premium(self, user_id: int) -> bool:
+        return user_id in self.active_expiries()
+
+    def add(self, user_id: int, expires_at=None):
+        """Obuna faollashtirilganda keshni darhol yangilash"""
+        self.active_expiries()
+        self._extend(user_id, _db_value(expires_at))
+
+    async def _notify(self, bot, rows: List[Dict], text_for) -> int:
+        async def send(row):
+            try:
+                await bot.send_message(row['user_id'], text_for(row), parse_mode='HTML')
+                return True
+            except Exception as exc:
+                logger.debug(f"Premium xabarini {row['user_id']} ga yuborib bo'lmadi: {exc}")
+                return False
+
+        # Tezlik chegarasini global navbat (OutboundScheduler) ta'minlaydi
+        with traffic_class(BULK):
+            results = await asyncio.gather(*(send(row) for row in rows))
+        return sum(results)
+
+    async def run(self, bot) -> Dict[str, int]:
+        """Bitta tekshiruv: muddati o'tganlarni yopish va eslatmalar yuborish"""
+        report = {'expired': 0, 'reminded': 0}
+        if self._lock.locked():
+            return report
+        async with self._lock:
+            now = datetime.now(timezone.utc)
+            while True:
+                rows = self.db.get_expired_premium_users(db_time(now), self.batch_size)
+                if not rows:
+                    break
+                self.db.mark_premium_expired([row['id'] for row in rows])
+                report['expired'] += len(rows)
+                await self._notify(bot, rows, lambda row: (
+                    "⌛️ <b>Premium obunangiz muddati tugadi</b>\n\n"
+                    "Premiumni davom ettirish uchun «💎 Premium obuna» tugmasidan foydalaning."
+                ))
+
+            if self.remind_days > 0:
+                until = now + timedelta(days=self.remind_days)
+                while True:
+                    rows = self.db.get_expiring_premium_users(db_time(now), db_time(until), self.batch_size)
+                    if not rows:
+                        break
+                    self.db.mark_premium_reminded([row['id'] for row in rows])
+                    report['reminded'] += len(rows)
+                    await self._notify(bot, rows, lambda row: (
+                        "🔔 <b>Premium obunangiz tez orada tugaydi</b>\n\n"
+                        f"Tugash vaqti: {_format_expiry(row['expires_at'])} (UTC)\n"
+                        "Uzaytirish uchun «💎 Premium obuna» tugmasini bosing."
+                    ))
+
+            if report['expired'] and self._expires is not None:
+                self._evict(db_time(now))
+            if report['expired'] or report['reminded']:
+                logger.info(f"Premium nazorati: {report['expired']} ta tugadi, {report['reminded']} ta eslatma")
+        return report
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Namuna olish oralig'i (soniya) va hisobotdagi qatorlar soni
+SAMPLE_INTERVAL = 0.005
+TOP_FUNCTIONS = 25
+# Event loop kechikishini o'lchash oralig'i
+LAG_PROBE_INTERVAL = 0.05
+MAX_DURATION = 120
+
+
+def _frame_key(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    # Loyiha fayllari qisqa, kutubxonalar esa site-packages dan keyingi qism bilan
+    for marker in ('site-packages' + os.sep, 'lib' + os.sep + 'python'):
+        if marker in filename:
+            filename = filename.split(marker, 1)[1]
+            break
+    else:
+        filename = os.path.relpath(filename) if os.path.isabs(filename) else filename
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Berilgan thread (odatda event loop) stekidan muntazam namuna oluvchi profiler
+
+    Alohida thread har `interval` soniyada `sys._current_frames()` orqali
+    stekni o'qiydi: kuzatilayotgan kod to'xtatilmaydi va o'zgartirilmaydi.
+    """
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = 0
+        self.self_counts: Counter = Counter()
+        self.total_counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            self.self_counts[_frame_key(frame)] += 1
+            seen = set()
+            while frame is not None:
+                key = _frame_key(frame)
+                if key not in seen:
+                    seen.add(key)
+                    self.total_counts[key] += 1
+                frame = frame.f_back
+
+
+class SlowCallbackCollector(logging.Handler):
+    """asyncio debug rejimidagi "Executing ... took N seconds" xabarlarini yig'ish"""
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.messages: List[str] = []
+
+    def emit(self, record: logging.LogRecord):
+        if len(self.messages) < 200:
+            self.messages.append(record.getMessage())
+
+
+async def _probe_loop_lag(stop: asyncio.Event, interval: float = LAG_PROBE_INTERVAL) -> List[float]:
+    lags = []
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - expected))
+    return lags
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _task_summary() -> Dict[str, int]:
+    counts: Counter = Counter()
+    for task in asyncio.all_tasks():
+        coro = task.get_coro()
+        counts[getattr(coro, '__qualname__', type(coro).__name__)] += 1
+    return dict(counts.most_common(10))
+
+
+_lock = asyncio.Lock()
+
+
+def is_running() -> bool:
+    return _lock.locked()
+
+
+async def profile(duration: float, debug: bool = False, slow_callback_ms: float = 50.0) -> str:
+    """Ishlab turgan botni `duration` soniya profillash va matnli hisobot qaytarish
+
+    debug=True bo'lsa, shu vaqt davomida asyncio debug rejimi yoqiladi va
+    `slow_callback_ms` dan uzoq bajarilgan callbacklar hisobotga qo'shiladi.
+    """
+    duration = max(1.0, min(float(duration), MAX_DURATION))
+    async with _lock:
+        loop = asyncio.get_running_loop()
+        profiler = SamplingProfiler(threading.get_ident())
+        collector = None
+        previous_debug = loop.get_debug()
+        previous_slow = loop.slow_callback_duration
+        if debug:
+            collector = SlowCallbackCollector()
+            logging.getLogger('asyncio').addHandler(collector)
+            loop.slow_callback_duration = slow_callback_ms / 1000
+            loop.set_debug(True)
+
+        tasks_before = _task_summary()
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe_loop_lag(stop))
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            profiler.stop()
+            stop.set()
+            lags = await probe
+            if debug:
+                loop.set_debug(previous_debug)
+                loop.slow_callback_duration = previous_slow
+                logging.getLogger('asyncio').removeHandler(collector)
+        elapsed = time.perf_counter() - started
+        tasks_after = _task_summary()
+
+    return format_report(profiler, elapsed, lags, tasks_before, tasks_after, collector)
+
+
+def format_report(
+    profiler: SamplingProfiler,
+    elapsed: float,
+    lags: List[float],
+    tasks_before: Dict[str, int],
+    tasks_after: Dict[str, int],
+    collector: Optional[SlowCallbackCollector] = None
+) -> str:
+    samples = max(1, profiler.samples)
+    lines = [
+        f"Profil: {elapsed:.1f} s, {profiler.samples} ta namuna (har {profiler.interval * 1000:.0f} ms)",
+        "",
+        "== Event loop kechikishi ==",
+        f"o'rtacha {sum(lags) / len(lags) * 1000 if lags else 0:.1f} ms, "
+        f"p99 {_percentile(lags, 0.99) * 1000:.1f} ms, max {max(lags, default=0) * 1000:.1f} ms "
+        f"({len(lags)} o'lchov)",
+        "",
+        "== Eng ko'p vaqt olgan funksiyalar (o'zi, %) ==",
+    ]
+    for key, count in profiler.self_counts.most_common(TOP_FUNCTIONS):
+        lines.append(f"{count / samples * 100:6.1f}%  {key}")
+    lines += ["", "== Stekda bo'lgan funksiyalar (jami, %) =="]
+    for key, count in profiler.total_counts.most_common(TOP_FUNCTIONS):
+        lines.append(f"{count / samples * 100:6.1f}%  {key}")
+    lines += ["", "== asyncio vazifalari (boshida -> oxirida) =="]
+    for name in sorted(set(tasks_before) | set(tasks_after), key=lambda n: -tasks_after.get(n, 0)):
+        lines.append(f"{tasks_before.get(name, 0):4d} -> {tasks_after.get(name, 0):4d}  {name}")
+    if collector is not None:
+        lines += ["", "== Sekin callbacklar (asyncio debug) =="]
+        lines += collector.messages or ["Topilmadi"]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,110 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from config import TG_GLOBAL_RATE, TG_RATE_BURST
+
+# Ustuvorlik sinflari va ularning og'irligi: navbat bo'lganda interaktiv javoblar
+# ommaviy yuborishdan 8 barobar ko'p slot oladi, lekin broadcast ham to'xtab qolmaydi.
+INTERACTIVE = 'interactive'
+ADMIN = 'admin'
+BULK = 'bulk'
+
+PRIORITY_WEIGHTS = {
+    INTERACTIVE: 8,
+    ADMIN: 3,
+    BULK: 1,
+}
+
+
+class OutboundScheduler:
+    """Telegram global tezlik chegarasi ostida og'irlikli adolatli navbat (WFQ)
+
+    Har bir yuborish `acquire()` orqali slot oladi. Slotlar token bucket tezligida
+    beriladi; navbatdagi so'rovlar orasidan eng kichik "tugash vaqti" (finish tag)
+    ga ega bo'lgani tanlanadi. Og'irligi katta sinfning tegi sekinroq o'sadi,
+    shuning uchun broadcast paytida ham kino yuborish kutmasdan o'tadi.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, weights: Optional[Dict[str, int]] = None):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.weights = dict(weights or PRIORITY_WEIGHTS)
+        self._queues = {name: deque() for name in self.weights}
+        self._last_finish = {name: 0.0 for name in self.weights}
+        self._virtual_time = 0.0
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def queue_sizes(self) -> Dict[str, int]:
+        return {name: len(queue) for name, queue in self._queues.items()}
+
+    async def acquire(self, priority: str = INTERACTIVE):
+        """Navbat kelguncha kutish (so'rovni yuborishdan oldin chaqiriladi)"""
+        if priority not in self._queues:
+            priority = INTERACTIVE
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        finish = max(self._virtual_time, self._last_finish[priority]) + 1.0 / self.weights[priority]
+        self._last_finish[priority] = finish
+        self._queues[priority].append((finish, future))
+        self._wakeup.set()
+        await future
+
+    async def stop(self):
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    def _next_class(self) -> Optional[str]:
+        selected = None
+        selected_finish = None
+        for name, queue in self._queues.items():
+            # Bekor qilingan (masalan, handler timeout bo'lgan) so'rovlarni tashlab yuborish
+            while queue and queue[0][1].done():
+                queue.popleft()
+            if queue and (selected_finish is None or queue[0][0] < selected_finish):
+                selected = name
+                selected_finish = queue[0][0]
+        return selected
+
+    async def _take_token(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+            self._refilled_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def _run(self):
+        while True:
+            if self._next_class() is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            await self._take_token()
+            # Token kutilayotganda yuqori ustuvorlikdagi so'rov kelgan bo'lishi mumkin
+            name = self._next_class()
+            if name is None:
+                self._tokens = min(self.burst, self._tokens + 1)
+                continue
+            finish, future = self._queues[name].popleft()
+            self._virtual_time = finish
+            future.set_result(None)
+
+
+outbound_scheduler = OutboundScheduler(rate=TG_GLOBAL_RATE, burst=TG_RATE_BURST)
@@ -0,0 +1,74 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import FrozenSet, Optional
+
+# O'zbek (va rus) kirill harflarining lotincha yozilishi
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'ғ': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
+    'ж': 'j', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'қ': 'q', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ў': 'o',
+    'ф': 'f', 'х': 'x', 'ҳ': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sh', 'ъ': '',
+    'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+}
+CYRILLIC_VOWELS = set('аеёиоуўэюяы')
+# o‘, g‘ va tutuq belgisining turli yozilishlari: qidiruvda hammasi tashlab yuboriladi
+APOSTROPHES = "'`ʻʼ‘’ʹ′´"
+_apostrophes = str.maketrans('', '', APOSTROPHES)
+_non_word = re.compile(r'[^0-9a-z]+')
+
+
+def _transliterate(text: str) -> str:
+    result = []
+    previous = ' '
+    for char in text:
+        if char == 'е' and (not previous.isalpha() or previous in CYRILLIC_VOWELS):
+            # So'z boshida va unlidan keyin "е" lotinchada "ye" bo'ladi: "Ер" -> "yer"
+            result.append('ye')
+        else:
+            result.append(CYRILLIC_TO_LATIN.get(char, char))
+        previous = char
+    return ''.join(result)
+
+
+def normalize_search_text(text: Optional[str]) -> str:
+    """Qidiruv uchun matnni bir xil ko'rinishga keltirish
+
+    Kichik harf, kirill -> lotin, tutuq belgilari olib tashlanadi, diakritikalar
+    tozalanadi, harf-raqamdan boshqa belgilar bitta bo'shliqqa aylanadi:
+    "O‘tgan kunlar", "O'tgan kunlar" va "Ўтган кунлар" -> "otgan kunlar".
+    """
+    if not text:
+        return ''
+    text = _transliterate(text.casefold()).translate(_apostrophes)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _non_word.sub(' ', text).strip()
+
+
+def movie_search_text(movie_name: Optional[str], movie_genre: Optional[str]) -> str:
+    """movies.search_text: nom va janrning normallashtirilgan ko'rinishi"""
+    return ' '.join(part for part in (normalize_search_text(movie_name), normalize_search_text(movie_genre)) if part)
+
+
+def _pad_words(text: str) -> str:
+    return ''.join(f"  {word} " for word in text.split())
+
+
+@lru_cache(maxsize=256)
+def trigrams(text: str) -> FrozenSet[str]:
+    """pg_trgm kabi: har bir so'z oldidan ikki, oxiridan bitta bo'shliq bilan"""
+    padded = _pad_words(text)
+    return frozenset(gram for gram in (padded[index:index + 3] for index in range(len(padded) - 2))
+                     if not gram.endswith('  '))
+
+
+def word_similarity(query: str, text: str) -> float:
+    """So'rov trigrammalarining matnda uchragan ulushi (0..1): xato yozilgan so'zlar uchun"""
+    query_trigrams = trigrams(query)
+    if not query_trigrams:
+        return 0.0
+    # "  a", " ab" va "ab " ko'rinishidagi trigrammalar so'zlar chegarasidan oshib ketmaydi,
+    # shuning uchun matnning trigrammalar to'plamini qurmasdan qism satr sifatida tekshiriladi
+    padded = _pad_words(text)
+    return sum(gram in padded for gram in query_trigrams) / len(query_trigrams)
@@ -0,0 +1,224 @@
+import contextvars
+import socket
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from telegram.request import BaseRequest, HTTPXRequest, RequestData
+
+from config import (
+    TG_BULK_POOL_SIZE,
+    TG_CONNECT_TIMEOUT,
+    TG_HTTP_VERSION,
+    TG_INTERACTIVE_POOL_SIZE,
+    TG_KEEPALIVE_IDLE,
+    TG_POOL_TIMEOUT,
+    TG_READ_TIMEOUT,
+    TG_WRITE_TIMEOUT,
+)
+from utils import tracing
+from utils.metrics import BOT_API_ERRORS, BOT_API_LATENCY
+from utils.scheduler import ADMIN, BULK, INTERACTIVE, OutboundScheduler, outbound_scheduler
+
+# Trafik turlari: INTERACTIVE - foydalanuvchiga to'g'ridan-to'g'ri javob,
+# ADMIN - adminlarga bildirishnomalar, BULK - broadcast kabi ommaviy yuborish
+
+# Telegram global tezlik chegarasiga kiradigan (xabar yuboradigan) metodlar
+RATE_LIMITED_METHODS = frozenset({
+    'sendMessage',
+    'copyMessage',
+    'forwardMessage',
+    'sendPhoto',
+    'sendVideo',
+    'sendDocument',
+    'sendAudio',
+    'sendAnimation',
+    'sendVoice',
+    'sendMediaGroup',
+})
+
+# Bot API metodlari uchun o'qish (javob kutish) vaqtlari, soniyalarda.
+# Bu yerda yo'q metodlar TG_READ_TIMEOUT dan foydalanadi.
+METHOD_READ_TIMEOUTS = {
+    'getChatMember': 3.0,
+    'answerCallbackQuery': 3.0,
+    'sendMessage': 5.0,
+    'editMessageText': 5.0,
+    'editMessageCaption': 5.0,
+    'editMessageReplyMarkup': 5.0,
+    'deleteMessage': 5.0,
+    'copyMessage': 10.0,
+    'getFile': 10.0,
+    'sendPhoto': 20.0,
+    'sendDocument': 60.0,
+    'sendVideo': 60.0,
+    'sendAudio': 60.0,
+}
+
+_traffic_class = contextvars.ContextVar('traffic_class', default=INTERACTIVE)
+
+
+@contextmanager
+def traffic_class(name: str):
+    """Blok ichidagi barcha Bot API so'rovlarini berilgan trafik turiga biriktirish"""
+    token = _traffic_class.set(name)
+    try:
+        yield
+    finally:
+        _traffic_class.reset(token)
+
+
+def current_traffic_class() -> str:
+    return _traffic_class.get()
+
+
+class ApiMethodStats:
+    __slots__ = ('calls', 'errors', 'total_time', 'max_time')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+
+class ApiMetrics:
+    """Bot API metodlari bo'yicha chaqiruvlar soni, xatoliklar va kechikish"""
+
+    def __init__(self):
+        self.methods: Dict[str, ApiMethodStats] = {}
+
+    def record(self, method: str, duration: float, ok: bool):
+        stats = self.methods.get(method)
+        if stats is None:
+            stats = self.methods[method] = ApiMethodStats()
+        stats.calls += 1
+        stats.total_time += duration
+        if duration > stats.max_time:
+            stats.max_time = duration
+        if not ok:
+            stats.errors += 1
+        BOT_API_LATENCY.observe(duration, method)
+        if not ok:
+            BOT_API_ERRORS.inc(method)
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            method: {
+                'calls': stats.calls,
+                'errors': stats.errors,
+                'avg_ms': round(stats.total_time / stats.calls * 1000, 1) if stats.calls else 0.0,
+                'max_ms': round(stats.max_time * 1000, 1),
+            }
+            for method, stats in sorted(self.methods.items())
+        }
+
+
+api_metrics = ApiMetrics()
+
+
+class RoutedRequest(BaseRequest):
+    """Bot API so'rovlarini trafik turiga qarab alohida ulanish havzalariga yo'naltirish
+
+    Broadcast o'z havzasidagi ulanishlarni band qilsa ham, kino yuborish va obuna
+    tekshiruvlari uchun interaktiv havzadagi ulanishlar bo'sh qoladi. Xabar
+    yuboradigan metodlar esa oldin scheduler dan ustuvorligiga qarab slot oladi.
+    """
+
+    def __init__(
+        self,
+        interactive: BaseRequest,
+        bulk: BaseRequest,
+        method_read_timeouts: Optional[Dict[str, float]] = None,
+        metrics: Optional[ApiMetrics] = None,
+        scheduler: Optional[OutboundScheduler] = None
+    ):
+        self._interactive = interactive
+        self._bulk = bulk
+        self._method_read_timeouts = method_read_timeouts or {}
+        self._metrics = metrics if metrics is not None else api_metrics
+        self._scheduler = scheduler
+
+    @property
+    def read_timeout(self) -> Optional[float]:
+        return self._interactive.read_timeout
+
+    async def initialize(self) -> None:
+        await self._interactive.initialize()
+        await self._bulk.initialize()
+
+    async def shutdown(self) -> None:
+        await self._interactive.shutdown()
+        await self._bulk.shutdown()
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: Optional[RequestData] = None,
+        read_timeout=BaseRequest.DEFAULT_NONE,
+        write_timeout=BaseRequest.DEFAULT_NONE,
+        connect_timeout=BaseRequest.DEFAULT_NONE,
+        pool_timeout=BaseRequest.DEFAULT_NONE,
+    ) -> Tuple[int, bytes]:
+        api_method = url.rsplit('/', 1)[-1]
+        if read_timeout is BaseRequest.DEFAULT_NONE and api_method in self._method_read_timeouts:
+            read_timeout = self._method_read_timeouts[api_method]
+        priority = current_traffic_class()
+        target = self._bulk if priority == BULK else self._interactive
+        if self._scheduler is not None and api_method in RATE_LIMITED_METHODS:
+            await self._scheduler.acquire(priority)
+
+        started = time.perf_counter()
+        ok = False
+        try:
+            code, payload = await target.do_request(
+                url=url,
+                method=method,
+                request_data=request_data,
+                read_timeout=read_timeout,
+                write_timeout=write_timeout,
+                connect_timeout=connect_timeout,
+                pool_timeout=pool_timeout,
+            )
+            ok = 200 <= code < 300
+            return code, payload
+        finally:
+            duration = time.perf_counter() - started
+            self._metrics.record(api_method, duration, ok)
+            tracing.record(tracing.API, api_method, started, duration, not ok)
+
+
+def _keepalive_socket_options(idle: int) -> list:
+    """Uzoq turgan ulanishlar NAT/proxy tomonidan jimgina uzilmasligi uchun TCP keep-alive"""
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle))
+    if hasattr(socket, 'TCP_KEEPINTVL'):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(1, idle // 4)))
+    if hasattr(socket, 'TCP_KEEPCNT'):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 4))
+    return options
+
+
+def _build_pool(pool_size: int) -> HTTPXRequest:
+    # HTTPXRequest havzadagi barcha ulanishlarni keep-alive holatda ushlab turadi
+    return HTTPXRequest(
+        connection_pool_size=pool_size,
+        read_timeout=TG_READ_TIMEOUT,
+        write_timeout=TG_WRITE_TIMEOUT,
+        connect_timeout=TG_CONNECT_TIMEOUT,
+        pool_timeout=TG_POOL_TIMEOUT,
+        http_version=TG_HTTP_VERSION,
+        socket_options=_keepalive_socket_options(TG_KEEPALIVE_IDLE),
+    )
+
+
+def build_bot_request() -> RoutedRequest:
+    """Konfiguratsiya asosida interaktiv va ommaviy havzali so'rov qatlamini yaratish"""
+    return RoutedRequest(
+        interactive=_build_pool(TG_INTERACTIVE_POOL_SIZE),
+        bulk=_build_pool(TG_BULK_POOL_SIZE),
+        method_read_timeouts=METHOD_READ_TIMEOUTS,
+        scheduler=outbound_scheduler,
+    )
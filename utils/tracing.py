@@ -0,0 +1,176 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import random
+import time
+from logging.handlers import RotatingFileHandler
+from typing import List, Optional
+
+from config import TRACE_FILE, TRACE_FILE_MAX_MB, TRACE_SAMPLE_RATE, TRACE_SLOW_MS
+
+logger = logging.getLogger(__name__)
+
+# Bitta trace dagi spanlar soni chegarasi (broadcast kabi uzun jarayonlar uchun)
+MAX_SPANS = 500
+
+# Span turlari
+HANDLER = 'handler'
+DB = 'db'
+API = 'api'
+
+
+class Trace:
+    """Bitta update ni qayta ishlash: ildiz handler va uning ichidagi DB/API chaqiruvlari"""
+
+    __slots__ = ('name', 'update_id', 'user_id', 'started', 'spans', 'dropped', 'finished')
+
+    def __init__(self, name: str, update_id: Optional[int], user_id: Optional[int]):
+        self.name = name
+        self.update_id = update_id
+        self.user_id = user_id
+        self.started = time.perf_counter()
+        # (tur, nom, boshlanish, davomiylik, xatolik)
+        self.spans: List[tuple] = []
+        self.dropped = 0
+        self.finished = False
+
+    def add(self, kind: str, name: str, started: float, duration: float, error: bool):
+        if self.finished:
+            return
+        if len(self.spans) >= MAX_SPANS:
+            self.dropped += 1
+            return
+        self.spans.append((kind, name, started, duration, error))
+
+    def totals(self) -> dict:
+        """Har bir tur bo'yicha umumiy vaqt: bir-birining ichidagi yoki ustma-ust tushgan
+        spanlar (masalan, boshqa DB metodini chaqiruvchi DB metodi yoki parallel API
+        so'rovlari) bir marta hisoblanadi - intervallar birlashmasi olinadi"""
+        totals = {}
+        ends = {}
+        for kind, _, started, span_duration, _ in sorted(self.spans, key=lambda span: span[2]):
+            end = started + span_duration
+            covered = ends.get(kind)
+            if covered is None or started >= covered:
+                totals[kind] = totals.get(kind, 0.0) + span_duration
+                ends[kind] = end
+            elif end > covered:
+                totals[kind] += end - covered
+                ends[kind] = end
+        return totals
+
+    def to_dict(self, duration: float, error: Optional[str]) -> dict:
+        totals = self.totals()
+        return {
+            'ts': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'trace': self.name,
+            'update_id': self.update_id,
+            'user_id': self.user_id,
+            'duration_ms': round(duration * 1000, 1),
+            'error': error,
+            'totals_ms': {kind: round(value * 1000, 1) for kind, value in totals.items()},
+            'spans': [
+                [kind, name, round((started - self.started) * 1000, 1), round(span_duration * 1000, 2)]
+                + (['error'] if span_error else [])
+                for kind, name, started, span_duration, span_error in sorted(self.spans, key=lambda span: span[2])
+            ],
+            'dropped_spans': self.dropped,
+        }
+
+
+_current = contextvars.ContextVar('trace', default=None)
+
+
+class Tracer:
+    """Update larni namunaviy (sample_rate) kuzatish; sekinlarini faylga yozish
+
+    Namunaga tushmagan update uchun trace yaratilmaydi: `record()` bitta
+    contextvar o'qishdan iborat bo'ladi. `slow_ms` dan uzoq davom etgan
+    trace lar JSON qator sifatida aylanma (rotating) faylga yoziladi.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = TRACE_SAMPLE_RATE,
+        slow_ms: float = TRACE_SLOW_MS,
+        path: str = TRACE_FILE,
+        max_mb: int = TRACE_FILE_MAX_MB
+    ):
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_ms / 1000
+        self.path = path
+        self.max_mb = max_mb
+        self.sampled = 0
+        self.slow = 0
+        self._writer: Optional[logging.Logger] = None
+
+    def _get_writer(self) -> logging.Logger:
+        if self._writer is None:
+            writer = logging.getLogger('prokino.traces')
+            writer.propagate = False
+            writer.setLevel(logging.INFO)
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            handler = RotatingFileHandler(
+                self.path, maxBytes=self.max_mb * 1024 * 1024, backupCount=5, encoding='utf-8'
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            writer.addHandler(handler)
+            self._writer = writer
+        return self._writer
+
+    def start(self, name: str, update=None) -> Optional[contextvars.Token]:
+        if self.sample_rate <= 0 or _current.get() is not None:
+            return None
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return None
+        update_id = getattr(update, 'update_id', None)
+        user = getattr(update, 'effective_user', None)
+        self.sampled += 1
+        return _current.set(Trace(name, update_id, getattr(user, 'id', None)))
+
+    def finish(self, token: Optional[contextvars.Token], error: Optional[BaseException] = None):
+        if token is None:
+            return
+        trace = _current.get()
+        _current.reset(token)
+        if trace is None:
+            return
+        # Fonda davom etayotgan vazifalar (create_task) endi bu trace ga yozmaydi
+        trace.finished = True
+        duration = time.perf_counter() - trace.started
+        if duration < self.slow_seconds:
+            return
+        self.slow += 1
+        try:
+            payload = trace.to_dict(duration, type(error).__name__ if error else None)
+            self._get_writer().info(json.dumps(payload, ensure_ascii=False))
+        except Exception as exc:
+            logger.debug(f"Sekin trace ni yozib bo'lmadi: {exc}")
+
+    def wrap_handler(self, name: str, callback):
+        """Handler callback ini ildiz span bilan o'rash"""
+        @functools.wraps(callback)
+        async def wrapper(update, context, *args, **kwargs):
+            token = self.start(name, update)
+            error = None
+            try:
+                return await callback(update, context, *args, **kwargs)
+            except Exception as exc:
+                error = exc
+                raise
+            finally:
+                self.finish(token, error)
+        return wrapper
+
+
+def record(kind: str, name: str, started: float, duration: float, error: bool = False):
+    """Joriy trace ga span qo'shish (trace bo'lmasa hech narsa qilmaydi)"""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(kind, name, started, duration, error)
+
+
+tracer = Tracer()
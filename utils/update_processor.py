@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Turli foydalanuvchilar update lari parallel, bitta foydalanuvchiniki esa ketma-ket
+
+    Admin va premium oqimlari `context.user_data` dagi holatlarga (awaiting_*, premium
+    flow, pending_movie_code) tayanadi: bir foydalanuvchining ikki update i (tugmani
+    ikki marta bosish, tez yozish) parallel ishlasa, holatlar aralashib ketadi.
+    Foydalanuvchi (u bo'lmasa chat) bo'yicha qulf shuni oldini oladi.
+
+    Qulfni kutayotgan update ham umumiy `max_concurrent_updates` o'rnidan birini egallaydi.
+    block=False handlerlar (masalan, inline so'rovlar) alohida vazifada ishlaydi va qulfni
+    ushlab turmaydi.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        # kalit -> [qulf, uni ishlatayotgan yoki kutayotgan update lar soni]
+        self._locks: Dict[int, list] = {}
+
+    @staticmethod
+    def _key(update: object) -> Optional[int]:
+        if not isinstance(update, Update):
+            return None
+        if update.effective_user:
+            return update.effective_user.id
+        if update.effective_chat:
+            return update.effective_chat.id
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self._key(update)
+        if key is None:
+            await coroutine
+            return
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await coroutine
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                self._locks.pop(key, None)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        self._locks.clear()
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, Optional
+
+from config import HEALTH_MAX_LAG_MS, LOOP_STALL_MS, LOOP_WATCHDOG_INTERVAL
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG = registry.histogram(
+    'prokino_loop_lag_seconds', "Event loop kechikishi (uyg'onish kechikishi)",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+LOOP_STALLS = registry.counter('prokino_loop_stalls_total', "Event loop bloklangan holatlar")
+
+# Bot API holati shu oraliqda bir martadan ko'p tekshirilmaydi (soniya)
+API_CHECK_TTL = 30.0
+CHECK_TIMEOUT = 5.0
+
+
+class LoopWatchdog:
+    """Event loop kechikishini doimiy o'lchash va bloklanishlarni ushlash
+
+    Loop ichidagi vazifa har `interval` soniyada uyg'onib, kechikishni yozadi.
+    Alohida thread esa oxirgi uyg'onishdan `stall_ms` dan ko'p vaqt o'tsa,
+    loop thread ining joriy stekini (aynan bloklab turgan chaqiruvni) logga yozadi.
+    """
+
+    def __init__(
+        self,
+        interval: float = LOOP_WATCHDOG_INTERVAL,
+        stall_ms: float = LOOP_STALL_MS,
+        max_lag_ms: float = HEALTH_MAX_LAG_MS
+    ):
+        self.interval = interval
+        self.stall_seconds = stall_ms / 1000
+        self.max_lag_seconds = max_lag_ms / 1000
+        self.stalls = deque(maxlen=20)
+        # Oxirgi ~1 daqiqadagi kechikishlar (sog'liq holati uchun)
+        self._recent = deque(maxlen=max(1, int(60 / max(interval, 0.01))))
+        self._last_tick = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._monitor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._api_checked_at = 0.0
+        self._api_ok: Optional[bool] = None
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._probe())
+        self._monitor = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._monitor.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._monitor is not None:
+            self._monitor.join(timeout=1)
+            self._monitor = None
+
+    async def _probe(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._last_tick = time.monotonic()
+            self._recent.append(lag)
+            LOOP_LAG.observe(lag)
+
+    def _watch(self):
+        stalled = False
+        while not self._stop.wait(self.interval):
+            blocked_for = time.monotonic() - self._last_tick - self.interval
+            if blocked_for < self.stall_seconds:
+                stalled = False
+                continue
+            if stalled:
+                continue
+            # Bitta bloklanish uchun stek bir marta yoziladi
+            stalled = True
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = ''.join(traceback.format_stack(frame)[-15:]) if frame is not None else ''
+            LOOP_STALLS.inc()
+            self.stalls.append({
+                'at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'blocked_ms': round(blocked_for * 1000),
+                'stack': stack,
+            })
+            logger.warning(f"Event loop {blocked_for * 1000:.0f} ms dan beri bloklangan. Stek:\n{stack}")
+
+    def lag_stats(self) -> Dict[str, float]:
+        values = list(self._recent)
+        if not values:
+            return {'mean_ms': 0.0, 'max_ms': 0.0}
+        return {
+            'mean_ms': round(sum(values) / len(values) * 1000, 1),
+            'max_ms': round(max(values) * 1000, 1),
+        }
+
+    async def _check_api(self, bot) -> bool:
+        now = time.monotonic()
+        if self._api_ok is not None and now - self._api_checked_at < API_CHECK_TTL:
+            return self._api_ok
+        try:
+            await asyncio.wait_for(bot.get_me(), timeout=CHECK_TIMEOUT)
+            self._api_ok = True
+        except Exception as exc:
+            logger.warning(f"Bot API tekshiruvi muvaffaqiyatsiz: {exc}")
+            self._api_ok = False
+        self._api_checked_at = now
+        return self._api_ok
+
+    async def health(self, db, bot) -> Dict:
+        """Sog'liq holati: loop kechikishi, baza va Bot API"""
+        lag = self.lag_stats()
+        loop_ok = self._task is not None and lag['max_ms'] <= self.max_lag_seconds * 1000
+        try:
+            db_ok = await asyncio.wait_for(asyncio.to_thread(db.ping), timeout=CHECK_TIMEOUT)
+        except Exception:
+            db_ok = False
+        api_ok = await self._check_api(bot)
+        return {
+            'status': 'ok' if loop_ok and db_ok and api_ok else 'fail',
+            'loop': {'ok': loop_ok, **lag, 'stalls': len(self.stalls)},
+            'db': {'ok': db_ok},
+            'bot_api': {'ok': api_ok},
+        }
+
+    def http_route(self, db, bot_getter):
+        """MetricsServer uchun /health: sog'lom bo'lsa 200, aks holda 503"""
+        async def route():
+            bot = bot_getter()
+            result = await self.health(db, bot)
+            status = 200 if result['status'] == 'ok' else 503
+            return status, 'application/json', json.dumps(result) + '\n'
+        return route
+
+
+loop_watchdog = LoopWatchdog()